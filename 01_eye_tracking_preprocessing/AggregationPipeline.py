@@ -26,27 +26,33 @@ import pandas as pd
 import copy
 import datetime
 
+from contextlib import ExitStack
 from timeit import default_timer as timer
-from joblib import Parallel, delayed
 
 from aggregation.aggregation_helper import interpolate_data
 from aggregation.crop_data_aggregation import crop_data_aggregation
 from aggregation.add_phase_scenario_columns import add_phase_scenario_columns
 from aggregation.load_config import load_config
 from aggregation.fct_eye_utils import get_features
-from aggregation.load_data import load_data
+from aggregation.load_data import get_aggregation_columns, load_data
+from processing.stage_profiler import StageProfiler, save_profile_summary
+from processing.worker_pool import WorkerPool, get_worker_count
 from processing.target_zones import get_target_zone_names
 
 class AggregationPipeline:
     def __init__(self, config_file: str) -> None:
         # Load basic configs from .yaml file.
+        self.config_file = config_file
         self.config = load_config(config_file)
 
-    def save_one_participant_csv_safely(self, aggregation_size: int, proband_id: str):
+    # Aggregate one participant in a worker and return the path of the saved pickle file instead of the data,
+    # None if the aggregation failed.
+    def save_one_participant_file_safely(self, aggregation_size: int, proband_id: str):
         try:
-            data_agg = self.save_one_participant_csv(
+            self.save_one_participant_csv(
                 aggregation_size, proband_id)
-            return data_agg
+            return os.path.join(self.config.data_directory_processed, proband_id, 'ircam',
+                                f"{proband_id}_{str(aggregation_size)}.pkl")
         except Exception as e:
             print(proband_id + ":")
             print(f"Exception occurred: {e}")
@@ -67,11 +73,15 @@ class AggregationPipeline:
             data_agg = pd.read_pickle(filename)
             return data_agg
 
+        profiler = StageProfiler(proband_id)
+
         # Load data from processed files.
         directory_processed = config.data_directory_processed
 
-        data, data_phases = load_data(
-            directory_processed, proband_id, 'aggregation', config)
+        with profiler.measure('load_data') as record:
+            data, data_phases = load_data(
+                directory_processed, proband_id, 'aggregation', config, get_aggregation_columns(config))
+            profiler.set_output(record, data)
 
         # Ensure all eye movement are present in the data.
         eye_movement_binary = ['event+FIXA+onehot', 'event+SACC+onehot']
@@ -80,11 +90,15 @@ class AggregationPipeline:
                 data[x] = 0
 
         # Interpolate data to constant frequency.
-        data = interpolate_data(data, config.binary_features)
+        with profiler.measure('interpolate_data', len(data)) as record:
+            data = interpolate_data(data, config.binary_features)
+            profiler.set_output(record, data)
 
         # Crop data for faster aggregation.
-        data = crop_data_aggregation(
-            data, data_phases, config.selected_phases, config.selected_scenarios, 0)
+        with profiler.measure('crop_data_aggregation', len(data)) as record:
+            data = crop_data_aggregation(
+                data, data_phases, config.selected_phases, config.selected_scenarios, 0)
+            profiler.set_output(record, data)
 
         # Get target zone names for proper naming of the columns.
         target_zone_data = get_target_zone_names()
@@ -93,11 +107,13 @@ class AggregationPipeline:
             target_zone_names.update(
                 {target_zone: target_zone_data[target_zone]['name']})
 
-        data_agg = get_features(data, epoch_width=aggregation_size, step_size=config.step_size,
-                                numerical_features=config.numerical_features, binary_features=config.binary_features,
-                                single_eye_movement_features=config.single_eye_movement_features,
-                                all_eye_movement_features='event+eye_movement_type+eventspec',
-                                target_zone_names=target_zone_names)
+        with profiler.measure('get_features', len(data)) as record:
+            data_agg = get_features(data, epoch_width=aggregation_size, step_size=config.step_size,
+                                    numerical_features=config.numerical_features, binary_features=config.binary_features,
+                                    single_eye_movement_features=config.single_eye_movement_features,
+                                    all_eye_movement_features='event+eye_movement_type+eventspec',
+                                    target_zone_names=target_zone_names)
+            profiler.set_output(record, data_agg)
 
         # Crop data such that only valid sliding windows remain.
         data_agg = crop_data_aggregation(data_agg, data_phases,config.selected_phases,
@@ -138,10 +154,15 @@ class AggregationPipeline:
         data_agg = standardize_to_pandas_float(data_agg)
 
         # Save data to parquet and pickle files.
-        data_agg.convert_dtypes().to_parquet(directory_save + proband_id +
-                                             '_' + str(aggregation_size) + '.parquet')
-        data_agg.to_pickle(directory_save + proband_id +
-                           '_' + str(aggregation_size) + '.pkl')
+        with profiler.measure('save_files', len(data_agg)):
+            data_agg.convert_dtypes().to_parquet(directory_save + proband_id +
+                                                 '_' + str(aggregation_size) + '.parquet')
+            data_agg.to_pickle(directory_save + proband_id +
+                               '_' + str(aggregation_size) + '.pkl')
+
+        # Save the time and memory of each step, separately for each window width.
+        if config.profile_directory is not None:
+            profiler.save(os.path.join(config.profile_directory, str(aggregation_size)))
 
         return data_agg
 
@@ -173,32 +194,46 @@ class AggregationPipeline:
         proband_ids = [proband_id for proband_id in os.listdir(
             directory_processed) if not proband_id.startswith('.') and proband_id[-3:] in self.config.probands_selected]
 
-        for aggregation_size in self.config.aggregation_sizes:
-            start_time = timer()
-
-            if self.config.multi_cores is False or len(proband_ids) == 1:
-                print("Not using multiple cores.")
-                data_agg_all = []
-                for proband_id in proband_ids:
-                    data_agg_all.append(self.save_one_participant_csv(
-                        aggregation_size, str(proband_id)))
-                self.save_all_participants_csv(
-                    data_agg_all, self.config.data_directory_processed, aggregation_size)
-            elif self.config.multi_cores is True:
-                print("Using multiple cores.")
-                with Parallel(n_jobs=min(19, len(proband_ids)), verbose=101, backend='multiprocessing') as parallel:
-                    data_agg_all = parallel(delayed(self.save_one_participant_csv_safely)(
-                        aggregation_size, str(proband_id)) for proband_id in proband_ids)
-
-                self.save_all_participants_csv(
-                    data_agg_all, self.config.data_directory_processed, aggregation_size)
-            else:
-                print('Error with multi_cores setting in script!')
-                exit()
-
-            end_time = timer()
-            process_time = end_time - start_time
-            print(
-                f'Finished with epoch width {aggregation_size}s in {process_time} seconds.')
+        # The pool is closed when the loop ends, also after an exception or exit().
+        pool = None
+        with ExitStack() as stack:
+            for aggregation_size in self.config.aggregation_sizes:
+                start_time = timer()
+
+                if self.config.multi_cores is False or len(proband_ids) == 1:
+                    print("Not using multiple cores.")
+                    data_agg_all = []
+                    for proband_id in proband_ids:
+                        data_agg_all.append(self.save_one_participant_csv(
+                            aggregation_size, str(proband_id)))
+                    self.save_all_participants_csv(
+                        data_agg_all, self.config.data_directory_processed, aggregation_size)
+                elif self.config.multi_cores is True:
+                    print("Using multiple cores.")
+                    # The workers are started once for all window widths and each creates its own pipeline.
+                    if pool is None:
+                        worker_count = get_worker_count(len(proband_ids), self.config.max_workers,
+                                                        self.config.worker_memory_budget)
+                        print(f"Using {worker_count} workers")
+                        pool = stack.enter_context(WorkerPool(AggregationPipeline, (self.config_file,), worker_count))
+                    filenames = pool.map('save_one_participant_file_safely', [
+                        (aggregation_size, str(proband_id)) for proband_id in proband_ids])
+                    data_agg_all = [pd.read_pickle(filename) for filename in filenames if filename is not None]
+
+                    self.save_all_participants_csv(
+                        data_agg_all, self.config.data_directory_processed, aggregation_size)
+                else:
+                    print('Error with multi_cores setting in script!')
+                    exit()
+
+                end_time = timer()
+                process_time = end_time - start_time
+                print(
+                    f'Finished with epoch width {aggregation_size}s in {process_time} seconds.')
+
+                # Summarize the time per step over all probands.
+                if self.config.profile_directory is not None:
+                    save_profile_summary(os.path.join(self.config.profile_directory, str(aggregation_size)),
+                                         proband_ids)
 
         return data_agg_all
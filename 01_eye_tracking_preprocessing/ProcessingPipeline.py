@@ -22,32 +22,52 @@
 #####################################################################
 
 import os
+import tempfile
+from typing import Iterator
+import numpy as np
 import pandas as pd
-from joblib import Parallel, delayed
 from processing.add_blood_biometrics import add_bac_level
 from processing.add_eye_movement import add_eye_movement
 from processing.add_phase_scenario_columns import add_phase_scenario_columns
-from processing.calculate_acceleration import calculate_acceleration
+from processing.calculate_acceleration import DERIVATIVE_CONTEXT, calculate_velocity_and_acceleration
 from processing.calculate_spherical_coordinates import calculate_spherical_coordinates
-from processing.calculate_velocity import calculate_velocity
 from processing.check_phases_scenarios import check_phases_scenarios
-from processing.crop_data import crop_data
+from processing.chunking import RawChunkReader, get_chunk_bounds, take_time_range
+from processing.column_manifest import get_input_columns
+from processing.crop_data import crop_data, get_selected_times
+from processing.dtype_policy import DtypePolicy, format_memory_report, update_peak_memory
 from processing.interpolate_and_filter import interpolate_and_filter
 from processing.load_config import load_config
-from processing.load_raw_file import load_file
-from processing.preprocess import preprocess
+from processing.load_raw_file import load_file, update_sidecar
+from processing.preprocess import filter_samples, get_target_zones, preprocess
 from processing.produce_phases_csv import produce_phases_csv
 from processing.rad_to_deg import rad_to_deg
-from processing.remodnav.remodnav.remodnav import remodnav
+from processing.read_in_cam2world import get_calibration_file
+from processing.remodnav.remodnav.remodnav import RemodnavParams, classify, configure_logging
 from processing.renaming_conventions import renaming_convention_dict
-from processing.save_files import save_files
+from processing.save_files import save_chunked_files, save_files
+from processing.stage_cache import Stage, StageCache, get_code_version, get_file_hash, run_stages
+from processing.stage_profiler import StageProfiler, save_profile_summary
+from processing.worker_pool import WorkerPool, get_worker_count
 
 # ProcessingPipeline defines the high-level steps for loading,
 # preprocessing and saving the data of the selected probands.
 class ProcessingPipeline:
     def __init__(self, config_file: str) -> None:
         # Load basic configs from .yaml file.
+        self.config_file = config_file
         self.config = load_config(config_file)
+        # Parse the REMODNAV arguments once, the classifier is reused for all probands of a worker. The
+        # log level of the arguments applies to the process, each worker creates its own pipeline.
+        self.remodnav_params = RemodnavParams.from_args(self.config.remodnav_args)
+        configure_logging(self.remodnav_params)
+        # Raw channels read by the processing steps or passed through to the processed files, all
+        # channels are loaded if no passthrough columns are configured.
+        self.input_columns = None
+        if self.config.passthrough_columns is not None:
+            self.input_columns = get_input_columns(self.config.passthrough_columns)
+        # Dtypes of the one-hot columns and labels between the processing steps and of the saved data.
+        self.dtype_policy = DtypePolicy.from_config(self.config.dtype_policy)
 
     def run(self):
         folders = sorted(os.listdir(self.config.raw_input_directory))
@@ -61,101 +81,371 @@ class ProcessingPipeline:
         print(f"Processing {len(folders)} probands")
 
         if self.config.run_probands_in_parallel:
-            with Parallel(
-                n_jobs=min(32, len(folders)), verbose=51, backend="multiprocessing"
-            ) as parallel:
-                parallel(delayed(self.run_proband_safely)(folder) for folder in folders)
+            # Each worker creates its own pipeline once, only the folder names are sent to the workers.
+            worker_count = get_worker_count(len(folders), self.config.max_workers, self.config.worker_memory_budget)
+            print(f"Using {worker_count} workers")
+            with WorkerPool(ProcessingPipeline, (self.config_file,), worker_count) as pool:
+                pool.map("run_proband_safely", [(folder,) for folder in folders])
         else:
             for folder in folders:
                 self.run_proband(folder)
 
-    # Read in the data of one proband from all available .csv files.
-    def load_data(self, directory_folder: str) -> pd.DataFrame:
+        # Summarize the time per processing step over all probands.
+        if self.config.profile_directory is not None:
+            save_profile_summary(self.config.profile_directory, folders)
+
+    # Paths of all available .csv files of one proband.
+    def get_raw_files(self, directory_folder: str) -> list[str]:
         path_suffix = "study_day/ircam/"
 
         directory_ircam = os.path.join(
             directory_folder, path_suffix
         )
-        raw_data = []
-        for file in os.listdir(directory_ircam):
+        return [
+            os.path.join(directory_ircam, file)
+            for file in os.listdir(directory_ircam)
             if (
                 not file.startswith(".")
                 and file.endswith(".csv")
                 and os.path.isfile(os.path.join(directory_ircam, file))
-            ):
-                file_data = load_file(os.path.join(directory_ircam, file))
-                raw_data.append(file_data)
+            )
+        ]
+
+    # Read in the data of one proband from all available .csv files.
+    def load_data(self, directory_folder: str) -> pd.DataFrame:
+        raw_data = []
+        for file in self.get_raw_files(directory_folder):
+            file_data = load_file(
+                file,
+                self.config.raw_cache_directory,
+                self.input_columns,
+            )
+            raw_data.append(file_data)
 
         # Concat the data from all .csv files to one data frame and sort according to date.
         raw_data = pd.concat(raw_data)
         raw_data.sort_index(inplace=True)
         return raw_data
 
-    def preprocess_data(
-        self, raw_data: pd.DataFrame, folder: str, directory_folder: str
-    ):
-        # Read in the times of the data phases and check if all requested data phases are available.
-        data_phases = produce_phases_csv(directory_folder)
+    # Processing steps of the whole recording of one proband as cacheable stages. Each stage maps the
+    # dataframes of the previous stage to its own, the config of a stage lists the settings and input
+    # files that the stage depends on besides the previous stage.
+    def get_stages(self, directory_folder: str, data_phases: pd.DataFrame, selected_phases: list[int],
+                   selected_scenarios: list[str]) -> list[Stage]:
+        handwritten_notes_folder = os.path.join(directory_folder, "study_day/handwritten-notes/")
+        driving_exact_hash = get_file_hash([os.path.join(handwritten_notes_folder, "driving_exact.csv")])
+
+        # Add eye movement types to data and one-hot encode them.
+        def add_eye_movement_types(frames: dict) -> dict:
+            data = frames["data"]
+            add_eye_movement(data, frames["events"], categorical_labels=self.dtype_policy.categorical_labels)
+            return {"data": data.join(pd.get_dummies(data["eye_movement_type"]))}
 
-        raw_data = interpolate_and_filter(raw_data)
+        # Filter data and determine eye movement types with the REMODNAV algorithm.
+        def classify_eye_movements(frames: dict) -> dict:
+            data, data_events = classify(frames["data"], self.remodnav_params)
+            return {"data": data, "events": data_events}
 
-        # Add the blood alcohol concentration data.
-        raw_data = add_bac_level(raw_data, directory_folder)
+        return [
+            # The raw files are identified by their size and modification time, like the Parquet sidecars.
+            Stage("load_data", lambda frames: {"data": self.load_data(directory_folder)},
+                  {"raw_files": [
+                      [os.path.basename(file), os.stat(file).st_size, os.stat(file).st_mtime_ns]
+                      for file in sorted(self.get_raw_files(directory_folder))
+                  ], "input_columns": self.input_columns},
+                  ["processing.load_raw_file", "processing.column_manifest"]),
+            Stage("interpolate_and_filter",
+                  lambda frames: {"data": interpolate_and_filter(frames["data"], self.input_columns)},
+                  {"input_columns": self.input_columns},
+                  ["processing.interpolate_and_filter"]),
+            # Add the blood alcohol concentration data.
+            Stage("add_bac_level", lambda frames: {"data": add_bac_level(frames["data"], directory_folder)},
+                  {"handwritten_notes": get_file_hash([
+                      os.path.join(handwritten_notes_folder, file)
+                      for file in ["general.csv", "driving_exact.csv", "BAC_driving.csv"]
+                  ])},
+                  ["processing.add_blood_biometrics"]),
+            # Crop data such that only the data of the requested scenarios and phases are left.
+            Stage("crop_data",
+                  lambda frames: {"data": crop_data(frames["data"], data_phases, selected_phases,
+                                                    selected_scenarios)[0]},
+                  {"driving_exact": driving_exact_hash, "selected_phases": selected_phases,
+                   "selected_scenarios": selected_scenarios},
+                  ["processing.crop_data", "processing.phase_index", "processing.produce_phases_csv"]),
+            # Preprocess the data and calculate gaze features.
+            Stage("preprocess",
+                  lambda frames: {"data": preprocess(frames["data"], directory_folder,
+                                                     confidence=self.config.confidence)},
+                  {"confidence": self.config.confidence,
+                   "calibration": get_file_hash([get_calibration_file(directory_folder)]),
+                   "target_zone_names": get_file_hash(["target_zone_names.xml"])},
+                  ["processing.preprocess", "processing.read_in_cam2world", "processing.target_zones"]),
+            Stage("calculate_spherical_coordinates",
+                  lambda frames: {"data": calculate_spherical_coordinates(frames["data"])},
+                  modules=["processing.calculate_spherical_coordinates"]),
+            Stage("classify", classify_eye_movements, {"remodnav_args": self.config.remodnav_args},
+                  ["processing.remodnav.remodnav.remodnav"]),
+            Stage("add_eye_movement", add_eye_movement_types, modules=["processing.add_eye_movement"]),
+            # Calculate velocity, acceleration.
+            Stage("calculate_velocity_and_acceleration",
+                  lambda frames: {"data": calculate_velocity_and_acceleration(frames["data"])},
+                  modules=["processing.calculate_acceleration"]),
+            # Transform all data from radians to degree.
+            Stage("rad_to_deg", lambda frames: {"data": rad_to_deg(frames["data"])},
+                  modules=["processing.rad_to_deg"]),
+            # Add the phase and the scenario of each data point to the data.
+            Stage("add_phase_scenario_columns",
+                  lambda frames: {"data": add_phase_scenario_columns(frames["data"], data_phases, selected_phases)},
+                  {"driving_exact": driving_exact_hash, "selected_phases": selected_phases},
+                  ["processing.add_phase_scenario_columns", "processing.phase_index"]),
+        ]
 
+    def preprocess_data(self, folder: str, directory_folder: str, profiler: StageProfiler):
+        # Read in the times of the data phases and check if all requested data phases are available.
+        with profiler.measure("produce_phases_csv"):
+            data_phases = produce_phases_csv(directory_folder)
         selected_phases_checked, selected_scenarios_checked = check_phases_scenarios(data_phases, self.config.selected_phases,
                                                                                       self.config.selected_scenarios)
+        selected_phase_times, selected_scenario_times = get_selected_times(data_phases, selected_phases_checked)
 
-        # Crop data such that only the data of the requested scenarios and phases are left.
-        raw_selected_data, selected_phase_times, selected_scenario_times = crop_data(
-            raw_data, data_phases, selected_phases_checked, selected_scenarios_checked
-        )
+        # The results of the stages are cached per proband, a run resumes after the last stage whose
+        # inputs, settings and code did not change.
+        cache = None
+        if self.config.stage_cache_directory is not None:
+            cache = StageCache(self.config.stage_cache_directory, folder)
+        # The dtype policy applies to the results of all stages.
+        root_config = {"dtype_policy": self.config.dtype_policy,
+                       "code": get_code_version(["processing.dtype_policy", "processing.stage_cache"])}
 
-        # Preprocess the data and calculate gaze features.
-        data = preprocess(
-            raw_selected_data,
-            directory_folder,
-            confidence=self.config.confidence,
+        # Memory usage of the data after each processing step.
+        memory_report = {}
+        frames, resumed_stage = run_stages(
+            self.get_stages(directory_folder, data_phases, selected_phases_checked, selected_scenarios_checked),
+            self.dtype_policy, memory_report, cache, root_config, profiler,
         )
+        data = frames["data"]
+        if resumed_stage is not None:
+            print(f"Proband {folder} resumed after the cached stage {resumed_stage}")
 
-        data = calculate_spherical_coordinates(data)
+        data = self.dtype_policy.apply_and_report(data, "output", memory_report, float_signals=True)
 
-        # Filter data and determine eye movement types with the REMODNAV algorithm.
-        remodnav_args = self.config.remodnav_args
-        data, data_events = remodnav(data, remodnav_args)
+        print(f"Memory usage of proband {folder} after each step:")
+        print(format_memory_report(memory_report))
 
-        # Add eye movement types to data and one-hot encode them.
-        add_eye_movement(data, data_events)
-        data = data.join(pd.get_dummies(data["eye_movement_type"]))
+        data.rename(columns=renaming_convention_dict, inplace=True)
 
-        # Calculate velocity, acceleration.
-        data = calculate_velocity(data)
-        data = calculate_acceleration(data)
+        # Save data to a csv file.
+        with profiler.measure("save_files", len(data)):
+            save_files(
+                data,
+                self.config.preprocessed_output_directory,
+                folder,
+                data_phases,
+                selected_phases_checked,
+                selected_scenarios_checked,
+                selected_phase_times,
+                selected_scenario_times,
+                self.config.output_format,
+            )
 
-        # Transform all data from radians to degree.
-        data = rad_to_deg(data)
+    # Process the data of one proband in chunks of chunk_duration seconds with the same results as
+    # preprocess_data. Only the chunks and the few columns that the eye movement classification and the
+    # phase labels need for the whole recording are kept in memory, the other steps only depend on
+    # neighbouring samples:
+    # 1. Interpolate, crop and filter each chunk of the raw data, read with margins from the Parquet
+    #    sidecars of the .csv files, and collect the target zones of the whole recording.
+    # 2. Preprocess each chunk and calculate the spherical coordinates.
+    # 3. Classify the eye movements and label the phases on the gaze angles of the whole recording,
+    #    the REMODNAV thresholds and the order of the saccade candidates depend on all samples.
+    # 4. Add the labels to each chunk and calculate velocity and acceleration with the last samples of
+    #    the previous chunk as context, then save the chunks.
+    # The chunks are kept in a temporary directory between the passes.
+    def preprocess_data_in_chunks(self, folder: str, directory_folder: str, profiler: StageProfiler):
+        # Read in the times of the data phases and check if all requested data phases are available.
+        with profiler.measure("produce_phases_csv"):
+            data_phases = produce_phases_csv(directory_folder)
+        selected_phases_checked, selected_scenarios_checked = check_phases_scenarios(data_phases, self.config.selected_phases,
+                                                                                      self.config.selected_scenarios)
+        selected_phase_times, selected_scenario_times = get_selected_times(data_phases, selected_phases_checked)
 
-        # Add the phase and the scenario of each data point to the data.
-        data = add_phase_scenario_columns(data, data_phases, selected_phases_checked)
+        # Largest memory usage of a chunk after each processing step.
+        memory_report = {}
 
-        data.rename(columns=renaming_convention_dict, inplace=True)
+        with tempfile.TemporaryDirectory() as chunk_directory:
+            # The raw data is read in chunks from the Parquet sidecars, which are written to the
+            # temporary directory if no cache directory is configured.
+            cache_directory = self.config.raw_cache_directory or os.path.join(chunk_directory, "sidecars")
+            with profiler.measure("update_sidecars"):
+                reader = RawChunkReader(
+                    [update_sidecar(file, cache_directory, self.input_columns)
+                     for file in self.get_raw_files(directory_folder)],
+                    self.input_columns,
+                )
 
-        # Save data to a csv file.
-        save_files(
-            data,
-            self.config.preprocessed_output_directory,
-            folder,
-            data_phases,
-            selected_phases_checked,
-            selected_scenarios_checked,
-            selected_phase_times,
-            selected_scenario_times,
-        )
+            chunk_files = []
+            target_zones = []
+            for chunk, (start, end) in enumerate(
+                    get_chunk_bounds(reader.first_time, reader.last_time, self.config.chunk_duration)):
+                chunk_report = {}
+                with profiler.measure("load_data") as record:
+                    raw_data = reader.read_chunk(start, end)
+                    if raw_data is None:
+                        continue
+                    raw_data = self.dtype_policy.apply_and_report(raw_data, "load_data", chunk_report)
+                    profiler.set_output(record, raw_data, chunk_report["load_data"])
+
+                with profiler.measure("interpolate_and_filter", len(raw_data)) as record:
+                    raw_data = interpolate_and_filter(raw_data, self.input_columns)
+                    raw_data = take_time_range(raw_data, start, end)
+                    raw_data = self.dtype_policy.apply_and_report(raw_data, "interpolate_and_filter", chunk_report)
+                    profiler.set_output(record, raw_data, chunk_report["interpolate_and_filter"])
+
+                with profiler.measure("add_bac_level", len(raw_data)) as record:
+                    raw_data = add_bac_level(raw_data, directory_folder)
+                    raw_data = self.dtype_policy.apply_and_report(raw_data, "add_bac_level", chunk_report)
+                    profiler.set_output(record, raw_data, chunk_report["add_bac_level"])
+                update_peak_memory(memory_report, chunk_report)
+
+                with profiler.measure("crop_data", len(raw_data)) as record:
+                    raw_selected_data = crop_data(
+                        raw_data, data_phases, selected_phases_checked, selected_scenarios_checked
+                    )[0]
+                    data = filter_samples(raw_selected_data, confidence=self.config.confidence)
+                    profiler.set_output(record, data)
+                if data.empty:
+                    continue
+                target_zones = np.union1d(target_zones, get_target_zones(data))
+                chunk_files.append(os.path.join(chunk_directory, "chunk_%d.pkl" % chunk))
+                with profiler.measure("spill_chunks", len(data)):
+                    data.to_pickle(chunk_files[-1])
+
+            if not chunk_files:
+                raise ValueError("No samples in the selected phases and scenarios.")
+
+            gaze_angles = []
+            for chunk_file in chunk_files:
+                chunk_report = {}
+                with profiler.measure("spill_chunks"):
+                    data = pd.read_pickle(chunk_file)
+
+                with profiler.measure("preprocess", len(data)) as record:
+                    data = preprocess(
+                        data,
+                        directory_folder,
+                        confidence=self.config.confidence,
+                        target_zones=target_zones,
+                    )
+                    data = self.dtype_policy.apply_and_report(data, "preprocess", chunk_report)
+                    profiler.set_output(record, data, chunk_report["preprocess"])
+
+                with profiler.measure("calculate_spherical_coordinates", len(data)) as record:
+                    data = calculate_spherical_coordinates(data)
+                    data = self.dtype_policy.apply_and_report(data, "calculate_spherical_coordinates", chunk_report)
+                    profiler.set_output(record, data, chunk_report["calculate_spherical_coordinates"])
+                update_peak_memory(memory_report, chunk_report)
+
+                gaze_angles.append(data[["azimuth", "elevation"]])
+                with profiler.measure("spill_chunks", len(data)):
+                    data.to_pickle(chunk_file)
+
+            chunk_lengths = [len(chunk_gaze_angles) for chunk_gaze_angles in gaze_angles]
+            gaze_angles = pd.concat(gaze_angles)
+            with profiler.measure("labels of the whole recording", len(gaze_angles)) as record:
+                labels = self.get_labels(gaze_angles, data_phases, selected_phases_checked, memory_report)
+                profiler.set_output(record, labels, memory_report["labels of the whole recording"])
+            del gaze_angles
+
+            # The steps of the generator are measured within save_files and are not counted for it.
+            with profiler.measure("save_files", len(labels)):
+                save_chunked_files(
+                    self.add_labels_to_chunks(chunk_files, chunk_lengths, labels, memory_report, profiler),
+                    self.config.preprocessed_output_directory,
+                    folder,
+                    data_phases,
+                    selected_phases_checked,
+                    selected_scenarios_checked,
+                    selected_phase_times,
+                    selected_scenario_times,
+                    self.config.output_format,
+                )
 
-    # Process a single proband.
+        print(f"Peak memory usage of a chunk of proband {folder} after each step:")
+        print(format_memory_report(memory_report))
+
+    # Classify the eye movements of the whole recording and label the phases, like preprocess_data.
+    # Returns the filtered gaze angles, the eye movement columns and the phase columns.
+    def get_labels(self, gaze_angles: pd.DataFrame, data_phases: pd.DataFrame, selected_phases: list[int],
+                   memory_report: dict) -> pd.DataFrame:
+        labels, data_events = classify(gaze_angles, self.remodnav_params)
+        labels = self.dtype_policy.apply(labels)
+
+        add_eye_movement(labels, data_events, categorical_labels=self.dtype_policy.categorical_labels)
+        labels = labels.join(pd.get_dummies(labels["eye_movement_type"]))
+        labels = self.dtype_policy.apply(labels)
+
+        labels = add_phase_scenario_columns(labels, data_phases, selected_phases)
+        labels = self.dtype_policy.apply_and_report(labels, "labels of the whole recording", memory_report)
+        return labels
+
+    # Add the labels to the preprocessed chunks and finish the processing steps, yields the processed chunks.
+    def add_labels_to_chunks(self, chunk_files: list[str], chunk_lengths: list[int], labels: pd.DataFrame,
+                             memory_report: dict, profiler: StageProfiler) -> Iterator[pd.DataFrame]:
+        phase_columns = ["phase", "scenario", "variant"]
+        eye_movement_columns = [column for column in labels.columns if column not in phase_columns]
+        # Samples of the previous chunk that the velocity and acceleration of the first samples depend on.
+        context = None
+        chunk_start = 0
+        for chunk_file, chunk_length in zip(chunk_files, chunk_lengths):
+            chunk_report = {}
+            with profiler.measure("spill_chunks"):
+                data = pd.read_pickle(chunk_file)
+            chunk_labels = labels.iloc[chunk_start:chunk_start + chunk_length]
+            chunk_start += chunk_length
+
+            # Filtered gaze angles and eye movement types.
+            with profiler.measure("add_eye_movement", len(data)) as record:
+                for column in eye_movement_columns:
+                    data[column] = chunk_labels[column].values
+                data = self.dtype_policy.apply_and_report(data, "add_eye_movement", chunk_report)
+                profiler.set_output(record, data, chunk_report["add_eye_movement"])
+
+            with profiler.measure("calculate_velocity_and_acceleration", len(data)) as record:
+                context_length = 0
+                if context is not None:
+                    context_length = len(context)
+                    data = pd.concat([context, data])
+                context = data.iloc[-DERIVATIVE_CONTEXT:].copy()
+                data = calculate_velocity_and_acceleration(data)
+                data = self.dtype_policy.apply_and_report(data, "calculate_velocity_and_acceleration", chunk_report)
+                data = data.iloc[context_length:]
+                profiler.set_output(record, data, chunk_report["calculate_velocity_and_acceleration"])
+
+            with profiler.measure("rad_to_deg", len(data)) as record:
+                data = rad_to_deg(data)
+                data = self.dtype_policy.apply_and_report(data, "rad_to_deg", chunk_report)
+                profiler.set_output(record, data, chunk_report["rad_to_deg"])
+
+            with profiler.measure("add_phase_scenario_columns", len(data)) as record:
+                for column in phase_columns:
+                    data[column] = chunk_labels[column].values
+                data = self.dtype_policy.apply_and_report(data, "add_phase_scenario_columns", chunk_report)
+                profiler.set_output(record, data, chunk_report["add_phase_scenario_columns"])
+            data = self.dtype_policy.apply_and_report(data, "output", chunk_report, float_signals=True)
+            update_peak_memory(memory_report, chunk_report)
+
+            data.rename(columns=renaming_convention_dict, inplace=True)
+            yield data
+
+    # Process a single proband and save the time and memory of each processing step.
     def run_proband(self, folder: str):
         directory_folder = os.path.join(self.config.raw_input_directory, folder)
-        data = self.load_data(directory_folder)
-        self.preprocess_data(data, folder, directory_folder)
+        profiler = StageProfiler(folder)
+        if self.config.chunk_duration is not None:
+            self.preprocess_data_in_chunks(folder, directory_folder, profiler)
+        else:
+            self.preprocess_data(folder, directory_folder, profiler)
+        if self.config.profile_directory is not None:
+            profiler.save(self.config.profile_directory)
 
     # Wrapper around run_proband to catch exceptions.
     def run_proband_safely(self, folder: str):
@@ -44,6 +44,11 @@ def interpolate_data(data: pd.DataFrame, binary_features: list[str]) -> pd.DataF
         df = data.copy()
         df = df.loc[df.index.dropna()]
 
+        # Labels stored as categoricals by the dtype policy of the processing are mapped like strings,
+        # replace on a categorical would only rename its categories.
+        label_columns = ["event+eye_movement_type+eventspec", "groundtruth+scenario+"]
+        df = df.astype({col: object for col in label_columns if isinstance(df[col].dtype, pd.CategoricalDtype)})
+
         df["event+eye_movement_type+eventspec"] = df["event+eye_movement_type+eventspec"].replace(eye_categorization)
         df["groundtruth+scenario+"] = df["groundtruth+scenario+"].replace(scenario_categorization)
         df = df.astype({"groundtruth+scenario+": "int64", "event+eye_movement_type+eventspec": "int64"})
@@ -24,6 +24,8 @@
 import datetime
 import pandas as pd
 
+from processing.phase_index import get_phase_row_ranges, get_range_positions
+
 # Crop data to selected phases and scenarios.
 def crop_data_aggregation(
     raw_data: pd.DataFrame,
@@ -32,14 +34,16 @@ def crop_data_aggregation(
     selected_scenarios: list[str],
     epoch_width: int,
 ) -> pd.DataFrame:
-    data_phases = data_phases.copy()
+    data_phases = data_phases[
+        data_phases["phase"].isin(selected_phases)
+        & data_phases["scenario"].isin(selected_scenarios)
+    ]
 
-    raw_selected_data = []
-    for index, row in data_phases.iterrows():
-        if row["phase"] in selected_phases:
-            if row["scenario"] in selected_scenarios:
-                scenario_start = row["start"]
-                scenario_end = row["end"] - datetime.timedelta(seconds=epoch_width)
-                raw_selected_data.append(raw_data[scenario_start:scenario_end])
+    # Rows of each scenario that leave room for a full window, found with a binary search in the sorted index.
+    data_phases = get_phase_row_ranges(
+        raw_data.index, data_phases, end_offset=-datetime.timedelta(seconds=epoch_width)
+    )
+    if len(data_phases) == 0:
+        raise ValueError("None of the selected phases and scenarios is in the phases.")
 
-    return pd.concat(raw_selected_data)
+    return raw_data.take(get_range_positions(data_phases["row_start"], data_phases["row_end"]))
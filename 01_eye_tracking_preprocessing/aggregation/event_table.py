@@ -0,0 +1,199 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import numpy as np
+import pandas as pd
+
+from aggregation.window_stats import get_window_rows
+
+# Columns of get_binary_event_stats and the column of get_target_zone_stats.
+EVENT_COLUMNS = ["eye+right_eye_state+", "eye+left_eye_state+", "event+FIXA+onehot", "event+SACC+onehot"]
+TARGET_ZONE_COLUMN = "aoi+target_zone+"
+
+# Statistics of get_binary_event_stats, in the order of its results.
+EVENT_STATISTICS = ["duration", "percentage_events", "amplitude", "event_count"]
+
+# Time that get_binary_event_stats subtracts from the duration of each event, in nanoseconds.
+SAMPLE_DURATION = 20_000_000
+
+# Runs of consecutive True values of the mask, as the first row and the row after the last row of each run.
+def get_runs(mask: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    changes = np.flatnonzero(np.diff(np.concatenate(([False], mask, [False])).astype(np.int8)))
+    return changes[::2], changes[1::2]
+
+# The event boundaries of get_binary_event_stats are the runs of the value 1 only for columns with the values
+# 0 and 1, other columns keep the statistics computed per window.
+def is_binary(values: pd.Series) -> bool:
+    return bool(values.isin([0, 1]).all())
+
+# Columns of the data whose event statistics are computed from the event table.
+def get_event_columns(data: pd.DataFrame) -> list[str]:
+    columns = [column for column in EVENT_COLUMNS if column in data.columns and is_binary(data[column])]
+    return columns + ([TARGET_ZONE_COLUMN] if TARGET_ZONE_COLUMN in data.columns else [])
+
+# Table of the runs of the events of the data, built once per proband: the runs of the value 1 of the binary
+# event columns and the runs of fixations in the same target zone. Each run has its first row, the row after
+# it, its duration up to the row after it in nanoseconds and the summed absolute gaze velocity of its rows
+# and the row after it, like the events of get_binary_event_stats. Runs that end with the data have no row
+# after them and a duration and amplitude of zero.
+def get_event_table(data: pd.DataFrame, target_zone_names: dict) -> pd.DataFrame:
+    times = data.index.asi8
+    amplitudes = np.abs(data["gaze+angle_change+velocity"].to_numpy(dtype=np.float64, na_value=np.nan))
+    missing = np.isnan(amplitudes)
+    cumulative_amplitudes = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, amplitudes))))
+    cumulative_missing = np.concatenate(([0], np.cumsum(missing)))
+
+    event_columns = get_event_columns(data)
+    masks = [(column, np.nan, (data[column] * 1.0 == 1.0).to_numpy())
+             for column in event_columns if column != TARGET_ZONE_COLUMN]
+    if TARGET_ZONE_COLUMN in event_columns:
+        fixations = (data["event+FIXA+onehot"] == 1.0).to_numpy()
+        masks += [(TARGET_ZONE_COLUMN, region_number,
+                   (data[TARGET_ZONE_COLUMN] == region_number).to_numpy() & fixations)
+                  for region_number in target_zone_names]
+
+    tables = []
+    for column, value, mask in masks:
+        starts, ends = get_runs(mask)
+        complete = ends < len(data)
+        after = np.where(complete, ends + 1, ends)
+        tables.append(pd.DataFrame({
+            "column": column,
+            "value": value,
+            "start": starts,
+            "end": ends,
+            "duration": np.where(complete, times[np.minimum(ends, len(data) - 1)] - times[starts], 0),
+            "amplitude": np.where(complete, cumulative_amplitudes[after] - cumulative_amplitudes[starts], 0.0),
+            "missing_amplitudes": np.where(complete, cumulative_missing[after] - cumulative_missing[starts], 0),
+        }))
+    columns = ["column", "value", "start", "end", "duration", "amplitude", "missing_amplitudes"]
+    return pd.concat(tables, ignore_index=True) if tables else pd.DataFrame(columns=columns)
+
+# Number of runs, number of events, summed duration in nanoseconds and summed amplitude of the runs of one
+# column in each window [starts[i], ends[i]), from the runs clipped to the windows like the events of
+# get_binary_event_stats: a run that continues after the window ends at the last row of the window, a run
+# that starts before the window starts at the first row and a run of only the last row is no event. The runs
+# inside a window are summed with the cumulative sums of the table and only the runs at both ends of a
+# window are clipped.
+def get_clipped_run_stats(runs: pd.DataFrame, times: np.ndarray, cumulative_amplitudes: np.ndarray,
+                          cumulative_missing: np.ndarray, starts: np.ndarray,
+                          ends: np.ndarray) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    if len(runs) == 0:
+        return tuple(np.zeros(len(starts), dtype=dtype) for dtype in [np.int64, np.int64, np.int64, np.float64])
+    run_starts = runs["start"].to_numpy(dtype=np.int64)
+    run_ends = runs["end"].to_numpy(dtype=np.int64)
+    cumulative_durations = np.concatenate(([0], np.cumsum(runs["duration"].to_numpy(dtype=np.int64))))
+    cumulative_run_amplitudes = np.concatenate(([0.0], np.cumsum(runs["amplitude"].to_numpy(dtype=np.float64))))
+    cumulative_run_missing = np.concatenate(([0], np.cumsum(runs["missing_amplitudes"].to_numpy(dtype=np.int64))))
+
+    # Runs that overlap each window and runs that are inside of it.
+    first = np.searchsorted(run_ends, starts, side="right")
+    last = np.searchsorted(run_starts, ends, side="left")
+    run_count = np.maximum(last - first, 0)
+    inner_first = np.searchsorted(run_starts, starts, side="left")
+    inner_last = np.maximum(np.searchsorted(run_ends, ends, side="left"), inner_first)
+    event_count = inner_last - inner_first
+    duration = cumulative_durations[inner_last] - cumulative_durations[inner_first]
+    amplitude = cumulative_run_amplitudes[inner_last] - cumulative_run_amplitudes[inner_first]
+    missing = cumulative_run_missing[inner_last] - cumulative_run_missing[inner_first]
+
+    # The first and last overlapping run of a window if they are clipped, a run that is clipped at both ends
+    # is counted once.
+    clipped_first = (run_count > 0) & (run_starts[np.minimum(first, len(runs) - 1)] < starts)
+    clipped_last = (run_count > 0) & (run_ends[np.maximum(last - 1, 0)] >= ends)
+    clipped_last &= ~(clipped_first & (last - 1 == first))
+    for clipped, run in [(clipped_first, first), (clipped_last, last - 1)]:
+        windows = np.flatnonzero(clipped)
+        run = run[windows]
+        event_start = np.maximum(run_starts[run], starts[windows])
+        event_end = np.where(run_ends[run] < ends[windows], run_ends[run], ends[windows] - 1)
+        # The first row of a run of only the last row of the window is replaced by its last row.
+        is_event = event_end > event_start
+        windows = windows[is_event]
+        event_start = event_start[is_event]
+        event_end = event_end[is_event]
+        event_count[windows] += 1
+        duration[windows] += times[event_end] - times[event_start]
+        amplitude[windows] += cumulative_amplitudes[event_end + 1] - cumulative_amplitudes[event_start]
+        missing[windows] += cumulative_missing[event_end + 1] - cumulative_missing[event_start]
+    return run_count, event_count, duration, np.where(missing > 0, np.nan, amplitude)
+
+# Statistics of get_binary_event_stats and get_target_zone_stats for all windows [start, start + epoch_width)
+# at once from the event table, named like their results, for the columns of get_event_columns. The first and
+# end rows of the windows can be passed from get_input_rows.
+def get_window_event_stats(data: pd.DataFrame, event_table: pd.DataFrame, window_starts: pd.DatetimeIndex,
+                           epoch_width: int, target_zone_names: dict,
+                           window_rows: tuple[np.ndarray, np.ndarray] = None) -> pd.DataFrame:
+    if window_rows is None:
+        window_rows = get_window_rows(data.index, window_starts, epoch_width)
+    starts, ends = window_rows
+    empty = ends == starts
+    times = data.index.asi8
+    amplitudes = np.abs(data["gaze+angle_change+velocity"].to_numpy(dtype=np.float64, na_value=np.nan))
+    missing = np.isnan(amplitudes)
+    cumulative_amplitudes = np.concatenate(([0.0], np.cumsum(np.where(missing, 0.0, amplitudes))))
+    cumulative_missing = np.concatenate(([0], np.cumsum(missing)))
+
+    def get_run_stats(column, value=None):
+        runs = event_table[(event_table["column"] == column)
+                           & ((event_table["value"] == value) if value is not None else True)]
+        return get_clipped_run_stats(runs, times, cumulative_amplitudes, cumulative_missing, starts, ends)
+
+    # Changes of the eye movement type between consecutive rows of each window, changes from or to NaN are
+    # no changes like in get_binary_event_stats.
+    types = data["event+eye_movement_type+eventspec"].to_numpy(dtype=np.float64, na_value=np.nan)
+    changes = (types[1:] != types[:-1]) & ~np.isnan(types[1:]) & ~np.isnan(types[:-1])
+    cumulative_changes = np.concatenate(([0], np.cumsum(changes)))
+    type_change_count = cumulative_changes[np.maximum(ends - 1, starts)] - cumulative_changes[starts]
+
+    results = {}
+    with np.errstate(divide="ignore", invalid="ignore"):
+        event_columns = get_event_columns(data)
+        for column in event_columns:
+            if column == TARGET_ZONE_COLUMN:
+                continue
+            run_count, event_count, duration, amplitude = get_run_stats(column)
+            stats = {
+                "duration": np.where(run_count > 0,
+                                     (duration - event_count * SAMPLE_DURATION) / 1e9 / run_count, 0.0),
+                "percentage_events": np.where(type_change_count > 0, run_count / type_change_count, 0.0),
+                "amplitude": np.where(run_count > 0, amplitude / run_count, 0.0),
+                "event_count": run_count,
+            }
+            results.update({column + "+" + statistic: stats[statistic] for statistic in EVENT_STATISTICS})
+
+        if TARGET_ZONE_COLUMN in event_columns:
+            zone_stats = {region_number: get_run_stats(TARGET_ZONE_COLUMN, region_number)
+                          for region_number in target_zone_names}
+            all_run_count = sum(run_count for run_count, _, _, _ in zone_stats.values())
+            for region_number, (run_count, event_count, duration, _) in zone_stats.items():
+                name = str(target_zone_names[region_number] + "+")
+                results["aoi+duration_fixations+" + name] = np.where(
+                    run_count > 0, (duration - event_count * SAMPLE_DURATION) / 1e9 / run_count, 0.0)
+                results["aoi+gaze_event_percentage+" + name] = np.where(
+                    all_run_count > 0, run_count / all_run_count, 0.0)
+
+    # The statistics of windows without rows are NaN.
+    if empty.any():
+        results = {name: np.where(empty, np.nan, values) for name, values in results.items()}
+    return pd.DataFrame(results, index=window_starts)
@@ -22,6 +22,7 @@
 #####################################################################
 
 import multiprocessing
+import numpy as np
 import pandas as pd
 from datetime import timedelta
 from joblib import Parallel, delayed
@@ -32,21 +33,33 @@ from aggregation.fct_stats import (
     get_target_zone_stats,
     get_eventspec_stats,
 )
+from aggregation.window_stats import STATISTICS, get_window_rows, get_window_stats
+from aggregation.event_table import (
+    EVENT_COLUMNS,
+    EVENT_STATISTICS,
+    TARGET_ZONE_COLUMN,
+    get_event_columns,
+    get_event_table,
+    get_window_event_stats,
+)
 
-def get_input_times(input_data, step_size, epoch_width) -> pd.DatetimeIndex:
-    epoch_width = timedelta(seconds=epoch_width)
+# Start times of the sliding windows every step_size seconds that contain data after their start, with the first
+# and end row of each window [start, start + epoch_width) in the sorted index of the data.
+def get_input_rows(input_data, step_size, epoch_width) -> tuple[pd.DatetimeIndex, np.ndarray, np.ndarray]:
     date_range = pd.date_range(
         start=input_data.index[0].floor("s"),
         end=input_data.index[-1].ceil("s"),
         freq=f"{step_size}s",
     )
+    starts, ends = get_window_rows(input_data.index, date_range, epoch_width)
 
-    # Only use timestamps where data is available.
-    filtered = date_range.to_series().apply(
-        lambda i: ((input_data.index > i) & (input_data.index < i + epoch_width)).any()
-    )
+    # Only use timestamps where data is available, a sample at the start time itself does not count.
+    available = ends > input_data.index.searchsorted(date_range, side="right")
 
-    return pd.DatetimeIndex(date_range.to_series()[filtered])
+    return pd.DatetimeIndex(date_range[available], freq=None), starts[available], ends[available]
+
+def get_input_times(input_data, step_size, epoch_width) -> pd.DatetimeIndex:
+    return get_input_rows(input_data, step_size, epoch_width)[0]
 
 # Function to get aggregated features in parallel implementation.
 def get_features(
@@ -75,7 +88,24 @@ def get_features(
     print("Using # cores: ", num_cores)
 
     input_data = data.copy()
-    inputs = get_input_times(input_data, step_size, epoch_width)
+    inputs, starts, ends = get_input_rows(input_data, step_size, epoch_width)
+
+    # The statistics of the numerical features are computed for all windows at once, the sliding windows
+    # only reserve their columns to keep the order of the features.
+    window_stats = get_window_stats(
+        input_data[[column for column in input_data.columns if column in numerical_features]], inputs, epoch_width,
+        window_rows=(starts, ends),
+    )
+
+    # The statistics of the binary events and target zones are clipped from the runs of the events of the
+    # whole data, binary event columns with other values than 0 and 1 keep the statistics per window.
+    event_columns = get_event_columns(input_data)
+    if event_columns:
+        event_table = get_event_table(input_data, target_zone_names)
+        event_stats = get_window_event_stats(input_data, event_table, inputs, epoch_width, target_zone_names,
+                                             window_rows=(starts, ends))
+    else:
+        event_stats = pd.DataFrame(index=inputs)
 
     results = Parallel(n_jobs=num_cores, verbose=1)(
         delayed(get_sliding_window)(
@@ -87,13 +117,19 @@ def get_features(
             single_eye_movement_features=single_eye_movement_features,
             all_eye_movement_features=all_eye_movement_features,
             target_zone_names=target_zone_names,
+            precomputed_numerical_stats=True,
+            precomputed_event_columns=event_columns,
+            rows=(start, end),
         )
-        for k in inputs
+        for k, start, end in zip(inputs, starts, ends)
     )
 
     results = pd.DataFrame(list(filter(None, results)))
     results.set_index("datetime", inplace=True)
     results.sort_index(inplace=True)
+    for stats in [window_stats, event_stats]:
+        for column in stats.columns:
+            results[column] = stats[column].reindex(results.index)
 
     return results
 
@@ -108,33 +144,55 @@ def get_sliding_window(
     single_eye_movement_features: list[str]=None,
     all_eye_movement_features: str = "event+eye_movement_type+eventspec",
     target_zone_names: list[str]=None,
+    precomputed_numerical_stats: bool = False,
+    precomputed_event_columns: list[str] = None,
+    rows: tuple[int, int] = None,
 ) -> pd.DataFrame:
 
+    if precomputed_event_columns is None:
+        precomputed_event_columns = []
+
     min_timestamp = i
     max_timestamp = min_timestamp + timedelta(seconds=epoch_width)
     results = {
         "datetime": min_timestamp,
     }
 
-    relevant_data = data.loc[
-        (data.index >= min_timestamp) & (data.index < max_timestamp)
-    ]
+    # The first and end row of the window from get_input_rows, otherwise the rows are looked up in the index.
+    if rows is not None:
+        relevant_data = data.iloc[rows[0]:rows[1]]
+    else:
+        relevant_data = data.loc[
+            (data.index >= min_timestamp) & (data.index < max_timestamp)
+        ]
 
     for column in relevant_data.columns:
 
-        if column in numerical_features:
+        if column in numerical_features and precomputed_numerical_stats:
+            # Placeholders for the statistics computed by get_window_stats.
+            results.update(dict.fromkeys([column + "+" + statistic for statistic in STATISTICS]
+                                         + ["agg+num_samples++"]))
+        elif column in numerical_features:
             column_results = get_stats(relevant_data[column], column, epoch_width=epoch_width)
             results.update(column_results)
 
-        if column in ['eye+right_eye_state+', 'eye+left_eye_state+',
-                      'event+FIXA+onehot', 'event+SACC+onehot']:
+        if column in EVENT_COLUMNS and column in precomputed_event_columns:
+            # Placeholders for the statistics computed by get_window_event_stats.
+            results.update(dict.fromkeys([column + "+" + statistic for statistic in EVENT_STATISTICS]))
+        elif column in EVENT_COLUMNS:
             column_results = get_binary_event_stats(
                 relevant_data[[column, "aoi+target_zone+", 'event+eye_movement_type+eventspec',
                                'gaze+angle_change+velocity']], target_zone_names, column, epoch_width=epoch_width
             )
             results.update(column_results)
 
-        if column in ["aoi+target_zone+"]:
+        if column == TARGET_ZONE_COLUMN and column in precomputed_event_columns:
+            results.update(dict.fromkeys([
+                name + str(target_zone_names[region_number] + "+")
+                for region_number in target_zone_names
+                for name in ["aoi+duration_fixations+", "aoi+gaze_event_percentage+"]
+            ]))
+        elif column == TARGET_ZONE_COLUMN:
             column_results = get_target_zone_stats(relevant_data[[column, 'gaze+angle_change+velocity', 'event+FIXA+onehot',
                                                                   'event+eye_movement_type+eventspec']], target_zone_names)
             results.update(column_results)
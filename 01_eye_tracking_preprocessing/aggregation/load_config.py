@@ -38,6 +38,9 @@ class AggregationConfig:
         numerical_features: list[str],
         binary_features: list[str],
         single_eye_movement_features: list[str],
+        profile_directory: str = None,
+        max_workers: int = None,
+        worker_memory_budget: float = None,
     ) -> None:
         self.data_directory_processed = data_directory_processed
         self.probands_selected = probands_selected
@@ -51,6 +54,9 @@ class AggregationConfig:
         self.numerical_features = numerical_features
         self.binary_features = binary_features
         self.single_eye_movement_features = single_eye_movement_features
+        self.profile_directory = profile_directory
+        self.max_workers = max_workers
+        self.worker_memory_budget = worker_memory_budget
 
 
 # Load config parameters from yaml file.
@@ -71,4 +77,7 @@ def load_config(filename: str) -> AggregationConfig:
         cfg_aggregation["numerical_features"],
         cfg_aggregation["binary_features"],
         cfg_aggregation["single_eye_movement_features"],
+        cfg_aggregation.get("profile_directory"),
+        cfg_aggregation.get("max_workers"),
+        cfg_aggregation.get("worker_memory_budget"),
     )
@@ -21,10 +21,12 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #####################################################################
 
+import json
 import os
 from typing import Tuple
 import pandas as pd
 import pickle
+import pyarrow.dataset as ds
 from typing import Union
 from aggregation.load_config import AggregationConfig
 
@@ -38,22 +40,80 @@ def add_microseconds_to_datetime(dt_str):
         dt_str = dt_str.replace('+', '.000000+')
     return dt_str
 
+# Columns of the processed data that the aggregation reads in addition to the configured features.
+aggregation_columns = [
+    "aoi+target_zone+",
+    "event+eye_movement_type+eventspec",
+    "event+eye_movement_peak_vel+eventspec",
+    "event+eye_movement_avg_vel+eventspec",
+    "event+eye_movement_med_vel+eventspec",
+    "event+eye_movement_amp_given+eventspec",
+    "event+eye_movement_duration+eventspec",
+    "event+FIXA+onehot",
+    "event+SACC+onehot",
+    "gaze+angle_change+velocity",
+    "groundtruth+BAC+",
+    "groundtruth+phase+",
+    "groundtruth+scenario+",
+    "groundtruth+variant+",
+]
+
+# Get all columns of the processed data that are needed for the aggregation.
+def get_aggregation_columns(config: AggregationConfig) -> list[str]:
+    columns = (config.numerical_features + config.binary_features
+               + config.single_eye_movement_features + aggregation_columns)
+    return list(dict.fromkeys(columns))
+
+# Read the selected phases, scenarios and columns from the Parquet dataset of a proband. Only the
+# files of the selected partitions are opened and only the requested columns are read.
+def load_parquet_dataset(dataset_directory: str, selected_phases: list[int] = None,
+                         selected_scenarios: list[str] = None, columns: list[str] = None) -> pd.DataFrame:
+    dataset = ds.dataset(dataset_directory, format="parquet", partitioning="hive")
+
+    partition_filter = None
+    if selected_phases is not None:
+        partition_filter = ds.field("phase").isin(list(selected_phases))
+    if selected_scenarios is not None:
+        scenario_filter = ds.field("scenario").isin(list(selected_scenarios))
+        partition_filter = scenario_filter if partition_filter is None else partition_filter & scenario_filter
+
+    # The partition fields duplicate the phase and scenario columns of the files.
+    file_columns = [name for name in dataset.schema.names if name not in ("phase", "scenario")]
+    if columns is not None:
+        file_columns = [name for name in file_columns if name in columns or name == "time"]
+
+    data = dataset.to_table(columns=file_columns, filter=partition_filter).to_pandas()
+    return data.sort_index(kind="stable")
+
 # The return types of the load_data function.
 DF = pd.DataFrame
 AggregationReturnType = Tuple[DF, DF]
 VisualizationReturnType = Tuple[DF, DF, DF, DF, DF, DF]
 
+# Load the processed data of a proband. Data saved as Parquet dataset is recognized by its metadata
+# sidecar, then only the selected phases and scenarios of the config and the given columns are read.
 def load_data(
-    base_directory: str, folder: str, caller, config:AggregationConfig
+    base_directory: str, folder: str, caller, config:AggregationConfig, columns: list[str] = None
 ) -> Union[VisualizationReturnType, AggregationReturnType, None]:
 
     directory_saved = os.path.join(base_directory, folder, "ircam")
-    
-    data = pd.read_pickle(os.path.join(directory_saved, folder + ".pkl"))
+    metadata_file = os.path.join(directory_saved, f"metadata_{folder}.json")
+
+    if os.path.isfile(metadata_file):
+        with open(metadata_file, "r") as f:
+            metadata = json.load(f)
+        data = load_parquet_dataset(os.path.join(directory_saved, metadata["dataset"]),
+                                    config.selected_phases, config.selected_scenarios, columns)
+        data_phases = pd.DataFrame(metadata["phases"])
+    else:
+        metadata = None
+        data = pd.read_pickle(os.path.join(directory_saved, folder + ".pkl"))
+        if columns is not None:
+            data = data[[column for column in data.columns if column in columns]]
 
-    data_phases = pd.read_csv(
-        os.path.join(directory_saved, f"phases_{folder}.csv"), sep=","
-    )
+        data_phases = pd.read_csv(
+            os.path.join(directory_saved, f"phases_{folder}.csv"), sep=","
+        )
 
     data_phases = data_phases.loc[:, ~data_phases.columns.str.contains("^Unnamed")]
 
@@ -70,7 +130,17 @@ def load_data(
     else:
         data_phases["end"] = pd.to_datetime(data_phases["end"], format='ISO8601')
 
-    if caller == "visualization":
+    if caller == "visualization" and metadata is not None:
+        return (
+            data,
+            data_phases,
+            metadata["selected_phases"],
+            metadata["selected_scenarios"],
+            [pd.Timestamp(time) for time in metadata["selected_phase_times"]],
+            [pd.Timestamp(time) for time in metadata["selected_scenario_times"]],
+        )
+
+    elif caller == "visualization":
         with open(os.path.join(directory_saved, "selected_phases.pkl"), "rb") as f:
             selected_phases = pickle.load(f)
         with open(os.path.join(directory_saved, "selected_scenarios.pkl"), "rb") as f:
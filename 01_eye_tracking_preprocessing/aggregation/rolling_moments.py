@@ -0,0 +1,159 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import numpy as np
+
+# Central moments of a set of samples per column: the number of valid samples, the mean and the sums of the
+# second, third and fourth powers of the deviations from the mean. The moments of two sets are combined with
+# the pairwise update formulas of Pébay (2008), which avoid the cancellation of raw power sums.
+class Moments:
+    def __init__(self, count: np.ndarray, mean: np.ndarray, m2: np.ndarray, m3: np.ndarray,
+                 m4: np.ndarray) -> None:
+        self.count = count
+        self.mean = mean
+        self.m2 = m2
+        self.m3 = m3
+        self.m4 = m4
+
+    def __getitem__(self, key) -> "Moments":
+        return Moments(self.count[key], self.mean[key], self.m2[key], self.m3[key], self.m4[key])
+
+# Moments of consecutive row segments [bounds[j], bounds[j + 1]) of each column of values, NaN values are
+# skipped. Returns moments with one row per segment.
+def get_segment_moments(values: np.ndarray, bounds: np.ndarray) -> Moments:
+    lengths = np.diff(bounds)
+    segment_rows = slice(bounds[0], bounds[-1])
+    rows = values[segment_rows]
+    valid = ~np.isnan(rows)
+    rows = np.where(valid, rows, 0.0)
+
+    # Sums of the non-empty segments, np.add.reduceat returns a row instead of zero for empty segments.
+    def get_segment_sums(segment_values: np.ndarray) -> np.ndarray:
+        sums = np.zeros((len(lengths),) + segment_values.shape[1:])
+        non_empty = lengths > 0
+        if non_empty.any():
+            sums[non_empty] = np.add.reduceat(segment_values, (bounds[:-1] - bounds[0])[non_empty], axis=0)
+        return sums
+
+    count = get_segment_sums(valid.astype(np.float64))
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean = np.where(count > 0, get_segment_sums(rows) / count, 0.0)
+    deviations = np.where(valid, rows - np.repeat(mean, lengths, axis=0), 0.0)
+    squared_deviations = deviations ** 2
+    return Moments(count, mean, get_segment_sums(squared_deviations),
+                   get_segment_sums(squared_deviations * deviations), get_segment_sums(squared_deviations ** 2))
+
+# Moments of the union of the disjoint sets a and b.
+def combine_moments(a: Moments, b: Moments) -> Moments:
+    count = a.count + b.count
+    with np.errstate(divide="ignore", invalid="ignore"):
+        delta = np.where(count > 0, b.mean - a.mean, 0.0)
+        delta_n = np.where(count > 0, delta / count, 0.0)
+        # The share of b is exactly one if a is empty, so the mean of b is kept exactly.
+        mean = a.mean + delta * np.where(count > 0, b.count / count, 0.0)
+    product = a.count * b.count
+    m2 = a.m2 + b.m2 + delta * delta_n * product
+    m3 = (a.m3 + b.m3 + delta * delta_n ** 2 * product * (a.count - b.count)
+          + 3 * delta_n * (a.count * b.m2 - b.count * a.m2))
+    m4 = (a.m4 + b.m4 + delta * delta_n ** 3 * product * (a.count ** 2 - product + b.count ** 2)
+          + 6 * delta_n ** 2 * (a.count ** 2 * b.m2 + b.count ** 2 * a.m2)
+          + 4 * delta_n * (a.count * b.m3 - b.count * a.m3))
+    return Moments(count, mean, m2, m3, m4)
+
+# Moments of a window that slides over consecutive segments of rows, as a queue of the segment moments.
+# The queue is kept as two stacks: the front stack holds the combined moments of all its segments from
+# each segment to the newest one, the back stack the segments that entered since the last flip and their
+# combined moments. Removing the oldest segment is a pop from the front stack, so the moments are only
+# combined and never subtracted, which keeps them exact up to the rounding of the combinations. Every
+# segment is combined at most three times, once in the back stack, once when the stacks are flipped and
+# once with the other stack.
+class RollingMoments:
+    def __init__(self, columns: int) -> None:
+        self.empty = Moments(*[np.zeros(columns) for _ in range(5)])
+        self.front = []
+        self.back = []
+        self.back_moments = self.empty
+
+    # Add the newest segment to the window.
+    def push(self, moments: Moments) -> None:
+        self.back.append(moments)
+        self.back_moments = combine_moments(self.back_moments, moments)
+
+    # Remove the oldest segment from the window.
+    def pop(self) -> None:
+        if not self.front:
+            front_moments = self.empty
+            for moments in reversed(self.back):
+                front_moments = combine_moments(moments, front_moments)
+                self.front.append(front_moments)
+            self.back = []
+            self.back_moments = self.empty
+        self.front.pop()
+
+    # Remove all segments from the window.
+    def clear(self) -> None:
+        self.front = []
+        self.back = []
+        self.back_moments = self.empty
+
+    # Moments of all segments in the window.
+    def get(self) -> Moments:
+        if not self.front:
+            return self.back_moments
+        return combine_moments(self.front[-1], self.back_moments)
+
+# Moments of the row windows [starts[i], ends[i]) of each column of values, with non-decreasing starts and
+# ends. The rows are split into segments at the starts and ends of the windows and the window slides over
+# the segments, so a window costs the rows of one step instead of the rows of the whole window.
+def get_rolling_moments(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Moments:
+    window_count = len(starts)
+    columns = values.shape[1]
+    result = Moments(*[np.zeros((window_count, columns)) for _ in range(5)])
+    if window_count == 0:
+        return result
+
+    bounds = np.unique(np.concatenate((starts, ends)))
+    segments = get_segment_moments(values, bounds)
+    first_segments = np.searchsorted(bounds, starts)
+    end_segments = np.searchsorted(bounds, ends)
+
+    window = RollingMoments(columns)
+    head = tail = 0
+    for i in range(window_count):
+        # Windows that do not overlap the previous window start from an empty window.
+        if first_segments[i] >= tail:
+            window.clear()
+            head = tail = first_segments[i]
+        while tail < end_segments[i]:
+            window.push(segments[tail])
+            tail += 1
+        while head < first_segments[i]:
+            window.pop()
+            head += 1
+        moments = window.get()
+        result.count[i] = moments.count
+        result.mean[i] = moments.mean
+        result.m2[i] = moments.m2
+        result.m3[i] = moments.m3
+        result.m4[i] = moments.m4
+    return result
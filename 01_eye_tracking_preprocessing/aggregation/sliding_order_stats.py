@@ -0,0 +1,135 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import numpy as np
+
+# Order statistics of the numerical features and the extrema of the windows.
+ORDER_STATISTICS = ["median", "q5", "q95", "iqr", "minimum", "maximum"]
+
+# Sorted values of each column in a window that slides over the rows of values. Missing values are sorted
+# to the end of each column like in np.sort. Rows that leave the window are deleted and rows that enter
+# the window are inserted at the positions found with a binary search, so the values are not sorted again
+# for each window.
+class SortedWindow:
+    def __init__(self, values: np.ndarray) -> None:
+        self.values = values
+        self.columns = np.arange(values.shape[1])
+        self.sorted_values = np.empty((values.shape[1], 0))
+        self.start = 0
+        self.end = 0
+
+    # Move the window to the rows [start, end), with start and end not smaller than before.
+    def move(self, start: int, end: int) -> None:
+        # Windows that do not overlap the current window are sorted again, as are windows for which more rows
+        # would be moved than they have.
+        if start >= self.end or (start - self.start) + (end - self.end) > end - start:
+            self.sorted_values = np.sort(self.values[start:end].T, axis=1)
+        else:
+            self.delete(np.sort(self.values[self.start:start].T, axis=1))
+            self.insert(np.sort(self.values[self.end:end].T, axis=1))
+        self.start = start
+        self.end = end
+
+    # Delete one value of the sorted window for each of the sorted values of each column.
+    def delete(self, values: np.ndarray) -> None:
+        if values.shape[1] == 0:
+            return
+        positions = np.array([np.searchsorted(self.sorted_values[column], values[column], side="left")
+                              for column in self.columns])
+        # Equal values are deleted from consecutive positions, the rank of a value among the equal values before
+        # it is added to its position.
+        rows = np.arange(values.shape[1])
+        equal = (values[:, 1:] == values[:, :-1]) | (np.isnan(values[:, 1:]) & np.isnan(values[:, :-1]))
+        first_equal = np.maximum.accumulate(np.where(np.hstack((np.zeros((len(values), 1), dtype=bool), equal)),
+                                                     0, rows), axis=1)
+        positions += rows - first_equal
+        width = self.sorted_values.shape[1]
+        flat_positions = positions + self.columns[:, None] * width
+        self.sorted_values = np.delete(self.sorted_values.ravel(), flat_positions.ravel()).reshape(
+            len(self.columns), width - values.shape[1])
+
+    # Insert the sorted values of each column into the sorted window.
+    def insert(self, values: np.ndarray) -> None:
+        if values.shape[1] == 0:
+            return
+        positions = np.array([np.searchsorted(self.sorted_values[column], values[column], side="left")
+                              for column in self.columns])
+        width = self.sorted_values.shape[1]
+        flat_positions = positions + self.columns[:, None] * width
+        self.sorted_values = np.insert(self.sorted_values.ravel(), flat_positions.ravel(), values.ravel()).reshape(
+            len(self.columns), width + values.shape[1])
+
+# Positions of the two values around the quantile of count sorted values and the weight of the second value,
+# computed like np.quantile with its default linear method.
+def get_quantile_positions(counts: np.ndarray, quantile: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    virtual_index = (counts - 1) * quantile
+    previous_index = np.floor(virtual_index)
+    gamma = virtual_index - previous_index
+    previous_index = np.clip(previous_index.astype(np.int64), 0, np.maximum(counts - 1, 0))
+    next_index = np.minimum(previous_index + 1, np.maximum(counts - 1, 0))
+    return previous_index, next_index, gamma
+
+# Linear interpolation between the previous and next values like np.quantile.
+def interpolate(previous_value: np.ndarray, next_value: np.ndarray, gamma: np.ndarray) -> np.ndarray:
+    difference = next_value - previous_value
+    return np.where(gamma >= 0.5, next_value - difference * (1 - gamma), previous_value + difference * gamma)
+
+# Order statistics of the row windows [starts[i], ends[i]) of each column of values, with non-decreasing
+# starts and ends, from one sorted window that slides over the rows. Returns the statistics of
+# ORDER_STATISTICS as (windows x columns) arrays, the median like np.nanmedian, the quantiles like
+# np.nanquantile and the interquartile range like scipy.stats.iqr. The statistics of windows without valid
+# values are NaN.
+def get_sliding_order_stats(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> dict:
+    valid_counts = np.vstack((np.zeros((1, values.shape[1]), dtype=np.int64),
+                              np.cumsum(~np.isnan(values), axis=0)))
+    counts = valid_counts[ends] - valid_counts[starts]
+
+    # Positions of all values that are needed for a window in the sorted values of each column.
+    median_lower = np.maximum(counts - 1, 0) // 2
+    quantiles = [get_quantile_positions(counts, quantile) for quantile in [0.05, 0.95, 0.25, 0.75]]
+    # The median is the mean of the two middle values, which are the same value for an odd number of values.
+    positions = np.stack([median_lower, np.minimum(counts // 2, np.maximum(counts - 1, 0)), np.zeros_like(counts),
+                          np.maximum(counts - 1, 0)]
+                         + [index for previous_index, next_index, _ in quantiles
+                            for index in (previous_index, next_index)], axis=2)
+
+    window = SortedWindow(values)
+    window_values = np.full(positions.shape, np.nan)
+    for i, (start, end) in enumerate(zip(starts, ends)):
+        window.move(start, end)
+        if end > start:
+            window_values[i] = window.sorted_values[window.columns[:, None], positions[i]]
+
+    quantile_values = [interpolate(window_values[..., 4 + 2 * i], window_values[..., 5 + 2 * i], gamma)
+                       for i, (_, _, gamma) in enumerate(quantiles)]
+    stats = {
+        "median": (window_values[..., 0] + window_values[..., 1]) / 2,
+        "q5": quantile_values[0],
+        "q95": quantile_values[1],
+        "iqr": quantile_values[3] - quantile_values[2],
+        "minimum": window_values[..., 2],
+        "maximum": window_values[..., 3],
+    }
+    for statistic in ORDER_STATISTICS:
+        stats[statistic][counts == 0] = np.nan
+    return stats
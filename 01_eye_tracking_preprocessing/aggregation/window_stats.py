@@ -0,0 +1,116 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+
+from aggregation.rolling_moments import Moments, get_rolling_moments
+from aggregation.sliding_order_stats import ORDER_STATISTICS, get_sliding_order_stats
+
+# Statistics of the numerical features, in the order of get_stats.
+STATISTICS = ["mean", "median", "std", "q5", "q95", "iqr", "power", "skewness", "kurtosis", "n_sign_changes"]
+
+# First and end row of each window [start, start + epoch_width), found with a binary search in the sorted index.
+def get_window_rows(index: pd.DatetimeIndex, window_starts: pd.DatetimeIndex,
+                    epoch_width: int) -> tuple[np.ndarray, np.ndarray]:
+    if not index.is_monotonic_increasing:
+        raise ValueError("The index of the data must be sorted to compute window statistics.")
+    starts = index.searchsorted(window_starts, side="left")
+    ends = index.searchsorted(window_starts + timedelta(seconds=epoch_width), side="left")
+    return starts, ends
+
+# Moment statistics of get_stats for all windows of one column from the rolling moments of the column,
+# the extrema of the windows and the number of zeros in each window.
+def get_moment_stats(moments: Moments, minimum: np.ndarray, maximum: np.ndarray, zeros: np.ndarray,
+                     window_lengths: np.ndarray, resolution: float) -> dict:
+    # The moments of constant windows are zero, the rounded means of their segments can differ in the last bit.
+    constant = minimum == maximum
+    mean = np.where(constant, minimum, moments.mean)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        m2 = np.where(constant, 0.0, moments.m2 / moments.count)
+        m3 = np.where(constant, 0.0, moments.m3 / moments.count)
+        m4 = np.where(constant, 0.0, moments.m4 / moments.count)
+
+        # NaN values count as non-zero values like in np.count_nonzero.
+        non_zero = window_lengths - zeros
+        power = np.where(non_zero == 0, 0.0, (m2 + mean ** 2) * moments.count / non_zero)
+
+        # Skewness and kurtosis are undefined for constant values, scipy returns NaN for them and
+        # get_stats keeps NaN when scipy warns about the precision loss for nearly constant values.
+        undefined = constant | (m2 <= (resolution * mean) ** 2)
+        undefined |= (moments.count > 1) & (np.maximum(maximum - mean, mean - minimum) / np.abs(mean)
+                                            < 10 * resolution)
+        skewness = np.where(undefined, np.nan, m3 / m2 ** 1.5)
+        kurtosis = np.where(undefined, np.nan, m4 / m2 ** 2 - 3)
+    return {"mean": mean, "std": np.sqrt(m2), "power": power, "skewness": skewness, "kurtosis": kurtosis}
+
+# Number of sign changes between consecutive rows in each window, a change from or to NaN counts as a
+# change like in get_stats. Computed from the cumulative sum of the changes of the whole column.
+def get_sign_changes(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> np.ndarray:
+    signs = np.sign(values)
+    changes = (signs[1:] != signs[:-1]) | np.isnan(signs[1:]) | np.isnan(signs[:-1])
+    cumulative_changes = np.concatenate(([0], np.cumsum(changes)))
+    return cumulative_changes[np.maximum(ends - 1, starts)] - cumulative_changes[starts]
+
+# Statistics of one column for all windows from the rolling moments and the sliding order statistics of the
+# column.
+def get_column_stats(values: np.ndarray, moments: Moments, order_stats: dict, starts: np.ndarray,
+                     ends: np.ndarray, resolution: float) -> dict:
+    stats = dict(order_stats)
+    cumulative_zeros = np.concatenate(([0], np.cumsum(values == 0)))
+    stats.update(get_moment_stats(moments, stats["minimum"], stats["maximum"],
+                                  cumulative_zeros[ends] - cumulative_zeros[starts], ends - starts, resolution))
+    stats["n_sign_changes"] = get_sign_changes(values, starts, ends).astype(float)
+
+    # The statistics are NaN for windows without valid values.
+    empty = moments.count == 0
+    for statistic in STATISTICS:
+        stats[statistic][empty] = np.nan
+    return stats
+
+# Statistics of get_stats for the given columns and all windows [start, start + epoch_width) at once,
+# named like the results of get_stats. The rows of each window are taken with a binary search instead of
+# a boolean mask per window and the moments and sorted values of all columns slide from window to window.
+# The number of sign changes stays an integer if no window is empty and agg+num_samples++ is the number of
+# rows of each window. The first and end rows of the windows can be passed from get_input_rows.
+def get_window_stats(data: pd.DataFrame, window_starts: pd.DatetimeIndex, epoch_width: int,
+                     window_rows: tuple[np.ndarray, np.ndarray] = None) -> pd.DataFrame:
+    if window_rows is None:
+        window_rows = get_window_rows(data.index, window_starts, epoch_width)
+    starts, ends = window_rows
+    values = data.to_numpy(dtype=np.float64, na_value=np.nan)
+    moments = get_rolling_moments(values, starts, ends)
+    order_stats = get_sliding_order_stats(values, starts, ends)
+    results = {}
+    for i, column in enumerate(data.columns):
+        dtype = data[column].dtype
+        resolution = np.finfo(dtype if np.issubdtype(dtype, np.floating) else np.float64).resolution
+        stats = get_column_stats(np.ascontiguousarray(values[:, i]), moments[:, i],
+                                 {statistic: order_stats[statistic][:, i] for statistic in ORDER_STATISTICS},
+                                 starts, ends, resolution)
+        if not np.isnan(stats["n_sign_changes"]).any():
+            stats["n_sign_changes"] = stats["n_sign_changes"].astype(np.int64)
+        results.update({column + "+" + statistic: stats[statistic] for statistic in STATISTICS})
+    results["agg+num_samples++"] = ends - starts
+    return pd.DataFrame(results, index=window_starts)
@@ -0,0 +1,112 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Run the kinematics and eye movement steps of the processing pipeline on a synthetic recording
+# once with float64 signals and string labels and once with the compact dtype policy. Reports the
+# memory usage after each step and checks that the features of the policy are the float64 features
+# rounded to the dtypes of the policy. Run from the 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_dtype_policy --duration 7200
+
+import argparse
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic_data import make_synthetic_recording
+from processing.add_eye_movement import add_eye_movement
+from processing.calculate_acceleration import calculate_velocity_and_acceleration
+from processing.dtype_policy import DtypePolicy, format_memory_report
+from processing.load_config import load_config
+from processing.rad_to_deg import rad_to_deg
+from processing.remodnav.remodnav.remodnav import RemodnavParams, classify
+
+# Policy of the comparison if the config does not set one.
+COMPACT_POLICY = {"float_dtype": "float32", "onehot_dtype": "bool", "categorical_labels": True}
+
+def run_steps(data, policy, remodnav_params):
+    memory_report = {}
+    data = policy.apply_and_report(data.copy(), "input", memory_report)
+
+    data, data_events = classify(data, remodnav_params)
+    data = policy.apply_and_report(data, "classify", memory_report)
+
+    add_eye_movement(data, data_events, categorical_labels=policy.categorical_labels)
+    data = data.join(pd.get_dummies(data["eye_movement_type"]))
+    data = policy.apply_and_report(data, "add_eye_movement", memory_report)
+
+    data = calculate_velocity_and_acceleration(data)
+    data = policy.apply_and_report(data, "calculate_velocity_and_acceleration", memory_report)
+
+    data = rad_to_deg(data)
+    data = policy.apply_and_report(data, "rad_to_deg", memory_report)
+
+    data = policy.apply_and_report(data, "output", memory_report, float_signals=True)
+    return data, memory_report
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the compact dtype policy with float64 processing.")
+    parser.add_argument("--duration", type=float, default=7200.0,
+                        help="Duration of the synthetic recording in seconds (default: 2 hours).")
+    parser.add_argument("--frequency", type=float, default=50.0, help="Sampling rate in Hz.")
+    parser.add_argument("--config", default="config_processing.yml",
+                        help="Processing config with the REMODNAV arguments and the dtype policy.")
+    args = parser.parse_args()
+
+    config = load_config(args.config)
+    remodnav_params = RemodnavParams.from_args(config.remodnav_args)
+    data = make_synthetic_recording(args.duration, args.frequency)
+    # The Savitzky-Golay filter does not accept missing data at the edges of the recording.
+    data = data.ffill().bfill()
+
+    dtype_policy = config.dtype_policy or COMPACT_POLICY
+    reference, reference_report = run_steps(data, DtypePolicy(), remodnav_params)
+    compact, compact_report = run_steps(data, DtypePolicy.from_config(dtype_policy), remodnav_params)
+
+    print(f"float64 signals and string labels: {len(data)} samples")
+    print(format_memory_report(reference_report))
+    print("dtype policy:", dtype_policy)
+    print(format_memory_report(compact_report))
+
+    # The signals are computed in float64 with both policies, so the labels are the same and each float
+    # feature is the float64 feature rounded to the saved dtype, within half a unit in the last place.
+    assert list(compact.columns) == list(reference.columns)
+    assert np.array_equal(reference["eye_movement_type"].to_numpy(), compact["eye_movement_type"].astype(str))
+    print("max. relative difference:")
+    for column in reference.columns:
+        if not pd.api.types.is_float_dtype(reference[column]):
+            continue
+        expected = reference[column].to_numpy()
+        actual = compact[column].to_numpy()
+        if actual.dtype == np.float64:
+            np.testing.assert_array_equal(actual, expected, err_msg=column)
+            continue
+        finfo = np.finfo(actual.dtype)
+        np.testing.assert_allclose(actual.astype(np.float64), expected, rtol=finfo.eps / 2,
+                                   atol=finfo.smallest_subnormal, equal_nan=True, err_msg=column)
+        valid = np.isfinite(expected) & (expected != 0)
+        if valid.any():
+            difference = np.abs(actual[valid] - expected[valid]) / np.abs(expected[valid])
+            print(f"  {column:<35} {np.max(difference):10.3g}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the binary event and target zone statistics computed per sliding window with get_binary_event_stats
+# and get_target_zone_stats with the statistics of all windows clipped from the event table. Run from the
+# 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_event_stats --duration 1800 --epoch-width 60
+
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from timeit import default_timer as timer
+
+from aggregation.event_table import EVENT_COLUMNS, TARGET_ZONE_COLUMN, get_event_table, get_window_event_stats
+from aggregation.fct_eye_utils import get_input_times
+from aggregation.fct_stats import get_binary_event_stats, get_target_zone_stats
+from aggregation.load_config import load_config
+from benchmarks.synthetic_data import make_synthetic_aggregation_data
+from processing.target_zones import get_target_zone_names
+
+# Per-window results of get_binary_event_stats and get_target_zone_stats like in get_sliding_window.
+def get_event_stats_reference(data: pd.DataFrame, inputs: pd.DatetimeIndex, epoch_width: int,
+                              target_zone_names: dict) -> pd.DataFrame:
+    results = []
+    for start in inputs:
+        window = data.loc[(data.index >= start) & (data.index < start + timedelta(seconds=epoch_width))]
+        result = {}
+        for column in EVENT_COLUMNS:
+            result.update(get_binary_event_stats(
+                window[[column, TARGET_ZONE_COLUMN, "event+eye_movement_type+eventspec",
+                        "gaze+angle_change+velocity"]], target_zone_names, column, epoch_width=epoch_width))
+        result.update(get_target_zone_stats(
+            window[[TARGET_ZONE_COLUMN, "gaze+angle_change+velocity", "event+FIXA+onehot",
+                    "event+eye_movement_type+eventspec"]], target_zone_names))
+        results.append(result)
+    return pd.DataFrame(results, index=inputs)
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the binary event and target zone statistics.")
+    parser.add_argument("--duration", type=float, default=1800.0,
+                        help="Duration of the synthetic recording in seconds (default: 30 minutes).")
+    parser.add_argument("--epoch-width", type=int, default=60, help="Width of the sliding windows in seconds.")
+    args = parser.parse_args()
+
+    config = load_config("config_aggregation.yml")
+    data = make_synthetic_aggregation_data(config.numerical_features, config.binary_features, args.duration)
+    # An eye state with other values than 0 and 1, its statistics stay per window.
+    data["eye+left_eye_state+"] = np.random.default_rng(0).choice([-1, 0, 1], len(data))
+    target_zone_names = {target_zone: names["name"] for target_zone, names in get_target_zone_names().items()}
+    inputs = get_input_times(data, config.step_size, args.epoch_width)
+
+    start_time = timer()
+    reference = get_event_stats_reference(data, inputs, args.epoch_width, target_zone_names)
+    reference_time = timer() - start_time
+
+    start_time = timer()
+    event_table = get_event_table(data, target_zone_names)
+    table_time = timer() - start_time
+    result = get_window_event_stats(data, event_table, inputs, args.epoch_width, target_zone_names)
+    clipping_time = timer() - start_time - table_time
+
+    assert not any(column.startswith("eye+left_eye_state+") for column in result.columns)
+    for column in result.columns:
+        assert result[column].dtype == reference[column].dtype, column
+        np.testing.assert_allclose(result[column].to_numpy(dtype=float), reference[column].to_numpy(dtype=float),
+                                   rtol=1e-9, atol=1e-12, equal_nan=True, err_msg=column)
+    print(f"event statistics: {len(inputs)} windows, {len(result.columns)} of {len(reference.columns)} "
+          f"features from {len(event_table)} runs")
+    print(f"  per window:     {reference_time:10.3f} s")
+    print(f"  event table:    {table_time:10.3f} s")
+    print(f"  clipping:       {clipping_time:10.3f} s")
+    print(f"  speedup:        {reference_time / (table_time + clipping_time):10.1f} x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the start times of the sliding windows found with one lambda per candidate start time, like before
+# get_input_rows, with the binary search of get_input_rows. Run from the 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_input_times --duration 7200 --epoch-width 60
+
+import argparse
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from timeit import default_timer as timer
+
+from aggregation.fct_eye_utils import get_input_rows
+from aggregation.load_config import load_config
+from benchmarks.synthetic_data import make_synthetic_aggregation_data
+
+# Start times of the windows with data after their start, checked against the whole index for each candidate.
+def get_input_times_reference(input_data, step_size, epoch_width) -> pd.DatetimeIndex:
+    epoch_width = timedelta(seconds=epoch_width)
+    date_range = pd.date_range(
+        start=input_data.index[0].floor("s"),
+        end=input_data.index[-1].ceil("s"),
+        freq=f"{step_size}s",
+    )
+    filtered = date_range.to_series().apply(
+        lambda i: ((input_data.index > i) & (input_data.index < i + epoch_width)).any()
+    )
+    return pd.DatetimeIndex(date_range.to_series()[filtered])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the start times of the sliding windows.")
+    parser.add_argument("--duration", type=float, default=7200.0,
+                        help="Duration of the synthetic recording in seconds (default: 2 hours).")
+    parser.add_argument("--epoch-width", type=int, default=60, help="Width of the sliding windows in seconds.")
+    args = parser.parse_args()
+
+    config = load_config("config_aggregation.yml")
+    data = make_synthetic_aggregation_data(config.numerical_features, [], args.duration)
+    # Gaps without data that are longer than the windows, so that some start times are left out.
+    seconds = (data.index - data.index[0]).total_seconds()
+    data = data[(seconds % 1800 < 1800 - 2 * args.epoch_width) | (seconds >= args.duration - 1800)]
+
+    start_time = timer()
+    reference = get_input_times_reference(data, config.step_size, args.epoch_width)
+    reference_time = timer() - start_time
+
+    start_time = timer()
+    inputs, starts, ends = get_input_rows(data, config.step_size, args.epoch_width)
+    result_time = timer() - start_time
+
+    assert inputs.equals(reference) and inputs.freq == reference.freq
+    # The rows of every 100th window against a full comparison with the index.
+    for start, first, end in list(zip(inputs, starts, ends))[::100]:
+        rows = np.flatnonzero((data.index >= start) & (data.index < start + timedelta(seconds=args.epoch_width)))
+        assert first == rows[0] and end == rows[-1] + 1
+    print(f"input times: {len(inputs)} windows over {len(data)} samples")
+    print(f"  per start time: {reference_time:10.3f} s")
+    print(f"  binary search:  {result_time:10.3f} s")
+    print(f"  speedup:        {reference_time / result_time:10.1f} x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the union-frame reference of interpolate_and_filter with the direct resampling engine
+# on a synthetic raw DMC file with dropped samples and gaps. Run from the
+# 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_interpolation --duration 3600
+
+import argparse
+import os
+import tempfile
+import numpy as np
+import pandas as pd
+from timeit import default_timer as timer
+
+from benchmarks.reference_interpolation import interpolate_and_filter_reference
+from benchmarks.synthetic_data import make_synthetic_raw_file
+from processing.column_manifest import get_input_columns
+from processing.dtype_policy import DtypePolicy
+from processing.interpolate_and_filter import interpolate_and_filter
+from processing.load_raw_file import load_file
+
+def time_interpolation(function, *args):
+    start_time = timer()
+    result = function(*args)
+    return result, timer() - start_time
+
+# Drop single samples and runs of up to 300 samples, like frames lost by the camera.
+def add_gaps(raw_data: pd.DataFrame, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    keep = rng.random(len(raw_data)) > 0.03
+    for start in rng.choice(len(raw_data) - 300, 20):
+        keep[start:start + rng.integers(1, 300)] = False
+    return raw_data[keep]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark interpolate_and_filter.")
+    parser.add_argument("--duration", type=float, default=3600.0,
+                        help="Duration of the synthetic recording in seconds (default: 1 hour).")
+    parser.add_argument("--frequency", type=float, default=60.0, help="Sampling rate in Hz.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = make_synthetic_raw_file(directory, args.duration, args.frequency)
+        raw_data = add_gaps(load_file(filename))
+
+    cases = [
+        ("all columns, float64", DtypePolicy(), None),
+        ("manifest, float64", DtypePolicy(), get_input_columns([])),
+        ("manifest, float32", DtypePolicy("float32", "bool", True), get_input_columns([])),
+    ]
+    print(f"interpolate_and_filter: {len(raw_data)} raw rows")
+    for name, policy, columns in cases:
+        data = policy.apply(raw_data)
+        reference, reference_time = time_interpolation(interpolate_and_filter_reference, data, columns)
+        resampled, resample_time = time_interpolation(interpolate_and_filter, data, columns)
+
+        pd.testing.assert_frame_equal(resampled, reference, check_exact=True)
+
+        print(f"  {name} ({len(resampled.columns)} columns)")
+        print(f"    union frame reference: {reference_time:10.3f} s")
+        print(f"    direct resampling:     {resample_time:10.3f} s")
+        print(f"    speedup:               {reference_time / resample_time:10.1f} x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the per-sample reference implementations of the kinematics steps with the array
+# implementations used by the pipeline. Run from the 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_kinematics --duration 7200
+
+import argparse
+import numpy as np
+from timeit import default_timer as timer
+
+from benchmarks.reference_kinematics import calculate_acceleration_reference, calculate_velocity_reference
+from benchmarks.synthetic_data import make_synthetic_recording
+from processing.calculate_acceleration import calculate_acceleration, calculate_velocity_and_acceleration
+from processing.calculate_velocity import calculate_velocity
+
+velocity_columns = [
+    "velocity",
+    "velocity_azimuth",
+    "velocity_elevation",
+    "angle_change",
+    "direction",
+    "velocity_roll",
+    "velocity_pitch",
+    "velocity_yaw",
+    "velocity_head",
+    "velocity_mideye_origin",
+    "velocity_mideye_origin_x",
+    "velocity_mideye_origin_y",
+    "velocity_mideye_origin_z",
+]
+
+acceleration_columns = [
+    "acceleration",
+    "acceleration_r",
+    "acceleration_azimuth",
+    "acceleration_elevation",
+    "acceleration_roll",
+    "acceleration_pitch",
+    "acceleration_yaw",
+    "acceleration_head",
+    "acceleration_mideye_origin",
+    "acceleration_mideye_origin_x",
+    "acceleration_mideye_origin_y",
+    "acceleration_mideye_origin_z",
+]
+
+def time_step(function, data):
+    start_time = timer()
+    result = function(data.copy())
+    return result, timer() - start_time
+
+# Check that both results agree and return the largest relative difference. NaN values have to be
+# at the same positions. Differences are expected only in the last bits, but they are amplified when
+# accelerations are derived from velocities that differ in the last bits.
+def compare_columns(reference, result, columns):
+    max_difference = 0.0
+    for column in columns:
+        expected = reference[column].to_numpy(dtype=float)
+        actual = result[column].to_numpy(dtype=float)
+        np.testing.assert_allclose(actual, expected, rtol=1e-9, atol=1e-9, equal_nan=True, err_msg=column)
+        valid = np.isfinite(expected) & (expected != 0)
+        if valid.any():
+            max_difference = max(max_difference,
+                                 np.max(np.abs(actual[valid] - expected[valid]) / np.abs(expected[valid])))
+    return max_difference
+
+def print_report(step, n, reference_time, vectorized_time, max_difference):
+    print(f"{step}: {n} samples")
+    print(f"  per-sample loop: {reference_time:10.3f} s")
+    print(f"  vectorized:      {vectorized_time:10.3f} s")
+    print(f"  speedup:         {reference_time / vectorized_time:10.1f} x")
+    print(f"  max. relative difference: {max_difference:.2e}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the kinematics steps of the processing pipeline.")
+    parser.add_argument("--duration", type=float, default=7200.0,
+                        help="Duration of the synthetic recording in seconds (default: 2 hours).")
+    parser.add_argument("--frequency", type=float, default=50.0, help="Sampling rate in Hz.")
+    args = parser.parse_args()
+
+    data = make_synthetic_recording(args.duration, args.frequency)
+
+    reference, velocity_reference_time = time_step(calculate_velocity_reference, data)
+    result, vectorized_time = time_step(calculate_velocity, data)
+    max_difference = compare_columns(reference, result, velocity_columns)
+    print_report("calculate_velocity", len(data), velocity_reference_time, vectorized_time, max_difference)
+
+    # Both acceleration implementations start from the reference velocities.
+    reference_velocities = reference
+    reference, acceleration_reference_time = time_step(calculate_acceleration_reference, reference_velocities)
+    result, vectorized_time = time_step(calculate_acceleration, reference_velocities)
+    max_difference = compare_columns(reference, result, acceleration_columns)
+    print_report("calculate_acceleration", len(data), acceleration_reference_time, vectorized_time, max_difference)
+
+    # The fused step replaces calculate_velocity followed by calculate_acceleration.
+    result, vectorized_time = time_step(calculate_velocity_and_acceleration, data)
+    max_difference = compare_columns(reference, result, velocity_columns + acceleration_columns)
+    print_report("calculate_velocity_and_acceleration", len(data),
+                 velocity_reference_time + acceleration_reference_time, vectorized_time, max_difference)
+
+if __name__ == "__main__":
+    main()
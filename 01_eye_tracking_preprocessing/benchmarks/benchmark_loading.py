@@ -0,0 +1,81 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the pandas reference loader of the raw DMC files with the columnar loader, once parsing
+# the .csv file and once reading the Parquet sidecar written by the first run. Run from the
+# 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_loading --duration 3600
+
+import argparse
+import os
+import tempfile
+import pandas as pd
+from timeit import default_timer as timer
+
+from benchmarks.reference_loading import load_file_reference
+from benchmarks.synthetic_data import make_synthetic_raw_file
+from processing.column_manifest import get_input_columns
+from processing.load_raw_file import load_file
+
+def time_load(function, *args):
+    start_time = timer()
+    result = function(*args)
+    return result, timer() - start_time
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark loading of the raw DMC files.")
+    parser.add_argument("--duration", type=float, default=3600.0,
+                        help="Duration of the synthetic recording in seconds (default: 1 hour).")
+    parser.add_argument("--frequency", type=float, default=60.0, help="Sampling rate in Hz.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory_ircam = os.path.join(directory, "raw", "proband_001", "study_day", "ircam")
+        os.makedirs(directory_ircam)
+        filename = make_synthetic_raw_file(directory_ircam, args.duration, args.frequency)
+        cache_directory = os.path.join(directory, "cache")
+
+        reference, reference_time = time_load(load_file_reference, filename)
+        parsed, parse_time = time_load(load_file, filename, cache_directory)
+        cached, cache_time = time_load(load_file, filename, cache_directory)
+        # Only the channels read by the processing steps.
+        projected, projected_time = time_load(load_file, filename, None, get_input_columns())
+
+        # The reference loader keeps the same columns, the columnar loader only skips the unused ones.
+        pd.testing.assert_frame_equal(parsed, reference[parsed.columns])
+        pd.testing.assert_frame_equal(cached, parsed)
+        pd.testing.assert_frame_equal(projected, parsed[projected.columns])
+
+        print(f"load_file: {len(reference)} rows, {os.path.getsize(filename) / 1e6:.1f} MB")
+        print(f"  pandas reference: {reference_time:10.3f} s")
+        print(f"  pyarrow parse:    {parse_time:10.3f} s")
+        print(f"  Parquet sidecar:  {cache_time:10.3f} s")
+        print(f"  projected parse:  {projected_time:10.3f} s ({len(projected.columns)} of {len(parsed.columns)} columns)")
+        print(f"  memory: {parsed.memory_usage().sum() / 1e6:.1f} MB, "
+              f"projected {projected.memory_usage().sum() / 1e6:.1f} MB")
+        print(f"  speedup (parse):  {reference_time / parse_time:10.1f} x")
+        print(f"  speedup (cached): {reference_time / cache_time:10.1f} x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+# Compare the sample-by-sample reference implementation of the REMODNAV saccade detection
+# (peak finding, movement on-/offset and one adaptive threshold per context window) with the
+# vectorized detection used by the pipeline, on a synthetic recording. Run from the
+# 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_remodnav --duration 7200
+
+import argparse
+from contextlib import ExitStack
+from timeit import default_timer as timer
+from unittest import mock
+
+from benchmarks.synthetic_data import make_synthetic_recording
+from processing.load_config import load_config
+from processing.remodnav.remodnav import clf
+from processing.remodnav.remodnav.remodnav import remodnav
+from processing.remodnav.remodnav.tests import utils as reference
+
+# Run REMODNAV on a copy of the data and measure the total time as well as the time spent in the
+# saccade detection generator.
+def time_remodnav(data, remodnav_args):
+    detection_time = [0.0]
+    detect_saccades = clf.EyegazeClassifier._detect_saccades
+
+    def timed_detect_saccades(*args, **kwargs):
+        events = detect_saccades(*args, **kwargs)
+        while True:
+            start_time = timer()
+            try:
+                event = next(events)
+            except StopIteration:
+                detection_time[0] += timer() - start_time
+                return
+            detection_time[0] += timer() - start_time
+            yield event
+
+    with mock.patch.object(clf.EyegazeClassifier, "_detect_saccades", timed_detect_saccades):
+        start_time = timer()
+        data, data_events = remodnav(data.copy(), remodnav_args)
+        total_time = timer() - start_time
+    return data_events, total_time, detection_time[0]
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the saccade detection of REMODNAV.")
+    parser.add_argument("--duration", type=float, default=7200.0,
+                        help="Duration of the synthetic recording in seconds (default: 2 hours).")
+    parser.add_argument("--frequency", type=float, default=50.0, help="Sampling rate in Hz.")
+    parser.add_argument("--config", default="config_processing.yml",
+                        help="Processing config with the REMODNAV arguments.")
+    args = parser.parse_args()
+
+    remodnav_args = load_config(args.config).remodnav_args
+    data = make_synthetic_recording(args.duration, args.frequency)[["azimuth", "elevation"]]
+    # The Savitzky-Golay filter does not accept missing data at the edges of the recording.
+    data = data.ffill().bfill()
+
+    events, total_time, detection_time = time_remodnav(data, remodnav_args)
+    with ExitStack() as stack:
+        stack.enter_context(mock.patch.object(clf, "find_peaks", reference.find_peaks_loop))
+        stack.enter_context(mock.patch.object(clf, "find_movement_onsetidx",
+                                              reference.find_movement_onsetidx_loop))
+        stack.enter_context(mock.patch.object(clf, "find_movement_offsetidx",
+                                              reference.find_movement_offsetidx_loop))
+        stack.enter_context(mock.patch.object(
+            clf.EyegazeClassifier, "get_adaptive_saccade_velocity_velthresh_batch",
+            lambda self, *args, **kwargs: reference.velthresh_batch_loop(self, *args, **kwargs)))
+        reference_events, reference_total_time, reference_detection_time = time_remodnav(data, remodnav_args)
+
+    assert events.equals(reference_events), "Detected events differ from the reference implementation."
+
+    print(f"remodnav: {len(data)} samples, {len(events)} events (identical to reference)")
+    print(f"  saccade detection, per-sample loop: {reference_detection_time:10.3f} s")
+    print(f"  saccade detection, vectorized:      {detection_time:10.3f} s")
+    print(f"  speedup:                            {reference_detection_time / detection_time:10.1f} x")
+    print(f"  total, per-sample loop:             {reference_total_time:10.3f} s")
+    print(f"  total, vectorized:                  {total_time:10.3f} s")
+
+if __name__ == "__main__":
+    main()
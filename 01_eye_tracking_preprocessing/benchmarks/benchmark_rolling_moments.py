@@ -0,0 +1,123 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the moments of the numerical features computed from all rows of each sliding window with the
+# rolling moments that are updated from window to window, for window widths from the smallest to the
+# largest aggregation size. The time of the rolling moments per window does not grow with the width of the
+# windows. Run from the 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_rolling_moments --duration 1800 --aggregation-sizes 10 30 60 120 300
+
+import argparse
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from timeit import default_timer as timer
+
+from aggregation.fct_eye_utils import get_input_times
+from aggregation.load_config import load_config
+from aggregation.rolling_moments import Moments, get_rolling_moments
+from aggregation.window_stats import get_window_rows
+from benchmarks.synthetic_data import make_synthetic_aggregation_data
+
+# Number of values of the window matrix that are processed at once, about 32 MB of float64.
+BLOCK_SIZE = 1 << 22
+
+# Moments of each window from all rows of the window, with a strided view of each column in blocks of
+# windows.
+def get_moments_reference(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> Moments:
+    window_lengths = ends - starts
+    length = max(int(window_lengths.max(initial=0)), 1)
+    outside = np.arange(length) >= window_lengths[:, None]
+    block_windows = max(BLOCK_SIZE // length, 1)
+    result = Moments(*[np.zeros((len(starts), values.shape[1])) for _ in range(5)])
+    for column in range(values.shape[1]):
+        windows = sliding_window_view(np.concatenate((values[:, column], np.full(length, np.nan))), length)
+        for block_start in range(0, len(starts), block_windows):
+            block = slice(block_start, block_start + block_windows)
+            block_values = windows[starts[block]]
+            block_values[outside[block]] = np.nan
+            valid = ~np.isnan(block_values)
+            count = valid.sum(axis=1)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                mean = np.where(count > 0, np.where(valid, block_values, 0.0).sum(axis=1) / count, 0.0)
+            deviations = np.where(valid, block_values - mean[:, None], 0.0)
+            result.count[block, column] = count
+            result.mean[block, column] = mean
+            result.m2[block, column] = (deviations ** 2).sum(axis=1)
+            result.m3[block, column] = (deviations ** 3).sum(axis=1)
+            result.m4[block, column] = (deviations ** 4).sum(axis=1)
+    return result
+
+# Largest difference of the moments relative to the sum of the absolute powers of the deviations, which is
+# the scale of the rounding errors of both computations. Constant windows are skipped, their moments are
+# zero up to rounding.
+def get_max_difference(reference: Moments, result: Moments) -> float:
+    assert np.array_equal(result.count, reference.count)
+    max_difference = np.max(np.abs(result.mean - reference.mean) / np.maximum(np.abs(reference.mean), 1.0),
+                            initial=0.0)
+    valid = reference.m2 > 1e-12 * np.maximum(reference.mean ** 2, 1.0) * reference.count
+    if not valid.any():
+        return max_difference
+    # The sum of |d|^3 is at most the square root of the product of the sums of d^2 and d^4.
+    scales = [reference.m2, np.sqrt(reference.m2 * reference.m4), reference.m4]
+    for expected, actual, scale in zip([reference.m2, reference.m3, reference.m4],
+                                       [result.m2, result.m3, result.m4], scales):
+        max_difference = max(max_difference, np.max(np.abs(actual[valid] - expected[valid]) / scale[valid]))
+    return max_difference
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the rolling moments over the aggregation sizes.")
+    parser.add_argument("--duration", type=float, default=1800.0,
+                        help="Duration of the synthetic recording in seconds (default: 30 minutes).")
+    parser.add_argument("--aggregation-sizes", type=int, nargs="+", default=[10, 30, 60, 120, 300],
+                        help="Widths of the sliding windows in seconds.")
+    args = parser.parse_args()
+
+    config = load_config("config_aggregation.yml")
+    data = make_synthetic_aggregation_data(config.numerical_features, [], args.duration)
+    data = data[config.numerical_features]
+    values = data.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    print(f"moments of {len(config.numerical_features)} features, step size {config.step_size} s")
+    print(f"{'width':>7} {'windows':>8} {'all rows':>10} {'rolling':>10} {'rolling per window':>19} "
+          f"{'speedup':>8} {'max. difference':>16}")
+    for aggregation_size in args.aggregation_sizes:
+        inputs = get_input_times(data, config.step_size, aggregation_size)
+        starts, ends = get_window_rows(data.index, inputs, aggregation_size)
+
+        start_time = timer()
+        reference = get_moments_reference(values, starts, ends)
+        reference_time = timer() - start_time
+
+        start_time = timer()
+        result = get_rolling_moments(values, starts, ends)
+        rolling_time = timer() - start_time
+
+        max_difference = get_max_difference(reference, result)
+        np.testing.assert_array_less(max_difference, 1e-9)
+        print(f"{aggregation_size:>5} s {len(inputs):>8} {reference_time:>8.3f} s {rolling_time:>8.3f} s "
+              f"{rolling_time / len(inputs) * 1e6:>14.1f} us {reference_time / rolling_time:>7.1f}x "
+              f"{max_difference:>16.2e}")
+
+if __name__ == "__main__":
+    main()
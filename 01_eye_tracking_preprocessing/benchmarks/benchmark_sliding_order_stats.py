@@ -0,0 +1,102 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the median, quantiles and interquartile range of the numerical features computed with NumPy from
+# all rows of each sliding window with the order statistics of one sorted window that slides over the rows,
+# for window widths from the smallest to the largest aggregation size. Both give exactly the same values.
+# Run from the 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_sliding_order_stats --duration 1800 --aggregation-sizes 10 30 60 120 300
+
+import argparse
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from timeit import default_timer as timer
+
+from aggregation.fct_eye_utils import get_input_times
+from aggregation.load_config import load_config
+from aggregation.sliding_order_stats import get_sliding_order_stats
+from aggregation.window_stats import get_window_rows
+from benchmarks.synthetic_data import make_synthetic_aggregation_data
+
+# Number of values of the window matrix that are processed at once, about 32 MB of float64.
+BLOCK_SIZE = 1 << 22
+
+# Order statistics of each window with np.nanmedian and np.nanquantile, with a strided view of each column
+# in blocks of windows. The interquartile range is the difference of the quartiles like in scipy.stats.iqr.
+def get_order_stats_reference(values: np.ndarray, starts: np.ndarray, ends: np.ndarray) -> dict:
+    window_lengths = ends - starts
+    length = max(int(window_lengths.max(initial=0)), 1)
+    outside = np.arange(length) >= window_lengths[:, None]
+    block_windows = max(BLOCK_SIZE // length, 1)
+    stats = {statistic: np.full((len(starts), values.shape[1]), np.nan)
+             for statistic in ["median", "q5", "q95", "iqr"]}
+    for column in range(values.shape[1]):
+        windows = sliding_window_view(np.concatenate((values[:, column], np.full(length, np.nan))), length)
+        for block_start in range(0, len(starts), block_windows):
+            block = slice(block_start, block_start + block_windows)
+            block_values = windows[starts[block]]
+            block_values[outside[block]] = np.nan
+            valid = ~np.isnan(block_values).all(axis=1)
+            rows = np.arange(len(starts))[block][valid]
+            stats["median"][rows, column] = np.nanmedian(block_values[valid], axis=1)
+            q5, q25, q75, q95 = np.nanquantile(block_values[valid], [0.05, 0.25, 0.75, 0.95], axis=1)
+            stats["q5"][rows, column] = q5
+            stats["q95"][rows, column] = q95
+            stats["iqr"][rows, column] = q75 - q25
+    return stats
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sliding order statistics over the aggregation sizes.")
+    parser.add_argument("--duration", type=float, default=1800.0,
+                        help="Duration of the synthetic recording in seconds (default: 30 minutes).")
+    parser.add_argument("--aggregation-sizes", type=int, nargs="+", default=[10, 30, 60, 120, 300],
+                        help="Widths of the sliding windows in seconds.")
+    args = parser.parse_args()
+
+    config = load_config("config_aggregation.yml")
+    data = make_synthetic_aggregation_data(config.numerical_features, [], args.duration)
+    data = data[config.numerical_features]
+    values = data.to_numpy(dtype=np.float64, na_value=np.nan)
+
+    print(f"median, q5, q95 and iqr of {len(config.numerical_features)} features, step size {config.step_size} s")
+    print(f"{'width':>7} {'windows':>8} {'all rows':>10} {'sliding':>10} {'sliding per window':>19} {'speedup':>8}")
+    for aggregation_size in args.aggregation_sizes:
+        inputs = get_input_times(data, config.step_size, aggregation_size)
+        starts, ends = get_window_rows(data.index, inputs, aggregation_size)
+
+        start_time = timer()
+        reference = get_order_stats_reference(values, starts, ends)
+        reference_time = timer() - start_time
+
+        start_time = timer()
+        result = get_sliding_order_stats(values, starts, ends)
+        sliding_time = timer() - start_time
+
+        for statistic, expected in reference.items():
+            np.testing.assert_array_equal(result[statistic], expected, err_msg=statistic)
+        print(f"{aggregation_size:>5} s {len(inputs):>8} {reference_time:>8.3f} s {sliding_time:>8.3f} s "
+              f"{sliding_time / len(inputs) * 1e6:>14.1f} us {reference_time / sliding_time:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
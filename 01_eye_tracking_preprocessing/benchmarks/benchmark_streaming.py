@@ -0,0 +1,100 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Process a synthetic proband once as a whole recording and once in chunks, each in a fresh process, and
+# compare the processed data, the run time and the peak memory of the processes. Run from the
+# 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_streaming --duration 3600 --chunk-duration 600
+
+import argparse
+import multiprocessing
+import os
+import resource
+import tempfile
+import warnings
+import pandas as pd
+import yaml
+from concurrent.futures import ProcessPoolExecutor
+from timeit import default_timer as timer
+
+from aggregation.load_data import load_parquet_dataset
+from benchmarks.synthetic_data import make_synthetic_proband
+
+# Run the processing pipeline and return the run time and the peak resident memory of the process in MB.
+def run_pipeline(config_file: str) -> tuple[float, float]:
+    from ProcessingPipeline import ProcessingPipeline
+
+    warnings.simplefilter("ignore")
+    start_time = timer()
+    ProcessingPipeline(config_file).run()
+    return timer() - start_time, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark processing a recording in chunks.")
+    parser.add_argument("--duration", type=float, default=3600.0,
+                        help="Duration of the synthetic recording in seconds (default: 1 hour).")
+    parser.add_argument("--chunk-duration", type=int, default=600, help="Duration of the chunks in seconds.")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        # Each step runs in a fresh process, the peak memory of a process includes that of its parent.
+        context = multiprocessing.get_context("spawn")
+        raw_input_directory = os.path.join(directory, "raw")
+        with ProcessPoolExecutor(1, mp_context=context) as executor:
+            folder = executor.submit(make_synthetic_proband, raw_input_directory, args.duration).result()
+
+        with open("config_processing.yml", "r") as f:
+            config = yaml.load(f, Loader=yaml.FullLoader)
+        config.update(
+            raw_input_directory=raw_input_directory,
+            raw_cache_directory=os.path.join(directory, "cache"),
+            probands_selected=[folder[-3:]],
+            run_probands_in_parallel=False,
+            selected_phases=[1, 2],
+            output_format="parquet",
+        )
+
+        results = {}
+        for name, chunk_duration in [("whole recording", None), ("chunks", args.chunk_duration)]:
+            output_directory = os.path.join(directory, name)
+            config_file = os.path.join(directory, name + ".yml")
+            with open(config_file, "w") as f:
+                yaml.dump(dict(config, chunk_duration=chunk_duration, preprocessed_output_directory=output_directory,
+                               profile_directory=os.path.join(directory, name + " profiles")), f)
+            with ProcessPoolExecutor(1, mp_context=context) as executor:
+                results[name] = executor.submit(run_pipeline, config_file).result()
+
+        # The chunks give exactly the same data as the whole recording.
+        data = {
+            name: load_parquet_dataset(os.path.join(directory, name, folder, "ircam", folder + ".parquet"))
+            for name in results
+        }
+        pd.testing.assert_frame_equal(data["chunks"], data["whole recording"], check_exact=True)
+
+        print(f"processing: {args.duration:.0f} s recording, {len(data['chunks'])} processed samples")
+        for name, (run_time, peak_memory) in results.items():
+            print(f"  {name:<16} {run_time:8.2f} s, peak memory {peak_memory:8.1f} MB")
+
+if __name__ == "__main__":
+    main()
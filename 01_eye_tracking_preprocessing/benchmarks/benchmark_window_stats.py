@@ -0,0 +1,122 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the statistics of the numerical features computed per sliding window with get_stats with the
+# statistics of all windows computed at once by get_window_stats, and check that get_features keeps the
+# columns and values of the per-window results. Run from the 01_eye_tracking_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_window_stats --duration 1800 --epoch-width 60
+
+import argparse
+import numpy as np
+import pandas as pd
+from timeit import default_timer as timer
+
+from aggregation.fct_eye_utils import get_features, get_input_times, get_sliding_window
+from aggregation.load_config import load_config
+from aggregation.window_stats import get_window_stats
+from benchmarks.synthetic_data import make_synthetic_aggregation_data
+from processing.target_zones import get_target_zone_names
+
+# Per-window results of get_sliding_window in the layout of get_features.
+def get_features_reference(data, epoch_width, step_size, numerical_features, binary_features,
+                           single_eye_movement_features, target_zone_names) -> pd.DataFrame:
+    results = [
+        get_sliding_window(data, epoch_width=epoch_width, i=i, numerical_features=numerical_features,
+                           binary_features=binary_features,
+                           single_eye_movement_features=single_eye_movement_features,
+                           target_zone_names=target_zone_names)
+        for i in get_input_times(data, step_size, epoch_width)
+    ]
+    return pd.DataFrame(results).set_index("datetime").sort_index()
+
+# Check that both results have the same columns, kinds of dtypes and NaN values and return the largest relative
+# difference of the values. The sums of the windows are accumulated in a different order, so the values
+# differ in the last bits.
+def compare_results(reference: pd.DataFrame, result: pd.DataFrame, rtol: float) -> float:
+    assert list(result.columns) == list(reference.columns)
+    assert result.index.equals(reference.index)
+    max_difference = 0.0
+    for column in reference.columns:
+        # Integer columns have to stay integers, float32 statistics of get_stats for float32 features
+        # become Float64 in the aggregated files like the float64 statistics.
+        assert result[column].dtype.kind == reference[column].dtype.kind, column
+        expected = reference[column].to_numpy(dtype=float)
+        actual = result[column].to_numpy(dtype=float)
+        np.testing.assert_allclose(actual, expected, rtol=rtol, atol=rtol, equal_nan=True, err_msg=column)
+        # Values of constant windows that are zero up to rounding, e.g. the standard deviation, are skipped.
+        valid = np.isfinite(expected) & (np.abs(expected) > rtol)
+        if valid.any():
+            max_difference = max(max_difference,
+                                 np.max(np.abs(actual[valid] - expected[valid]) / np.abs(expected[valid])))
+    return max_difference
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the sliding window statistics of the aggregation.")
+    parser.add_argument("--duration", type=float, default=1800.0,
+                        help="Duration of the synthetic recording in seconds (default: 30 minutes).")
+    parser.add_argument("--epoch-width", type=int, default=60, help="Width of the sliding windows in seconds.")
+    parser.add_argument("--float32", action="store_true",
+                        help="Store the numerical features as float32 like the dtype policy of the processing.")
+    args = parser.parse_args()
+
+    config = load_config("config_aggregation.yml")
+    data = make_synthetic_aggregation_data(config.numerical_features, config.binary_features, args.duration)
+    if args.float32:
+        data = data.astype({column: "float32" for column in config.numerical_features})
+    # get_stats computes the statistics of float32 features in float32 and get_window_stats in float64, so
+    # they differ by the float32 rounding. For float64 features only the order of the sums differs.
+    rtol = 1e-4 if args.float32 else 1e-9
+
+    numerical_data = data[config.numerical_features]
+    inputs = get_input_times(numerical_data, config.step_size, args.epoch_width)
+
+    start_time = timer()
+    reference = get_features_reference(numerical_data, args.epoch_width, config.step_size,
+                                       config.numerical_features, [], [], {})
+    reference_time = timer() - start_time
+
+    start_time = timer()
+    result = get_window_stats(numerical_data, inputs, args.epoch_width)
+    vectorized_time = timer() - start_time
+
+    max_difference = compare_results(reference, result[reference.columns], rtol)
+    print(f"numerical statistics: {len(inputs)} windows of {len(config.numerical_features)} features")
+    print(f"  per window:     {reference_time:10.3f} s")
+    print(f"  all windows:    {vectorized_time:10.3f} s")
+    print(f"  speedup:        {reference_time / vectorized_time:10.1f} x")
+    print(f"  max. relative difference: {max_difference:.2e}")
+
+    # All features of get_features for the first ten minutes.
+    data = data[data.index < data.index[0] + pd.Timedelta(minutes=10)]
+    target_zone_names = {target_zone: names["name"] for target_zone, names in get_target_zone_names().items()}
+    features = dict(numerical_features=config.numerical_features, binary_features=config.binary_features,
+                    single_eye_movement_features=config.single_eye_movement_features,
+                    target_zone_names=target_zone_names)
+    reference = get_features_reference(data, args.epoch_width, config.step_size, **features)
+    result = get_features(data, epoch_width=args.epoch_width, num_cores=1, step_size=config.step_size, **features)
+    max_difference = compare_results(reference, result, rtol)
+    print(f"get_features: same columns and values, max. relative difference: {max_difference:.2e}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import os
+import numpy as np
+import pandas as pd
+
+# Wrap angles into [-pi, pi) like the spherical coordinates and euler angles of the pipeline.
+def wrap_angles(angles: np.ndarray) -> np.ndarray:
+    return (angles + np.pi) % (2 * np.pi) - np.pi
+
+# Create a synthetic processed recording with the columns used by the kinematics steps.
+# Gaze and head angles are random walks, the gaze additionally contains saccades. A few short
+# segments are removed to create gaps in the time index and some samples are set to NaN to mimic
+# signal loss.
+def make_synthetic_recording(duration: float = 7200.0, frequency: float = 50.0, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = int(duration * frequency)
+
+    index = pd.date_range(
+        start=pd.Timestamp("2023-06-01 09:00:00", tz="CET"),
+        periods=n,
+        freq="%dus" % (1000000 / frequency),
+    )
+    index.name = "time"
+
+    # Saccades: on average every 0.4 s the gaze jumps within two samples.
+    saccades = np.repeat(rng.random(n // 2) < 1 / (0.4 * frequency), 2)[:n]
+    saccade_step = np.repeat(rng.normal(0, 0.1, (n // 2, 2)), 2, axis=0)[:n]
+    saccade_step[~saccades] = 0
+
+    data = pd.DataFrame(index=index)
+    data["azimuth"] = wrap_angles(np.cumsum(rng.normal(0, 0.002, n) + saccade_step[:, 0]))
+    data["elevation"] = np.clip(np.cumsum(rng.normal(0, 0.001, n) + saccade_step[:, 1]), -1.2, 1.2)
+    data["roll"] = wrap_angles(np.pi + np.cumsum(rng.normal(0, 0.002, n)))
+    data["pitch"] = wrap_angles(np.cumsum(rng.normal(0, 0.002, n)))
+    data["yaw"] = wrap_angles(np.cumsum(rng.normal(0, 0.002, n)))
+    for axis in ["x", "y", "z"]:
+        data["mideye_origin_" + axis] = 0.6 + np.cumsum(rng.normal(0, 0.0002, n))
+
+    # Signal loss.
+    lost = rng.random(n) < 0.002
+    data.loc[lost, ["azimuth", "elevation"]] = np.nan
+
+    # Gaps in the time index, e.g. between cropped scenarios.
+    gap_starts = rng.choice(n - 500, size=max(1, int(duration / 600)), replace=False)
+    keep = np.ones(n, dtype=bool)
+    for gap_start in gap_starts:
+        keep[gap_start:gap_start + rng.integers(5, 500)] = False
+
+    return data[keep]
+
+# Write a synthetic raw DMC .csv file with the layout of the IRCAM recordings: semicolon separated,
+# a first data row with an incorrect format, millisecond timestamps, a file name column, the user
+# id column and an empty last column. The file name encodes the start time of the recording.
+def make_synthetic_raw_file(directory: str, duration: float = 3600.0, frequency: float = 60.0,
+                            seed: int = 0, start: str = "20230601T090000") -> str:
+    from processing.load_raw_file import RAW_COLUMN_TYPES
+
+    rng = np.random.default_rng(seed)
+    n = int(duration * frequency)
+
+    # Signal loss shows up as empty fields, the components of the gaze direction and of the head rotation
+    # are lost together.
+    vector_columns = {
+        "0_gaze_direction_": ["0_gaze_direction_x", "0_gaze_direction_y", "0_gaze_direction_z"],
+        "0_face_quat_": ["0_face_quat_w", "0_face_quat_x", "0_face_quat_y", "0_face_quat_z"],
+    }
+    vector_loss = {column: loss for columns in vector_columns.values()
+                   for loss in [rng.random(n) < 0.01] for column in columns}
+
+    data = {}
+    for column, column_type in RAW_COLUMN_TYPES.items():
+        if column_type == "int64":
+            data[column] = rng.integers(-1, 200, n)
+        else:
+            values = rng.normal(0, 1, n)
+            if column.endswith("confidence"):
+                values = np.abs(values)
+            values[vector_loss.get(column, rng.random(n) < 0.01)] = np.nan
+            data[column] = values
+    data["timestamp"] = 1685602800000 + np.round(np.arange(n) * 1000 / frequency).astype(int)
+    data["frame_number"] = np.arange(n)
+    data["filename"] = start + ".avi"
+    data["0_face_userid"] = -1
+    data[""] = ""
+    raw_data = pd.DataFrame(data)
+
+    filename = os.path.join(directory, start + ".csv")
+    raw_data.to_csv(filename, sep=";", index=False, float_format="%.7g")
+
+    # Corrupt the first data row like the first row of the recordings, only its timestamp is valid.
+    with open(filename, "r") as f:
+        lines = f.readlines()
+    first_row = lines[1].split(";")
+    lines[1] = ";".join(first_row[:1] + ["-"] * (len(first_row) - 1)) + "\n"
+    with open(filename, "w") as f:
+        f.writelines(lines)
+    return filename
+
+# Create a synthetic proband folder with the files read by the processing pipeline: the raw DMC files of
+# the recording split into files_count .csv files, the camera calibration and the handwritten notes with
+# two phases of two scenarios each and the BAC measurements. The recording starts at 09:00 UTC.
+def make_synthetic_proband(directory: str, duration: float = 3600.0, frequency: float = 60.0, seed: int = 0,
+                           files_count: int = 2, proband_id: str = "001") -> str:
+    folder = "proband_" + proband_id
+    directory_ircam = os.path.join(directory, folder, "study_day", "ircam")
+    directory_calibration = os.path.join(directory_ircam, "Calibration_20230601T085000", "intermediate")
+    directory_notes = os.path.join(directory, folder, "study_day", "handwritten-notes")
+    os.makedirs(directory_calibration)
+    os.makedirs(directory_notes)
+
+    start = pd.Timestamp("2023-06-01 09:00:00")
+    file_duration = duration / files_count
+    for i in range(files_count):
+        make_synthetic_raw_file(directory_ircam, file_duration, frequency, seed + i,
+                                (start + pd.Timedelta(seconds=i * file_duration)).strftime("%Y%m%dT%H%M%S"))
+
+    with open(os.path.join(directory_calibration, "CalibrationData.xml"), "w") as f:
+        f.write("<Calibration><Camera_WRT_World>[0.0, 0.0, -1.0, 0.0, 1.0, 0.0, 1.0, 0.0, 0.0, 0.5, -0.2, 0.8]"
+                "</Camera_WRT_World></Calibration>")
+
+    # Scenarios in local time, each a fifth of the recording with a break before it. The last row is
+    # ignored by produce_phases_csv.
+    local_start = start.tz_localize("UTC").tz_convert("Europe/Berlin").tz_localize(None)
+    scenarios = [(1, "highway"), (1, "rural"), (2, "highway"), (2, "city"), (2, "city")]
+    rows = []
+    for i, (phase, scenario) in enumerate(scenarios):
+        scenario_start = local_start + pd.Timedelta(seconds=(i + 0.1) * duration / 5)
+        scenario_end = local_start + pd.Timedelta(seconds=(i + 0.9) * duration / 5)
+        rows.append({
+            "date": scenario_start.strftime("%d.%m.%Y"),
+            "start_time": scenario_start.strftime("%H:%M:%S.%f")[:-3],
+            "end_time": scenario_end.strftime("%H:%M:%S.%f")[:-3],
+            "phase": phase,
+            "scenario": scenario,
+            "scenario_number": i + 1,
+            "validity": 1,
+            "notes": "",
+        })
+    pd.DataFrame(rows).to_csv(os.path.join(directory_notes, "driving_exact.csv"), index=False)
+    pd.DataFrame({"var_name": ["study_day_date"], "value": [local_start.strftime("%d.%m.%Y")]}).to_csv(
+        os.path.join(directory_notes, "general.csv"), index=False)
+    # One measurement at the start of each scenario and at the end of each phase.
+    pd.DataFrame({
+        "measurement": range(6),
+        "phase": [1, 1, 1, 2, 2, 2],
+        "BAC": [0.0, 0.2, 0.3, 0.5, 0.4, 0.35],
+    }).to_csv(os.path.join(directory_notes, "BAC_driving.csv"), index=False)
+    return folder
+
+# Create synthetic data in the layout of the aggregation after interpolate_data: a 50 Hz grid with gaps,
+# random walks for the numerical features with NaN, zero and constant segments, and runs of eye movement
+# events with their one-hot columns, target zones and event properties. The binary features that are no
+# eye movement types switch randomly between runs of about one second.
+def make_synthetic_aggregation_data(numerical_features: list[str], binary_features: list[str],
+                                    duration: float = 3600.0, frequency: float = 50.0,
+                                    seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = int(duration * frequency)
+
+    index = pd.date_range(
+        start=pd.Timestamp("2023-06-01 09:00:00", tz="CET"),
+        periods=n,
+        freq="%dus" % (1000000 / frequency),
+    )
+
+    data = pd.DataFrame(index=index)
+    for column in numerical_features:
+        values = np.cumsum(rng.normal(0, 1, n))
+        for start in rng.choice(n - 500, size=max(1, int(duration / 300)), replace=False):
+            segment = slice(start, start + rng.integers(10, 500))
+            values[segment] = rng.choice([np.nan, 0.0, values[start]])
+        values[rng.random(n) < 0.01] = np.nan
+        data[column] = values
+
+    # Eye movement events of on average ten samples, fixations and saccades are the most frequent types.
+    event_lengths = rng.geometric(0.1, n)
+    event_count = np.searchsorted(np.cumsum(event_lengths), n) + 1
+    event_types = rng.choice(9, event_count, p=[0.5, 0.1, 0.3, 0.02, 0.02, 0.02, 0.02, 0.01, 0.01])
+    event_rows = np.repeat(np.arange(event_count), event_lengths[:event_count])[:n]
+    data["event+eye_movement_type+eventspec"] = event_types[event_rows]
+    data["event+FIXA+onehot"] = data["event+eye_movement_type+eventspec"] == 0
+    data["event+SACC+onehot"] = data["event+eye_movement_type+eventspec"] == 2
+    for column in ["event+eye_movement_peak_vel+eventspec", "event+eye_movement_avg_vel+eventspec",
+                   "event+eye_movement_med_vel+eventspec", "event+eye_movement_amp_given+eventspec",
+                   "event+eye_movement_duration+eventspec"]:
+        data[column] = rng.gamma(2, 50, event_count)[event_rows]
+    data["aoi+target_zone+"] = rng.choice([-1, 0, 1, 2, 3, 4, 5, 6, 7, 8, 10, 11], event_count)[event_rows]
+    data["gaze+angle_change+velocity"] = np.abs(rng.normal(0, 1, n))
+
+    for column in binary_features:
+        if column not in data.columns:
+            data[column] = np.repeat(rng.random(n // 50 + 1) < 0.3, 50)[:n]
+
+    # Gaps in the time index, e.g. between cropped scenarios.
+    keep = np.ones(n, dtype=bool)
+    for gap_start in rng.choice(n - 5000, size=max(1, int(duration / 600)), replace=False):
+        keep[gap_start:gap_start + rng.integers(5, 5000)] = False
+    return data[keep]
@@ -21,58 +21,46 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #####################################################################
 
+import numpy as np
 import pandas as pd
 
-def add_eye_movement(data: pd.DataFrame, data_eye: pd.DataFrame):
+from processing.calculate_velocity import get_total_seconds
+
+def add_eye_movement(data: pd.DataFrame, data_eye: pd.DataFrame, categorical_labels: bool = False):
     """
     Adds the eye movement labels generated by remodnav to the data.
+
+    Each sample gets the event that started last at or before its timestamp, found with a binary
+    search of the sample timestamps in the event start times. As in the original sample loop, the
+    assigned event advances by at most one event per sample and the first event is used for all
+    samples before it. If categorical_labels is True, the eye movement type is stored as a
+    categorical column with int8 codes instead of strings.
     """
     data_eye["start_time"] = pd.to_datetime(data_eye["start_time"])
-    types = []
-    event_peak_vel = []
-    event_avg_vel = []
-    event_med_vel = []
-    event_amp_given = []
-    event_duration = []
-    
-    current_type = data_eye["label"].iloc[0]
-    current_peak_vel = data_eye["peak_vel"].iloc[0]
-    current_avg_vel = data_eye["avg_vel"].iloc[0]
-    current_med_vel = data_eye["med_vel"].iloc[0]
-    current_amp_given = data_eye["amp"].iloc[0]
-    current_duration = int((data_eye["end_time"].iloc[0] - 
-                            data_eye["start_time"].iloc[0]).total_seconds() * 1000)
-    
-    index_eye_next = 1
-    for i in range(len(data)):
-        if index_eye_next < len(data_eye):
-            if data.index[i] >= data_eye.index[index_eye_next]:
-                current_type = data_eye["label"].iloc[index_eye_next]
-                current_peak_vel = data_eye["peak_vel"].iloc[index_eye_next]
-                current_avg_vel = data_eye["avg_vel"].iloc[index_eye_next]
-                current_med_vel = data_eye["med_vel"].iloc[index_eye_next]
-                current_amp_given = data_eye["amp"].iloc[index_eye_next]
-                current_duration = int((data_eye["end_time"].iloc[index_eye_next] - 
-                                        data_eye["start_time"].iloc[index_eye_next]).total_seconds() * 1000)
-                index_eye_next = index_eye_next + 1
-            types.append(current_type)
-            event_peak_vel.append(current_peak_vel)
-            event_avg_vel.append(current_avg_vel)
-            event_med_vel.append(current_med_vel)
-            event_amp_given.append(current_amp_given)
-            event_duration.append(current_duration)
-            
-        elif index_eye_next == len(data_eye):
-            types.append(current_type)
-            event_peak_vel.append(current_peak_vel)
-            event_avg_vel.append(current_avg_vel)
-            event_med_vel.append(current_med_vel)
-            event_amp_given.append(current_amp_given)
-            event_duration.append(current_duration)
 
-    data["eye_movement_type"] = types
-    data["eye_movement_peak_vel"] = event_peak_vel
-    data["eye_movement_avg_vel"] = event_avg_vel
-    data["eye_movement_med_vel"] = event_med_vel
-    data["eye_movement_amp_given"] = event_amp_given
-    data["eye_movement_duration"] = event_duration
+    # Number of events that started at or before each sample, at least the first event.
+    event_starts = data_eye.index.as_unit("ns").asi8
+    sample_times = data.index.as_unit("ns").asi8
+    started_events = np.maximum(np.searchsorted(event_starts, sample_times, side="right"), 1)
+
+    # The sample loop consumed at most one new event per sample, which the cumulative minimum
+    # reproduces: events_consumed[i] = min(started_events[i], events_consumed[i - 1] + 1).
+    sample_positions = np.arange(len(data))
+    events_consumed = sample_positions + np.minimum(np.minimum.accumulate(started_events - sample_positions), 2)
+    event_idx = events_consumed - 1
+
+    event_duration = (get_total_seconds(
+        (pd.to_datetime(data_eye["end_time"]) - data_eye["start_time"]).to_numpy().astype("timedelta64[ns]")
+        .astype(np.int64)) * 1000).astype(np.int64)
+
+    if categorical_labels:
+        categories, label_codes = np.unique(data_eye["label"].to_numpy(dtype=str), return_inverse=True)
+        data["eye_movement_type"] = pd.Categorical.from_codes(
+            label_codes.astype(np.int8)[event_idx], categories=categories).remove_unused_categories()
+    else:
+        data["eye_movement_type"] = data_eye["label"].to_numpy()[event_idx]
+    data["eye_movement_peak_vel"] = data_eye["peak_vel"].to_numpy()[event_idx]
+    data["eye_movement_avg_vel"] = data_eye["avg_vel"].to_numpy()[event_idx]
+    data["eye_movement_med_vel"] = data_eye["med_vel"].to_numpy()[event_idx]
+    data["eye_movement_amp_given"] = data_eye["amp"].to_numpy()[event_idx]
+    data["eye_movement_duration"] = event_duration[event_idx]
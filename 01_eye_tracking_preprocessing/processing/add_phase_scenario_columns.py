@@ -23,25 +23,25 @@
 
 import warnings
 
+from processing.phase_index import get_phase_labels, get_phase_row_ranges
+
 def add_phase_scenario_columns(data, data_phases, selected_phases):
 
-    for _, phase in data_phases.iterrows():
-        if phase["phase"] not in selected_phases:
-            continue
-        indexer = data[
-            (data.index >= phase["start"]) & (data.index <= phase["end"])
-        ].index
-        if len(indexer) == 0:
-            warnings.warn("Driving section between " + str(phase["start"]) + " and " + str(phase["end"]) + " is empty.")
-            continue
-        data.loc[indexer, ["phase", "scenario", "variant"]] = phase[
-            ["phase", "scenario", "variant"]
-        ].values
+    # Rows of each selected phase, found with a binary search in the sorted index.
+    data_phases = data_phases[data_phases["phase"].isin(selected_phases)]
+    data_phases = get_phase_row_ranges(data.index, data_phases)
+    for _, phase in data_phases[data_phases["row_start"] == data_phases["row_end"]].iterrows():
+        warnings.warn("Driving section between " + str(phase["start"]) + " and " + str(phase["end"]) + " is empty.")
+    data_phases = data_phases[data_phases["row_start"] < data_phases["row_end"]]
+
+    labels = get_phase_labels(len(data), data_phases, ["phase", "scenario", "variant"])
+    data["phase"] = labels["phase"]
+    data["scenario"] = labels["scenario"]
+    data["variant"] = labels["variant"]
 
     data["phase"] = data["phase"].astype(str)
 
     data["phase"] = data["phase"].astype(float).astype(int)
     data["variant"] = data["variant"].astype(float).astype(int)
 
-
     return data
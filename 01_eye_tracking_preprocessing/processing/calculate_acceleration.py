@@ -22,106 +22,98 @@
 #####################################################################
 
 import numpy as np
+import pandas as pd
+
+from processing.calculate_velocity import get_time_deltas, velocity_input_columns, velocity_kernel
+
+acceleration_input_columns = [
+    "elevation",
+    "velocity_azimuth",
+    "velocity_elevation",
+    "velocity_roll",
+    "velocity_pitch",
+    "velocity_yaw",
+    "velocity_head",
+    "velocity_mideye_origin",
+    "velocity_mideye_origin_x",
+    "velocity_mideye_origin_y",
+    "velocity_mideye_origin_z",
+]
+
+# Compute all acceleration columns from arrays of the input columns and the time deltas between samples.
+# Each derivative is taken between sample i-1 and i, the first sample is set to 0.
+def acceleration_kernel(columns: dict[str, np.ndarray], time_deltas: np.ndarray) -> dict[str, np.ndarray]:
+    elevation = columns["elevation"]
+    velocity_azimuth = columns["velocity_azimuth"]
+    velocity_elevation = columns["velocity_elevation"]
+    results = {}
+
+    def _fill(values):
+        result = np.zeros(len(elevation))
+        result[1:] = values
+        return result
+
+    def _derivative(column):
+        return (columns[column][1:] - columns[column][:-1]) / time_deltas
+
+    # Calculate derivatives.
+    acceleration_azimuth = _derivative("velocity_azimuth")
+    acceleration_elevation = _derivative("velocity_elevation")
+
+    # Calculate accelerations in different directions.
+    cos_elevation = np.cos(elevation[1:])
+    sin_elevation = np.sin(elevation[1:])
+    acceleration_r_direction = -(velocity_elevation[1:] ** 2) - (velocity_azimuth[1:] ** 2) * (cos_elevation ** 2)
+    acceleration_azimuth_direction = acceleration_azimuth * cos_elevation - 2 * velocity_elevation[1:] * \
+        velocity_azimuth[1:] * sin_elevation
+    acceleration_elevation_direction = acceleration_elevation + (velocity_azimuth[1:] ** 2) * sin_elevation * \
+        cos_elevation
+
+    results["acceleration"] = _fill(np.sqrt(
+        (acceleration_r_direction ** 2) + (acceleration_azimuth_direction ** 2) +
+        (acceleration_elevation_direction ** 2)))
+    results["acceleration_r"] = _fill(acceleration_r_direction)
+    results["acceleration_azimuth"] = _fill(acceleration_azimuth_direction)
+    results["acceleration_elevation"] = _fill(acceleration_elevation_direction)
+
+    # Acceleration of head rotation.
+    results["acceleration_roll"] = _fill(_derivative("velocity_roll"))
+    results["acceleration_pitch"] = _fill(_derivative("velocity_pitch"))
+    results["acceleration_yaw"] = _fill(_derivative("velocity_yaw"))
+    results["acceleration_head"] = _fill(_derivative("velocity_head"))
+
+    # Acceleration of mid eye origin.
+    results["acceleration_mideye_origin"] = _fill(_derivative("velocity_mideye_origin"))
+    results["acceleration_mideye_origin_x"] = _fill(_derivative("velocity_mideye_origin_x"))
+    results["acceleration_mideye_origin_y"] = _fill(_derivative("velocity_mideye_origin_y"))
+    results["acceleration_mideye_origin_z"] = _fill(_derivative("velocity_mideye_origin_z"))
+
+    return results
+
+def calculate_acceleration(data: pd.DataFrame) -> pd.DataFrame:
+    time_deltas = get_time_deltas(data.index)
+    columns = {column: data[column].to_numpy(dtype=float) for column in acceleration_input_columns}
+
+    accelerations = acceleration_kernel(columns, time_deltas)
+    for column, values in accelerations.items():
+        data[column] = values
 
-def calculate_acceleration(data):
-    window_width = 1
-    step = int(np.ceil(float(window_width) / 2))
-
-    acceleration_list = []
-    acceleration_r_list = []
-    acceleration_azimuth_list = []
-    acceleration_elevation_list = []
-
-    acceleration_roll_list = []
-    acceleration_pitch_list = []
-    acceleration_yaw_list = []
-    acceleration_head_list = []
-
-    acceleration_mideye_origin = []
-    acceleration_mideye_origin_x = []
-    acceleration_mideye_origin_y = []
-    acceleration_mideye_origin_z = []
-
-    for i in range(len(data)):
-        # Get initial interval.
-        if step == window_width:
-            start_pos = i - step
-            end_pos = i
-        else:
-            start_pos = i - step
-            end_pos = i + step
-
-        if start_pos < 0:
-            start_pos = i
-
-        if end_pos > len(data) - 1:
-            end_pos = i
-
-        # Invalid intervals; first acceleration of each sequence is set to 0.
-        if start_pos == end_pos:
-            acceleration_list.append(0)
-            acceleration_r_list.append(0)
-            acceleration_azimuth_list.append(0)
-            acceleration_elevation_list.append(0)
-            acceleration_roll_list.append(0)
-            acceleration_pitch_list.append(0)
-            acceleration_yaw_list.append(0)
-            acceleration_head_list.append(0)
-            acceleration_mideye_origin.append(0)
-            acceleration_mideye_origin_x.append(0)
-            acceleration_mideye_origin_y.append(0)
-            acceleration_mideye_origin_z.append(0)
-            continue
-
-        # Calculate derivatives.
-        time = (data.index[end_pos] - data.index[start_pos]).total_seconds()
-        acceleration_azimuth = (data['velocity_azimuth'].iloc[end_pos] - data['velocity_azimuth'].iloc[start_pos]) / time
-        acceleration_elevation = (data['velocity_elevation'].iloc[end_pos] - data['velocity_elevation'].iloc[start_pos]) / time
-
-        # Acceleration of head rotation.
-        acceleration_roll_list.append((data['velocity_roll'].iloc[end_pos] - data['velocity_roll'].iloc[start_pos]) / time)
-        acceleration_pitch_list.append((data['velocity_pitch'].iloc[end_pos] - data['velocity_pitch'].iloc[start_pos]) / time)
-        acceleration_yaw_list.append((data['velocity_yaw'].iloc[end_pos] - data['velocity_yaw'].iloc[start_pos]) / time)
-        acceleration_head_list.append((data['velocity_head'].iloc[end_pos] - data['velocity_head'].iloc[start_pos]) / time)
-
-        # Acceleration of mid eye origin.
-        acceleration_mideye_origin.append(
-            (data['velocity_mideye_origin'].iloc[end_pos] - data['velocity_mideye_origin'].iloc[start_pos]) / time)
-        acceleration_mideye_origin_x.append(
-            (data['velocity_mideye_origin_x'].iloc[end_pos] - data['velocity_mideye_origin_x'].iloc[start_pos]) / time)
-        acceleration_mideye_origin_y.append(
-            (data['velocity_mideye_origin_y'].iloc[end_pos] - data['velocity_mideye_origin_y'].iloc[start_pos]) / time)
-        acceleration_mideye_origin_z.append(
-            (data['velocity_mideye_origin_z'].iloc[end_pos] - data['velocity_mideye_origin_z'].iloc[start_pos]) / time)
-
-        # Calculate accelerations in different directions.
-        acceleration_r_direction = -(data['velocity_elevation'].iloc[i] ** 2) - (data['velocity_azimuth'].iloc[i] ** 2) * (
-                np.cos(data['elevation'].iloc[i]) ** 2)
-        acceleration_azimuth_direction = acceleration_azimuth * np.cos(data['elevation'].iloc[i]) - 2 * data[
-            'velocity_elevation'].iloc[i] * data['velocity_azimuth'].iloc[i] * np.sin(data['elevation'].iloc[i])
-        acceleration_elevation_direction = acceleration_elevation + (data['velocity_azimuth'].iloc[i] ** 2) * np.sin(
-            data['elevation'].iloc[i]) * np.cos(data['elevation'].iloc[i])
-
-        # Append accelerations to lists.
-        acceleration_list.append(np.linalg.norm(
-            np.array([acceleration_r_direction, acceleration_azimuth_direction, acceleration_elevation_direction])))
-        acceleration_r_list.append(acceleration_r_direction)
-        acceleration_azimuth_list.append(acceleration_azimuth_direction)
-        acceleration_elevation_list.append(acceleration_elevation_direction)
-
-    data['acceleration'] = np.array(acceleration_list)
-    data['acceleration_r'] = np.array(acceleration_r_list)
-    data['acceleration_azimuth'] = np.array(acceleration_azimuth_list)
-    data['acceleration_elevation'] = np.array(acceleration_elevation_list)
-
-    data['acceleration_roll'] = np.array(acceleration_roll_list)
-    data['acceleration_pitch'] = np.array(acceleration_pitch_list)
-    data['acceleration_yaw'] = np.array(acceleration_yaw_list)
-    data['acceleration_head'] = np.array(acceleration_head_list)
-
-    data['acceleration_mideye_origin'] = np.array(acceleration_mideye_origin)
-    data['acceleration_mideye_origin_x'] = np.array(acceleration_mideye_origin_x)
-    data['acceleration_mideye_origin_y'] = np.array(acceleration_mideye_origin_y)
-    data['acceleration_mideye_origin_z'] = np.array(acceleration_mideye_origin_z)
+    return data
+
+# Number of preceding samples on which the velocities and accelerations of a sample depend, the
+# acceleration is the derivative of the velocity, which is the derivative of the angles.
+DERIVATIVE_CONTEXT = 2
+
+# Fused version of calculate_velocity followed by calculate_acceleration. The time deltas are computed
+# once and the velocities are passed to the acceleration kernel as arrays.
+def calculate_velocity_and_acceleration(data: pd.DataFrame) -> pd.DataFrame:
+    time_deltas = get_time_deltas(data.index)
+    columns = {column: data[column].to_numpy(dtype=float) for column in velocity_input_columns}
+
+    velocities = velocity_kernel(columns, time_deltas)
+    accelerations = acceleration_kernel(columns | velocities, time_deltas)
+
+    for column, values in (velocities | accelerations).items():
+        data[column] = values
 
     return data
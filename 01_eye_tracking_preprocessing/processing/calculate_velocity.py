@@ -22,6 +22,7 @@
 #####################################################################
 
 import numpy as np
+import pandas as pd
 
 # Delta angle is defined such that delta will be positive if direction of change is in the direction of phi.
 def get_delta_angle_arctan2(angle_start, angle_end):
@@ -32,113 +33,93 @@ def get_delta_angle_arctan2(angle_start, angle_end):
         delta += 2 * np.pi
     return delta
 
-def calculate_velocity(data):
-    window_width = 1
-    step = int(np.ceil(float(window_width) / 2))
-
-    speed = []
-    speed_azimuth = []
-    speed_elevation = []
-    angle_change = []
-    direction = []
-    speed_roll = []
-    speed_pitch = []
-    speed_yaw = []
-    speed_head = []
-    speed_mideye_origin = []
-    speed_mideye_origin_x = []
-    speed_mideye_origin_y = []
-    speed_mideye_origin_z = []
-
-    for i in range(len(data)):
-        # Get initial interval.
-        if step == window_width:
-            start_pos = i - step
-            end_pos = i
-        else:
-            start_pos = i - step
-            end_pos = i + step
-
-        if start_pos < 0:
-            start_pos = i
-
-        if end_pos > len(data) - 1:
-            end_pos = i
-
-        # Invalid intervals; first speed of each sequence is set to 0.
-        if start_pos == end_pos:
-            speed.append(0)
-            speed_azimuth.append(0)
-            speed_elevation.append(0)
-            angle_change.append(0)
-            direction.append(0)
-            speed_roll.append(0)
-            speed_pitch.append(0)
-            speed_yaw.append(0)
-            speed_head.append(0)
-            speed_mideye_origin.append(0)
-            speed_mideye_origin_x.append(0)
-            speed_mideye_origin_y.append(0)
-            speed_mideye_origin_z.append(0)
-            continue
-
-        time = (data.index[end_pos] - data.index[start_pos]).total_seconds()
-
-        # Calculate derivatives.
-        delta_azimuth_temp = get_delta_angle_arctan2(data['azimuth'].iloc[start_pos], data['azimuth'].iloc[end_pos])
-        delta_elevation_temp = get_delta_angle_arctan2(data['elevation'].iloc[start_pos], data['elevation'].iloc[end_pos])
-        azimuth_deriv = delta_azimuth_temp / time
-        elevation_deriv = delta_elevation_temp / time
-
-        delta_roll = get_delta_angle_arctan2(data['roll'].iloc[start_pos], data['roll'].iloc[end_pos])
-        delta_pitch = get_delta_angle_arctan2(data['pitch'].iloc[start_pos], data['pitch'].iloc[end_pos])
-        delta_yaw = get_delta_angle_arctan2(data['yaw'].iloc[start_pos], data['yaw'].iloc[end_pos])
-        speed_roll.append(delta_roll / time)
-        speed_pitch.append(delta_pitch / time)
-        speed_yaw.append(delta_yaw / time)
-        speed_head.append(np.linalg.norm(np.asanyarray([delta_roll, delta_pitch, delta_yaw])) / time)
-
-        # Calculate speed of mid eye origin.
-        mid_eye_ampl = np.sqrt(
-            ((data['mideye_origin_x'].iloc[end_pos] - data['mideye_origin_x'].iloc[start_pos]) ** 2) +
-            ((data['mideye_origin_y'].iloc[end_pos] - data['mideye_origin_y'].iloc[start_pos]) ** 2) +
-            ((data['mideye_origin_z'].iloc[end_pos] - data['mideye_origin_z'].iloc[start_pos]) ** 2)
-        )
-        speed_mideye_origin.append(mid_eye_ampl / time)
-        speed_mideye_origin_x.append((data['mideye_origin_x'].iloc[end_pos] - data['mideye_origin_x'].iloc[start_pos]) / time)
-        speed_mideye_origin_y.append((data['mideye_origin_y'].iloc[end_pos] - data['mideye_origin_y'].iloc[start_pos]) / time)
-        speed_mideye_origin_z.append((data['mideye_origin_z'].iloc[end_pos] - data['mideye_origin_z'].iloc[start_pos]) / time)
-
-        # Calculate speed.
-        speed.append(np.sqrt((np.cos(data['elevation'].iloc[i-1]) ** 2) * (azimuth_deriv ** 2) + (elevation_deriv ** 2)))
-        speed_azimuth.append(azimuth_deriv)
-        speed_elevation.append(elevation_deriv)
-
-        # Calculate the angular change as the norm of the change in azimuth and elevation direction.
-        angle_change.append(np.sqrt((delta_azimuth_temp ** 2) + (delta_elevation_temp ** 2)))
-
-        # Calculate direction as the angle between the horizontal line from the starting point and the position of the
-        # end point.
-        nominator = np.tan(data['elevation'].iloc[end_pos]) - np.tan(data['elevation'].iloc[start_pos])
-        denominator = np.tan(data['azimuth'].iloc[end_pos]) - np.tan(data['azimuth'].iloc[start_pos])
-        direction.append(np.arctan2(nominator, denominator))
-
-    data['velocity'] = np.array(speed)
-    data['velocity_azimuth'] = np.array(speed_azimuth)
-    data['velocity_elevation'] = np.array(speed_elevation)
-
-    data['angle_change'] = np.array(angle_change)
-
-    data['direction'] = np.array(direction)
-
-    data['velocity_roll'] = np.array(speed_roll)
-    data['velocity_pitch'] = np.array(speed_pitch)
-    data['velocity_yaw'] = np.array(speed_yaw)
-    data['velocity_head'] = np.array(speed_head)
-
-    data['velocity_mideye_origin'] = np.array(speed_mideye_origin)
-    data['velocity_mideye_origin_x'] = np.array(speed_mideye_origin_x)
-    data['velocity_mideye_origin_y'] = np.array(speed_mideye_origin_y)
-    data['velocity_mideye_origin_z'] = np.array(speed_mideye_origin_z)
+# Array version of get_delta_angle_arctan2, wraps all deltas into [-pi, pi].
+def get_delta_angles_arctan2(angles_start: np.ndarray, angles_end: np.ndarray) -> np.ndarray:
+    delta = angles_end - angles_start
+    delta = np.where(delta > np.pi, delta - 2 * np.pi, delta)
+    delta = np.where(delta < -np.pi, delta + 2 * np.pi, delta)
+    return delta
+
+# Convert time deltas in nanoseconds to seconds like Timedelta.total_seconds(), i.e. truncated to
+# microseconds and summed from full seconds and microseconds, to give exactly the same values.
+def get_total_seconds(delta_ns: np.ndarray) -> np.ndarray:
+    delta_us = delta_ns // 1000
+    return (delta_us // 1000000) + (delta_us % 1000000) / 1e6
+
+# Time in seconds between consecutive samples.
+def get_time_deltas(index: pd.DatetimeIndex) -> np.ndarray:
+    return get_total_seconds(np.diff(index.as_unit("ns").asi8))
+
+velocity_input_columns = [
+    "azimuth",
+    "elevation",
+    "roll",
+    "pitch",
+    "yaw",
+    "mideye_origin_x",
+    "mideye_origin_y",
+    "mideye_origin_z",
+]
+
+# Compute all velocity columns from arrays of the input columns and the time deltas between samples.
+# Each derivative is taken between sample i-1 and i, the first sample is set to 0.
+def velocity_kernel(columns: dict[str, np.ndarray], time_deltas: np.ndarray) -> dict[str, np.ndarray]:
+    azimuth = columns["azimuth"]
+    elevation = columns["elevation"]
+    results = {}
+
+    def _fill(values):
+        result = np.zeros(len(azimuth))
+        result[1:] = values
+        return result
+
+    # Calculate derivatives.
+    delta_azimuth = get_delta_angles_arctan2(azimuth[:-1], azimuth[1:])
+    delta_elevation = get_delta_angles_arctan2(elevation[:-1], elevation[1:])
+    azimuth_deriv = delta_azimuth / time_deltas
+    elevation_deriv = delta_elevation / time_deltas
+
+    # Calculate speed.
+    results["velocity"] = _fill(np.sqrt((np.cos(elevation[:-1]) ** 2) * (azimuth_deriv ** 2) + (elevation_deriv ** 2)))
+    results["velocity_azimuth"] = _fill(azimuth_deriv)
+    results["velocity_elevation"] = _fill(elevation_deriv)
+
+    # Calculate the angular change as the norm of the change in azimuth and elevation direction.
+    results["angle_change"] = _fill(np.sqrt((delta_azimuth ** 2) + (delta_elevation ** 2)))
+
+    # Calculate direction as the angle between the horizontal line from the starting point and the position of the
+    # end point.
+    nominator = np.tan(elevation[1:]) - np.tan(elevation[:-1])
+    denominator = np.tan(azimuth[1:]) - np.tan(azimuth[:-1])
+    results["direction"] = _fill(np.arctan2(nominator, denominator))
+
+    # Velocity of head rotation.
+    delta_roll = get_delta_angles_arctan2(columns["roll"][:-1], columns["roll"][1:])
+    delta_pitch = get_delta_angles_arctan2(columns["pitch"][:-1], columns["pitch"][1:])
+    delta_yaw = get_delta_angles_arctan2(columns["yaw"][:-1], columns["yaw"][1:])
+    results["velocity_roll"] = _fill(delta_roll / time_deltas)
+    results["velocity_pitch"] = _fill(delta_pitch / time_deltas)
+    results["velocity_yaw"] = _fill(delta_yaw / time_deltas)
+    results["velocity_head"] = _fill(np.sqrt((delta_roll ** 2) + (delta_pitch ** 2) + (delta_yaw ** 2)) / time_deltas)
+
+    # Calculate speed of mid eye origin.
+    delta_mideye_x = columns["mideye_origin_x"][1:] - columns["mideye_origin_x"][:-1]
+    delta_mideye_y = columns["mideye_origin_y"][1:] - columns["mideye_origin_y"][:-1]
+    delta_mideye_z = columns["mideye_origin_z"][1:] - columns["mideye_origin_z"][:-1]
+    mid_eye_ampl = np.sqrt((delta_mideye_x ** 2) + (delta_mideye_y ** 2) + (delta_mideye_z ** 2))
+    results["velocity_mideye_origin"] = _fill(mid_eye_ampl / time_deltas)
+    results["velocity_mideye_origin_x"] = _fill(delta_mideye_x / time_deltas)
+    results["velocity_mideye_origin_y"] = _fill(delta_mideye_y / time_deltas)
+    results["velocity_mideye_origin_z"] = _fill(delta_mideye_z / time_deltas)
+
+    return results
+
+def calculate_velocity(data: pd.DataFrame) -> pd.DataFrame:
+    time_deltas = get_time_deltas(data.index)
+    columns = {column: data[column].to_numpy(dtype=float) for column in velocity_input_columns}
+
+    velocities = velocity_kernel(columns, time_deltas)
+    for column, values in velocities.items():
+        data[column] = values
 
     return data
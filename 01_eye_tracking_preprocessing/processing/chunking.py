@@ -0,0 +1,97 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import pandas as pd
+
+from processing.interpolate_and_filter import filter_confidence
+from processing.load_raw_file import get_sidecar_time_range, read_sidecar
+
+# Raw samples that are read before and after a chunk, far more than the INTERPOLATION_LIMIT grid points
+# that are filled next to a sample. The margin is doubled until every channel has a valid sample before and after the chunk, because the
+# interpolated values next to a gap depend on the samples on both sides of the gap.
+INTERPOLATION_MARGIN = pd.Timedelta(seconds=1)
+
+# Split the time between the first and the last sample into chunks of chunk_duration seconds. The
+# chunks start at full seconds, which are points of the 50 Hz grid of interpolate_and_filter.
+def get_chunk_bounds(first_time: pd.Timestamp, last_time: pd.Timestamp,
+                     chunk_duration: float) -> list[tuple[pd.Timestamp, pd.Timestamp]]:
+    duration = pd.Timedelta(seconds=chunk_duration)
+    if duration <= pd.Timedelta(0) or duration % pd.Timedelta(seconds=1) != pd.Timedelta(0):
+        raise ValueError("The chunk duration must be a positive number of full seconds.")
+    starts = pd.date_range(first_time.floor("s"), last_time, freq=duration)
+    return list(zip(starts, starts + duration))
+
+# Rows of data with start <= time < end, found with a binary search in the sorted index.
+def take_time_range(data: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+    return data.iloc[data.index.searchsorted(start, side="left"):data.index.searchsorted(end, side="left")]
+
+# Check whether every channel has a valid sample at or before start and at or after end. Before the
+# first and after the last sample of the recording no samples are needed.
+def has_interpolation_context(raw_data: pd.DataFrame, start: pd.Timestamp, end: pd.Timestamp,
+                              complete_before: bool, complete_after: bool) -> bool:
+    valid = filter_confidence(raw_data).notna()
+    return ((complete_before or valid[valid.index <= start].any().all())
+            and (complete_after or valid[valid.index >= end].any().all()))
+
+# The RawChunkReader reads the raw data of a recording in time ranges from the Parquet sidecars of its
+# .csv files, see processing.load_raw_file.
+class RawChunkReader:
+    def __init__(self, sidecar_paths: list[str], columns: list[str] = None) -> None:
+        if not sidecar_paths:
+            raise ValueError("No raw data files to read.")
+        self.sidecar_paths = sidecar_paths
+        self.columns = columns
+        self.time_ranges = [get_sidecar_time_range(sidecar_path) for sidecar_path in sidecar_paths]
+        self.first_time = min(first_time for first_time, _ in self.time_ranges)
+        self.last_time = max(last_time for _, last_time in self.time_ranges)
+
+    # Read the samples with start <= time < end of all files, sorted by time.
+    def read(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        raw_data = []
+        for sidecar_path, (first_time, last_time) in zip(self.sidecar_paths, self.time_ranges):
+            if first_time < end and last_time >= start:
+                file_data = read_sidecar(sidecar_path, self.columns, start, end)
+                if len(file_data):
+                    raw_data.append(file_data)
+        if not raw_data:
+            # No samples, but the columns of the files.
+            return read_sidecar(self.sidecar_paths[0], self.columns, start, start)
+        raw_data = pd.concat(raw_data)
+        raw_data.sort_index(inplace=True)
+        return raw_data
+
+    # Read the samples of the chunk [start, end) with the margins needed to interpolate the chunk like
+    # the whole recording. Returns None if there are no valid samples close to the chunk, in which case
+    # all interpolated samples of the chunk are empty.
+    def read_chunk(self, start: pd.Timestamp, end: pd.Timestamp) -> pd.DataFrame:
+        margin = INTERPOLATION_MARGIN
+        while True:
+            raw_data = self.read(start - margin, end + margin)
+            if margin == INTERPOLATION_MARGIN and filter_confidence(raw_data).empty:
+                return None
+            complete_before = start - margin <= self.first_time
+            complete_after = end + margin > self.last_time
+            if has_interpolation_context(raw_data, start, end, complete_before, complete_after) \
+                    or (complete_before and complete_after):
+                return raw_data
+            margin *= 2
@@ -0,0 +1,67 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Raw DMC channels (without the "0_" prefix) that each processing step reads. The loader only
+# materializes the union of these columns and of the channels that are passed through to the
+# processed files, all other channels of the raw files are never parsed.
+STAGE_INPUT_COLUMNS = {
+    "load_file": ["timestamp"],
+    "interpolate_and_filter": [
+        "gaze_direction_confidence",
+        "gaze_direction_x",
+        "gaze_direction_y",
+        "gaze_direction_z",
+        "face_quat_x",
+        "face_quat_y",
+        "face_quat_z",
+        "face_quat_w",
+    ],
+    "preprocess": [
+        "timestamp",
+        "frame_number",
+        "gaze_direction_confidence",
+        "target_zone",
+        "right_eye_state",
+        "left_eye_state",
+        "right_eye_opening_mm",
+        "left_eye_opening_mm",
+        "mideye_origin_x",
+        "mideye_origin_y",
+        "mideye_origin_z",
+        "gaze_direction_x",
+        "gaze_direction_y",
+        "gaze_direction_z",
+        "face_quat_x",
+        "face_quat_y",
+        "face_quat_z",
+        "face_quat_w",
+    ],
+    "calculate_spherical_coordinates": ["gaze_direction_x", "gaze_direction_y", "gaze_direction_z"],
+    "calculate_velocity_and_acceleration": ["mideye_origin_x", "mideye_origin_y", "mideye_origin_z"],
+}
+
+# Get the raw channels needed by the processing steps and the passed through channels, in the order
+# of first appearance.
+def get_input_columns(passthrough_columns: list[str] = None) -> list[str]:
+    columns = [column for stage_columns in STAGE_INPUT_COLUMNS.values() for column in stage_columns]
+    return list(dict.fromkeys(columns + list(passthrough_columns or [])))
@@ -25,6 +25,8 @@ from typing import Tuple
 import pandas as pd
 import warnings
 
+from processing.phase_index import get_phase_row_ranges, get_range_positions
+
 # Crop data to selected phases and scenarios.
 def crop_data(
     raw_data: pd.DataFrame,
@@ -49,16 +51,24 @@ def crop_data(
     if (start_times > end_times).any():
         warnings.warn("Some scenarios have start times after end times")
 
-    raw_selected_data = pd.concat(
-        [
-            raw_data.between_time(
-                phase.start.to_pydatetime().time(), phase.end.to_pydatetime().time()
-            )
-            for index, phase in filtered_phases.iterrows()
-        ]
+    if len(filtered_phases) == 0:
+        raise ValueError("None of the selected phases and scenarios is in the phases.")
+
+    # Rows of each phase, found with a binary search in the sorted index, and cropped with a single take.
+    filtered_phases = get_phase_row_ranges(raw_data.index, filtered_phases)
+    raw_selected_data = raw_data.take(
+        get_range_positions(filtered_phases["row_start"], filtered_phases["row_end"])
     )
 
-    # Get the phase and scenario times separately to visualize them in the plots.
+    selected_phase_times, selected_scenario_times = get_selected_times(data_phases, selected_phases)
+
+    return raw_selected_data, selected_phase_times, selected_scenario_times
+
+
+# Get the phase and scenario times separately to visualize them in the plots.
+def get_selected_times(
+    data_phases: pd.DataFrame, selected_phases: list[int]
+) -> Tuple[list[pd.Timestamp], list[pd.Timestamp]]:
     selected_phase_times = []
     selected_scenario_times = []
     for phase in selected_phases:
@@ -69,4 +79,4 @@ def crop_data(
             selected_scenario_times.append(row["start"])
             selected_scenario_times.append(row["end"])
 
-    return raw_selected_data, selected_phase_times, selected_scenario_times
+    return selected_phase_times, selected_scenario_times
@@ -0,0 +1,113 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import pandas as pd
+
+from processing.target_zones import get_target_zone_names
+
+# Eye movement types of REMODNAV, one-hot encoded after add_eye_movement.
+EYE_MOVEMENT_TYPES = ["FIXA", "HPSO", "IHPS", "ILPS", "ISAC", "LPSO", "MISSING", "PURS", "SACC"]
+
+# Float columns that keep float64: counters and millisecond times exceed the range in which
+# float32 represents integers exactly, codes are compared to exact values.
+EXACT_COLUMNS = [
+    "timestamp",
+    "frame_number",
+    "drowsinessTime_ms",
+    "inattentionTime_ms",
+    "accumulatedInattentionTime_ms",
+    "target_zone",
+    "gaze_direction_source",
+    "left_eye_state",
+    "right_eye_state",
+    "phase",
+    "variant",
+]
+
+# Columns with string labels.
+LABEL_COLUMNS = ["eye_movement_type", "scenario"]
+
+# The DtypePolicy defines the dtypes of the data and reports the memory usage of the data after each
+# processing step. One-hot columns and labels are converted after each step, which is exact. Float
+# signals are computed in float64 and only converted to float_dtype in the saved output. Without
+# arguments the dtypes are not changed.
+class DtypePolicy:
+    def __init__(
+        self,
+        float_dtype: str = None,
+        onehot_dtype: str = None,
+        categorical_labels: bool = False,
+    ) -> None:
+        self.float_dtype = float_dtype
+        self.onehot_dtype = onehot_dtype
+        self.categorical_labels = categorical_labels
+        self.onehot_columns = None
+
+    # Create the policy from the dtype_policy entry of the config file, None keeps all dtypes.
+    @classmethod
+    def from_config(cls, config: dict = None) -> "DtypePolicy":
+        return cls(**(config or {}))
+
+    def get_onehot_columns(self) -> set[str]:
+        if self.onehot_columns is None:
+            target_zone_names = [target_zone["name"] for target_zone in get_target_zone_names().values()]
+            self.onehot_columns = set(target_zone_names + EYE_MOVEMENT_TYPES)
+        return self.onehot_columns
+
+    # Convert the one-hot columns and labels of the data to the dtypes of the policy, with float_signals
+    # also the float signals. Other columns are not copied.
+    def apply(self, data: pd.DataFrame, float_signals: bool = False) -> pd.DataFrame:
+        dtypes = {}
+        if self.onehot_dtype is not None:
+            onehot_columns = self.get_onehot_columns()
+            for column, dtype in data.dtypes.items():
+                if column in onehot_columns and dtype != self.onehot_dtype and not data[column].hasnans:
+                    dtypes[column] = self.onehot_dtype
+        if self.float_dtype is not None and float_signals:
+            for column, dtype in data.dtypes.items():
+                if dtype == "float64" and column not in EXACT_COLUMNS and column not in dtypes:
+                    dtypes[column] = self.float_dtype
+        if self.categorical_labels:
+            for column in LABEL_COLUMNS:
+                if column in data.columns and data[column].dtype == object:
+                    dtypes[column] = "category"
+        if dtypes:
+            data = data.astype(dtypes)
+        return data
+
+    # Apply the policy after a processing step, with float_signals before the data is saved, and add the
+    # memory usage to the report.
+    def apply_and_report(self, data: pd.DataFrame, stage: str, memory_report: dict,
+                         float_signals: bool = False) -> pd.DataFrame:
+        data = self.apply(data, float_signals)
+        memory_report[stage] = data.memory_usage(deep=True).sum()
+        return data
+
+# Format the memory usage of the data after each processing step in MB.
+def format_memory_report(memory_report: dict) -> str:
+    return "\n".join(f"  {stage:<40} {memory / 1e6:10.1f} MB" for stage, memory in memory_report.items())
+
+# Keep the largest memory usage of each processing step over the chunks of a recording.
+def update_peak_memory(peak_memory_report: dict, memory_report: dict):
+    for stage, memory in memory_report.items():
+        peak_memory_report[stage] = max(peak_memory_report.get(stage, 0), memory)
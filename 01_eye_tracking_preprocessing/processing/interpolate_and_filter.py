@@ -24,14 +24,120 @@
 import pandas as pd
 import numpy as np
 
+# Maximum number of consecutive missing samples that are filled, counted in the union of the raw
+# samples and the target grid as by pandas' interpolate(limit=5, limit_direction="both").
+INTERPOLATION_LIMIT = 5
+
+# Positions of the raw samples and of the grid points in the sorted union of both. A grid point
+# that coincides with a raw sample shares its position.
+def get_union_positions(raw_times: np.ndarray, grid_times: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    grid_before_raw = np.searchsorted(grid_times, raw_times, side="left")
+    raw_before_grid = np.searchsorted(raw_times, grid_times, side="left")
+    # Number of coinciding timestamps before each raw sample and each grid point.
+    coincides = np.zeros(len(raw_times) + 1, dtype=np.int64)
+    coincides[1:] = np.cumsum(
+        grid_times[grid_before_raw.clip(0, len(grid_times) - 1)] == raw_times) if len(grid_times) else 0
+    raw_positions = np.arange(len(raw_times)) + grid_before_raw - coincides[:-1]
+    grid_positions = np.arange(len(grid_times)) + raw_before_grid - coincides[raw_before_grid]
+    return raw_positions, grid_positions
+
+# Interpolate columns that are valid at the same raw samples linearly in time onto the grid, as
+# np.interp does for pandas' time interpolation: the closest valid sample at or before and at or
+# after each grid point are weighted by their time difference, outside of the valid samples the
+# first or last valid value is used. Grid points further than the limit from any valid sample in
+# the union stay NaN. The values are a 2-D array with one column per signal.
+def interpolate_time(raw_times: np.ndarray, values: np.ndarray, valid: np.ndarray, grid_times: np.ndarray,
+                     raw_positions: np.ndarray, grid_positions: np.ndarray, limit: int) -> np.ndarray:
+    result = np.full((len(grid_times), values.shape[1]), np.nan)
+    valid_rows = np.flatnonzero(valid)
+    if len(valid_rows) == 0:
+        return result
+    valid_times = raw_times[valid_rows]
+    valid_positions = raw_positions[valid_rows]
+
+    previous = np.searchsorted(valid_times, grid_times, side="right") - 1
+    following = np.searchsorted(valid_times, grid_times, side="left")
+    has_previous = previous >= 0
+    has_following = following < len(valid_rows)
+    previous = np.where(has_previous, previous, following)
+    following = np.where(has_following, following, previous)
+
+    distance = np.minimum(
+        np.where(has_previous, grid_positions - valid_positions[previous], limit + 1),
+        np.where(has_following, valid_positions[following] - grid_positions, limit + 1),
+    )
+    filled = distance <= limit
+
+    # Same operations as np.interp on the nanoseconds as float64.
+    x = grid_times[filled].astype(np.float64)
+    x0 = valid_times[previous[filled]].astype(np.float64)
+    x1 = valid_times[following[filled]].astype(np.float64)
+    y0 = values[valid_rows[previous[filled]]].astype(np.float64)
+    y1 = values[valid_rows[following[filled]]].astype(np.float64)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        slope = (y1 - y0) / (x1 - x0)[:, np.newaxis]
+        interpolated = slope * (x - x0)[:, np.newaxis] + y0
+    # Outside of the valid samples both neighbours are the first or last valid sample.
+    result[filled] = np.where(((x == x0) | (x0 == x1))[:, np.newaxis], y0, interpolated)
+    return result
+
+# Take the nearest raw sample for each grid point, as scipy's interp1d(kind="nearest") does for
+# pandas' nearest interpolation: ties go to the earlier sample and grid points outside of the raw
+# samples stay NaN. Grid points further than the limit from any raw sample in the union stay NaN.
+def interpolate_nearest(raw_times: np.ndarray, values: np.ndarray, grid_times: np.ndarray,
+                        raw_positions: np.ndarray, grid_positions: np.ndarray, limit: int) -> np.ndarray:
+    result = np.full((len(grid_times), values.shape[1]), np.nan)
+    if len(raw_times) == 0:
+        return result
+
+    bounds = raw_times / 2.0
+    bounds = bounds[1:] + bounds[:-1]
+    nearest = np.searchsorted(bounds, grid_times.astype(np.float64), side="left").clip(0, len(raw_times) - 1)
+
+    previous = np.searchsorted(raw_times, grid_times, side="right") - 1
+    following = np.searchsorted(raw_times, grid_times, side="left")
+    distance = np.minimum(
+        np.where(previous >= 0, grid_positions - raw_positions[previous.clip(0)], limit + 1),
+        np.where(following < len(raw_times),
+                 raw_positions[following.clip(0, len(raw_times) - 1)] - grid_positions, limit + 1),
+    )
+    filled = (distance <= limit) & (grid_times >= raw_times[0]) & (grid_times <= raw_times[-1])
+    result[filled] = values[nearest[filled]]
+    return result
+
+# Group the columns of a 2-D array by the rows at which they are valid.
+def group_by_valid_rows(valid: np.ndarray) -> list[list[int]]:
+    groups = {}
+    packed = np.packbits(valid, axis=0)
+    for column in range(valid.shape[1]):
+        groups.setdefault(packed[:, column].tobytes(), []).append(column)
+    return list(groups.values())
+
+# Normalize the rows of the given columns to unit vectors.
+def normalize_vectors(result: dict, columns: list[str]):
+    vectors = np.column_stack([result[column] for column in columns])
+    vectors = vectors / np.linalg.norm(vectors, axis=1)[:, np.newaxis]
+    for i, column in enumerate(columns):
+        result[column] = vectors[:, i]
+
+# Keep the raw samples with a gaze direction confidence of at least 0.01, only these are interpolated.
+def filter_confidence(raw_data: pd.DataFrame) -> pd.DataFrame:
+    return raw_data[raw_data["gaze_direction_confidence"] >= 0.01]
+
+# Resample the raw data to 50 Hz. If columns are given, only these columns are kept and interpolated.
+# The grid values are computed directly from the raw samples: float columns are interpolated in time
+# and integer columns take the nearest sample, filling at most INTERPOLATION_LIMIT missing samples.
 def interpolate_and_filter(
-    raw_data: pd.DataFrame) -> pd.DataFrame:
+    raw_data: pd.DataFrame, columns: list[str] = None) -> pd.DataFrame:
+
+    if columns is not None:
+        raw_data = raw_data[[column for column in raw_data.columns if column in columns]]
 
     non_float_cols = raw_data.select_dtypes(include="int").columns
 
     float_cols = raw_data.select_dtypes(include="float").columns
 
-    raw_data = raw_data[raw_data["gaze_direction_confidence"] >= 0.01]
+    raw_data = filter_confidence(raw_data)
 
     frequency = 50.0
     target_index = pd.date_range(
@@ -39,26 +145,37 @@ def interpolate_and_filter(
         end=raw_data.index[-1].ceil("s"),
         freq="%dus" % (1000000 / frequency),
     )
-    raw_data = raw_data.reindex(
-        index=raw_data.index.union(target_index).drop_duplicates()
-    )
+    if raw_data.index.has_duplicates:
+        raise ValueError("cannot reindex on an axis with duplicate labels")
 
-    raw_data.loc[:, float_cols] = raw_data.loc[:, float_cols].interpolate(
-        method="time", limit=5, limit_direction="both"
-    )
-    raw_data.loc[:, non_float_cols] = raw_data.loc[:, non_float_cols].interpolate(
-        method="nearest", limit=5, limit_direction="both"
-    )
-    raw_data = raw_data.reindex(target_index)
+    raw_times = raw_data.index.as_unit("ns").asi8
+    grid_times = target_index.as_unit("ns").asi8
+    raw_positions, grid_positions = get_union_positions(raw_times, grid_times)
+
+    result = {}
+
+    # Interpolate all float columns that are valid at the same samples at once.
+    float_values = raw_data[float_cols].to_numpy(dtype=np.float64)
+    float_valid = ~np.isnan(float_values)
+    for group in group_by_valid_rows(float_valid):
+        interpolated = interpolate_time(raw_times, float_values[:, group], float_valid[:, group[0]], grid_times,
+                                        raw_positions, grid_positions, INTERPOLATION_LIMIT)
+        for i, column in enumerate(float_cols[group]):
+            result[column] = interpolated[:, i].astype(raw_data[column].dtype, copy=False)
+
+    # Integer columns are always valid, they become float columns with NaN beyond the limit.
+    interpolated = interpolate_nearest(raw_times, raw_data[non_float_cols].to_numpy(dtype=np.float64), grid_times,
+                                       raw_positions, grid_positions, INTERPOLATION_LIMIT)
+    for i, column in enumerate(non_float_cols):
+        result[column] = interpolated[:, i]
 
     # Ensure we have unit vectors again (numerical inaccuracies possible after filtering).
-    gaze_direction_vector = ["gaze_direction_x", "gaze_direction_y", "gaze_direction_z"]
-    raw_data[gaze_direction_vector] = raw_data[gaze_direction_vector].div(
-        np.linalg.norm(raw_data[gaze_direction_vector], axis=1), axis=0
-    )
-    quat_vector = ["face_quat_x", "face_quat_y", "face_quat_z", "face_quat_w"]
-    raw_data[quat_vector] = raw_data[quat_vector].div(
-        np.linalg.norm(raw_data[quat_vector], axis=1), axis=0
-    )
+    normalize_vectors(result, ["gaze_direction_x", "gaze_direction_y", "gaze_direction_z"])
+    normalize_vectors(result, ["face_quat_x", "face_quat_y", "face_quat_z", "face_quat_w"])
+
+    # Other columns are only kept at grid points that coincide with a raw sample.
+    other_cols = raw_data.columns.difference(float_cols.union(non_float_cols), sort=False)
+    for column in other_cols:
+        result[column] = raw_data[column].reindex(target_index)
 
-    return raw_data
+    return pd.DataFrame({column: result[column] for column in raw_data.columns}, index=target_index)
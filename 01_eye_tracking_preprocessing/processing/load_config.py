@@ -34,7 +34,16 @@ class ProcessingConfig:
         selected_scenarios: list[str],
         remodnav_args: list[str],
         confidence: float = 0.01,
-        run_probands_in_parallel: bool = False
+        run_probands_in_parallel: bool = False,
+        raw_cache_directory: str = None,
+        passthrough_columns: list[str] = None,
+        dtype_policy: dict = None,
+        output_format: str = "pickle",
+        chunk_duration: float = None,
+        stage_cache_directory: str = None,
+        profile_directory: str = None,
+        max_workers: int = None,
+        worker_memory_budget: float = None
     ) -> None:
         self.raw_input_directory = raw_input_directory
         self.preprocessed_output_directory = preprocessed_output_directory
@@ -44,6 +53,15 @@ class ProcessingConfig:
         self.selected_scenarios = selected_scenarios
         self.confidence = confidence
         self.remodnav_args = remodnav_args
+        self.raw_cache_directory = raw_cache_directory
+        self.passthrough_columns = passthrough_columns
+        self.dtype_policy = dtype_policy
+        self.output_format = output_format
+        self.chunk_duration = chunk_duration
+        self.stage_cache_directory = stage_cache_directory
+        self.profile_directory = profile_directory
+        self.max_workers = max_workers
+        self.worker_memory_budget = worker_memory_budget
 
 
 # Load config parameters from yaml file.
@@ -22,111 +22,235 @@
 #####################################################################
 
 import datetime
+import os
 import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.csv as pacsv
+import pyarrow.parquet as pq
 import pytz
 
-# This function loads the raw DMC data from the csv file and returns a pandas dataframe.
-def load_file(filename: str) -> pd.DataFrame:
+# Columns of the raw DMC files that are used by the pipeline and their types. The last column of
+# the files is empty, face_userid does not contain useful data and filename is not needed, so they
+# are not parsed at all.
+RAW_COLUMN_TYPES = {
+    "timestamp": pa.int64(),
+    "frame_number": pa.int64(),
+    "0_face_x": pa.int64(),
+    "0_face_y": pa.int64(),
+    "0_face_width": pa.int64(),
+    "0_face_height": pa.int64(),
+    "0_face_confidence": pa.float64(),
+    "0_face_quat_w": pa.float64(),
+    "0_face_quat_x": pa.float64(),
+    "0_face_quat_y": pa.float64(),
+    "0_face_quat_z": pa.float64(),
+    "0_face_trans_x": pa.float64(),
+    "0_face_trans_y": pa.float64(),
+    "0_face_trans_z": pa.float64(),
+    "0_face_yaw": pa.float64(),
+    "0_face_pitch": pa.float64(),
+    "0_face_roll": pa.float64(),
+    "0_mideye_origin_x": pa.float64(),
+    "0_mideye_origin_y": pa.float64(),
+    "0_mideye_origin_z": pa.float64(),
+    "0_mideye_origin_confidence": pa.float64(),
+    "0_gaze_direction_x": pa.float64(),
+    "0_gaze_direction_y": pa.float64(),
+    "0_gaze_direction_z": pa.float64(),
+    "0_gaze_direction_confidence": pa.float64(),
+    "0_gaze_direction_source": pa.int64(),
+    "0_target_zone": pa.int64(),
+    "0_left_eye_opening_mm": pa.float64(),
+    "0_left_eye_opening_percent": pa.float64(),
+    "0_left_eye_confidence": pa.float64(),
+    "0_left_eye_state": pa.int64(),
+    "0_right_eye_opening_mm": pa.float64(),
+    "0_right_eye_opening_percent": pa.float64(),
+    "0_right_eye_confidence": pa.float64(),
+    "0_right_eye_state": pa.int64(),
+    "0_drowsiness": pa.int64(),
+    "0_drowsinessTime_ms": pa.int64(),
+    "0_inattention": pa.int64(),
+    "0_inattentionTime_ms": pa.int64(),
+    "0_accumulatedInattention": pa.int64(),
+    "0_accumulatedInattentionTime_ms": pa.int64(),
+    "LeftEyeOutercorner_V1_x": pa.int64(),
+    "LeftEyeOutercorner_V1_y": pa.int64(),
+    "LeftEyeOutercorner_V1_attribute": pa.int64(),
+    "LeftEyeInnercorner_V1_x": pa.int64(),
+    "LeftEyeInnercorner_V1_y": pa.int64(),
+    "LeftEyeInnercorner_V1_attribute": pa.int64(),
+    "RightEyeOutercorner_V1_x": pa.int64(),
+    "RightEyeOutercorner_V1_y": pa.int64(),
+    "RightEyeOutercorner_V1_attribute": pa.int64(),
+    "RightEyeInnercorner_V1_x": pa.int64(),
+    "RightEyeInnercorner_V1_y": pa.int64(),
+    "RightEyeInnercorner_V1_attribute": pa.int64(),
+    "LeftMouthcorner_V1_x": pa.int64(),
+    "LeftMouthcorner_V1_y": pa.int64(),
+    "LeftMouthcorner_V1_attribute": pa.int64(),
+    "RightMouthcorner_V1_x": pa.int64(),
+    "RightMouthcorner_V1_y": pa.int64(),
+    "RightMouthcorner_V1_attribute": pa.int64(),
+    "LeftNostrilSill_V1_x": pa.int64(),
+    "LeftNostrilSill_V1_y": pa.int64(),
+    "LeftNostrilSill_V1_attribute": pa.int64(),
+    "RightNostrilSill_V1_x": pa.int64(),
+    "RightNostrilSill_V1_y": pa.int64(),
+    "RightNostrilSill_V1_attribute": pa.int64(),
+}
+
+# Names of the raw columns after removing the "0_" prefix, as used by the processing steps.
+RAW_COLUMN_NAMES = {column.replace("0_", "", 1): column for column in RAW_COLUMN_TYPES}
+
+# Number of rows per row group of a Parquet sidecar. When a recording is processed in chunks, only the
+# row groups that overlap with a chunk are read.
+SIDECAR_ROW_GROUP_SIZE = 65536
+
+# Keys stored in the metadata of a Parquet sidecar. A sidecar is only used if the size and the
+# modification time of the .csv file did not change since it was written.
+SIDECAR_KEYS = [b"raw_file_size", b"raw_file_mtime_ns"]
+
+# Get the raw names of the requested columns, all typed columns if no columns are given. The
+# timestamp is always needed for the index.
+def get_raw_columns(columns: list[str] = None) -> set[str]:
+    if columns is None:
+        return set(RAW_COLUMN_TYPES)
+    unknown_columns = [column for column in columns if column not in RAW_COLUMN_NAMES]
+    if unknown_columns:
+        raise ValueError("Unknown raw DMC columns: " + ", ".join(unknown_columns))
+    return {RAW_COLUMN_NAMES[column] for column in columns} | {"timestamp"}
 
-    # Skip the first row for because of incorrect format.
-    rows_to_skip = [1]
+# Read the column names and the first data row with plain file reads. The first data row has an
+# incorrect format and is skipped when parsing, only its timestamp is needed.
+def read_header(filename: str) -> tuple[list[str], list[str]]:
+    with open(filename, "r", newline="") as f:
+        columns = f.readline().rstrip("\r\n").split(";")
+        first_row = f.readline().rstrip("\r\n").split(";")
+    return columns, first_row
 
-    df = pd.read_csv(
+# Parse the requested columns of a raw DMC .csv file into a pandas dataframe with the pyarrow CSV
+# reader. The columns keep the order of the file.
+def parse_file(filename: str, columns: list[str] = None) -> pd.DataFrame:
+    header, first_row = read_header(filename)
+    raw_columns = get_raw_columns(columns)
+    include_columns = [column for column in header if column in raw_columns]
+
+    table = pacsv.read_csv(
         filename,
-        sep=";",
-        skiprows=rows_to_skip,
-        dtype={
-            "timestamp": int,
-            "frame_number": int,
-            "filename": str,
-            "0_face_x": int,
-            "0_face_y": int,
-            "0_face_width": int,
-            "0_face_height": int,
-            "0_face_confidence": float,
-            "0_face_quat_w": float,
-            "0_face_quat_x": float,
-            "0_face_quat_y": float,
-            "0_face_quat_z": float,
-            "0_face_trans_x": float,
-            "0_face_trans_y": float,
-            "0_face_trans_z": float,
-            "0_face_yaw": float,
-            "0_face_pitch": float,
-            "0_face_roll": float,
-            "0_mideye_origin_x": float,
-            "0_mideye_origin_y": float,
-            "0_mideye_origin_z": float,
-            "0_mideye_origin_confidence": float,
-            "0_gaze_direction_x": float,
-            "0_gaze_direction_y": float,
-            "0_gaze_direction_z": float,
-            "0_gaze_direction_confidence": float,
-            "0_gaze_direction_source": int,
-            "0_target_zone": int,
-            "0_left_eye_opening_mm": float,
-            "0_left_eye_opening_percent": float,
-            "0_left_eye_confidence": float,
-            "0_left_eye_state": int,
-            "0_right_eye_opening_mm": float,
-            "0_right_eye_opening_percent": float,
-            "0_right_eye_confidence": float,
-            "0_right_eye_state": int,
-            "0_drowsiness": int,
-            "0_drowsinessTime_ms": int,
-            "0_inattention": int,
-            "0_inattentionTime_ms": int,
-            "0_accumulatedInattention": int,
-            "0_accumulatedInattentionTime_ms": int,
-            "LeftEyeOutercorner_V1_x": int,
-            "LeftEyeOutercorner_V1_y": int,
-            "LeftEyeOutercorner_V1_attribute": int,
-            "LeftEyeInnercorner_V1_x": int,
-            "LeftEyeInnercorner_V1_y": int,
-            "LeftEyeInnercorner_V1_attribute": int,
-            "RightEyeOutercorner_V1_x": int,
-            "RightEyeOutercorner_V1_y": int,
-            "RightEyeOutercorner_V1_attribute": int,
-            "RightEyeInnercorner_V1_x": int,
-            "RightEyeInnercorner_V1_y": int,
-            "RightEyeInnercorner_V1_attribute": int,
-            "LeftMouthcorner_V1_x": int,
-            "LeftMouthcorner_V1_y": int,
-            "LeftMouthcorner_V1_attribute": int,
-            "RightMouthcorner_V1_x": int,
-            "RightMouthcorner_V1_y": int,
-            "RightMouthcorner_V1_attribute": int,
-            "LeftNostrilSill_V1_x": int,
-            "LeftNostrilSill_V1_y": int,
-            "LeftNostrilSill_V1_attribute": int,
-            "RightNostrilSill_V1_x": int,
-            "RightNostrilSill_V1_y": int,
-            "RightNostrilSill_V1_attribute": int,
-        },
+        # Skip the first row because of its incorrect format.
+        read_options=pacsv.ReadOptions(skip_rows_after_names=1),
+        parse_options=pacsv.ParseOptions(delimiter=";"),
+        convert_options=pacsv.ConvertOptions(
+            column_types={column: RAW_COLUMN_TYPES[column] for column in include_columns},
+            include_columns=include_columns,
+        ),
     )
+    df = table.to_pandas()
 
-    # Read the first row just to get the correct timestamp value.
-    first_row = pd.read_csv(filename, sep=";", nrows=1)
+    # The timestamps are relative to the first row, the file name contains the start time.
+    first_timestamp = pd.to_numeric(first_row[header.index("timestamp")])
     timestamp = filename.split("/")[-1].split(".")[0]
     timestamp = datetime.datetime.strptime(timestamp, "%Y%m%dT%H%M%S")
-    df["timestamp"] = df["timestamp"] - first_row["timestamp"][0]
+    df["timestamp"] = df["timestamp"] - first_timestamp
 
     df.index = pd.to_datetime(
-        (df["timestamp"] + timestamp.timestamp() * 1000).map(int), unit="ms"
+        (df["timestamp"] + timestamp.timestamp() * 1000).astype("int64"), unit="ms"
     )
     df.index = df.index.tz_localize(pytz.utc).tz_convert(pytz.timezone("CET"))
     df.index.names = ["time"]
 
-    # Last column is empty and face_userid does not contain useful data.
-    df = df.loc[:, ~df.columns.str.contains("Unnamed")]
+    # Remove all "0_" before the column names.
+    df.columns = df.columns.str.replace("0_", "", n=1)
+
+    return df
+
+def get_sidecar_path(filename: str, cache_directory: str) -> str:
+    # The proband folder keeps sidecars of different probands apart.
+    directory_ircam = os.path.dirname(os.path.abspath(filename))
+    proband_folder = os.path.basename(os.path.dirname(os.path.dirname(directory_ircam)))
+    name = os.path.splitext(os.path.basename(filename))[0] + ".parquet"
+    return os.path.join(cache_directory, proband_folder, name)
+
+def get_sidecar_metadata(filename: str) -> dict[bytes, bytes]:
+    stat = os.stat(filename)
+    return {
+        b"raw_file_size": str(stat.st_size).encode(),
+        b"raw_file_mtime_ns": str(stat.st_mtime_ns).encode(),
+    }
+
+# Check whether a sidecar exists, was written for the current version of the .csv file and contains
+# all requested columns.
+def is_sidecar_valid(sidecar_path: str, metadata: dict[bytes, bytes], columns: list[str]) -> bool:
+    if not os.path.isfile(sidecar_path):
+        return False
     try:
-        df.drop(columns=['0_face_userid'], inplace=True)
-    except KeyError:
-        pass
+        schema = pq.read_schema(sidecar_path)
+    except (OSError, pa.ArrowInvalid):
+        return False
+    sidecar_metadata = schema.metadata or {}
+    return (all(sidecar_metadata.get(key) == metadata[key] for key in SIDECAR_KEYS)
+            and set(columns).issubset(schema.names))
 
-    # Remove all "0_" before the column names.
-    df.columns = df.columns.str.replace("0_", "", 1)
+def write_sidecar(df: pd.DataFrame, sidecar_path: str, metadata: dict[bytes, bytes]):
+    table = pa.Table.from_pandas(df)
+    table = table.replace_schema_metadata({**table.schema.metadata, **metadata})
+
+    # Write to a temporary file first, such that parallel workers never read a partial sidecar.
+    os.makedirs(os.path.dirname(sidecar_path), exist_ok=True)
+    temporary_path = "%s.%d.tmp" % (sidecar_path, os.getpid())
+    pq.write_table(table, temporary_path, row_group_size=SIDECAR_ROW_GROUP_SIZE)
+    os.replace(temporary_path, sidecar_path)
+
+# Names of the requested columns after removing the "0_" prefix, in the order of RAW_COLUMN_TYPES.
+def get_requested_columns(columns: list[str] = None) -> list[str]:
+    raw_columns = get_raw_columns(columns)
+    return [column for column, raw_column in RAW_COLUMN_NAMES.items() if raw_column in raw_columns]
+
+# Read the requested columns of a sidecar, optionally only the rows with start <= time < end. A sidecar
+# written for more columns is read partially.
+def read_sidecar(sidecar_path: str, columns: list[str] = None, start: pd.Timestamp = None,
+                 end: pd.Timestamp = None) -> pd.DataFrame:
+    requested_columns = get_requested_columns(columns)
+    schema = pq.read_schema(sidecar_path)
+    read_columns = [column for column in schema.names if column in requested_columns]
+    filters = []
+    if start is not None:
+        filters.append(("time", ">=", start))
+    if end is not None:
+        filters.append(("time", "<", end))
+    return pq.read_table(sidecar_path, columns=read_columns, filters=filters or None,
+                         use_pandas_metadata=True).to_pandas()
+
+# Time of the first and the last sample of a sidecar, only the time column is read.
+def get_sidecar_time_range(sidecar_path: str) -> tuple[pd.Timestamp, pd.Timestamp]:
+    times = pq.read_table(sidecar_path, columns=["time"])["time"]
+    time_range = pc.min_max(times)
+    return time_range["min"].as_py(), time_range["max"].as_py()
+
+# Make sure that a valid sidecar with the requested columns exists and return its path. The .csv file
+# is only parsed if there is no valid sidecar yet.
+def update_sidecar(filename: str, cache_directory: str, columns: list[str] = None) -> str:
+    sidecar_path = get_sidecar_path(filename, cache_directory)
+    metadata = get_sidecar_metadata(filename)
+    if not is_sidecar_valid(sidecar_path, metadata, get_requested_columns(columns)):
+        write_sidecar(parse_file(filename, columns), sidecar_path, metadata)
+    return sidecar_path
+
+# This function loads the raw DMC data from the csv file and returns a pandas dataframe.
+# Only the given columns are materialized, see processing.column_manifest, all typed columns if
+# no columns are given. If a cache directory is given, the parsed data is stored in a Parquet
+# sidecar per file and re-runs read the sidecar instead of parsing the .csv file again.
+def load_file(filename: str, cache_directory: str = None, columns: list[str] = None) -> pd.DataFrame:
+    if cache_directory is None:
+        return parse_file(filename, columns)
 
-    df.drop(columns=["filename"], inplace=True)
+    sidecar_path = get_sidecar_path(filename, cache_directory)
+    metadata = get_sidecar_metadata(filename)
+    if is_sidecar_valid(sidecar_path, metadata, get_requested_columns(columns)):
+        return read_sidecar(sidecar_path, columns)
 
+    df = parse_file(filename, columns)
+    write_sidecar(df, sidecar_path, metadata)
     return df
@@ -0,0 +1,74 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import numpy as np
+import pandas as pd
+
+# Nanoseconds since the epoch of the given times, independent of their time zone.
+def get_epoch_ns(times) -> np.ndarray:
+    return pd.DatetimeIndex(pd.to_datetime(pd.Series(times), utc=True)).as_unit("ns").asi8
+
+# Map the closed time intervals [start, end] of the phases (or scenarios) to integer row ranges
+# [row_start, row_end) of a sorted DatetimeIndex with a binary search. The end of each interval
+# can be moved by end_offset, e.g. to leave room for a sliding window. Returns a copy of the
+# phases with the row_start and row_end columns added.
+def get_phase_row_ranges(index: pd.DatetimeIndex, data_phases: pd.DataFrame,
+                         end_offset: pd.Timedelta = None) -> pd.DataFrame:
+    if not index.is_monotonic_increasing:
+        raise ValueError("The index must be sorted to look up the phase intervals.")
+
+    sample_times = index.as_unit("ns").asi8
+    starts = get_epoch_ns(data_phases["start"])
+    ends = get_epoch_ns(data_phases["end"])
+    if end_offset is not None:
+        ends = ends + pd.Timedelta(end_offset).value
+
+    data_phases = data_phases.copy()
+    data_phases["row_start"] = np.searchsorted(sample_times, starts, side="left")
+    # Intervals that end before they start contain no rows.
+    data_phases["row_end"] = np.maximum(np.searchsorted(sample_times, ends, side="right"),
+                                        data_phases["row_start"])
+    return data_phases
+
+# Get the rows of all given ranges in the order of the ranges, such that the data can be cropped
+# with a single take.
+def get_range_positions(row_starts, row_ends) -> np.ndarray:
+    row_starts = np.asarray(row_starts, dtype=np.int64)
+    row_ends = np.asarray(row_ends, dtype=np.int64)
+    lengths = row_ends - row_starts
+    if lengths.sum() == 0:
+        return np.zeros(0, dtype=np.int64)
+    # Offset of every position from the start of its range.
+    offsets = np.arange(lengths.sum()) - np.repeat(np.cumsum(lengths) - lengths, lengths)
+    return np.repeat(row_starts, lengths) + offsets
+
+# Label the rows of each phase with the values of its label columns. Phases are labelled in the
+# given order, such that later phases overwrite earlier ones where they overlap. Rows outside of
+# all phases keep NaN.
+def get_phase_labels(n: int, data_phases: pd.DataFrame, label_columns: list[str]) -> dict:
+    labels = {column: np.full(n, np.nan, dtype=object) for column in label_columns}
+    for column in label_columns:
+        for row_start, row_end, value in zip(data_phases["row_start"], data_phases["row_end"],
+                                             data_phases[column]):
+            labels[column][row_start:row_end] = value
+    return labels
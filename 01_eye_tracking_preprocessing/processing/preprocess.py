@@ -45,16 +45,30 @@ def get_valid_target_zone_names(data: pd.DataFrame):
     return valid_target_zone_names, non_existing_target_zones
 
 
-def preprocess(data: pd.DataFrame, directory_folder: str, confidence=0.1) -> pd.DataFrame:
+# Sorted target zones of the samples, used to encode the chunks of a recording with the same columns.
+def get_target_zones(data: pd.DataFrame) -> np.ndarray:
+    return np.unique(data["target_zone"].dropna())
+
+
+# Drop samples without data and samples below the confidence threshold.
+def filter_samples(data: pd.DataFrame, confidence=0.1) -> pd.DataFrame:
     # Sort out all rows where all columns are empty.
     data.dropna(
         subset=data.columns.drop(["timestamp", "frame_number"]), inplace=True, how="all"
     )
 
-    data = data[data["gaze_direction_confidence"] >= confidence]
+    return data[data["gaze_direction_confidence"] >= confidence]
+
+
+# If target_zones is given, these target zones are one-hot encoded instead of the target zones of the data.
+def preprocess(data: pd.DataFrame, directory_folder: str, confidence=0.1, target_zones=None) -> pd.DataFrame:
+    data = filter_samples(data, confidence)
 
     # One-hot encode the target zones and rename them to the names of the target zones.
-    data = data.join(pd.get_dummies(data["target_zone"]))
+    target_zone = data["target_zone"]
+    if target_zones is not None:
+        target_zone = target_zone.astype(pd.CategoricalDtype(target_zones))
+    data = data.join(pd.get_dummies(target_zone))
     target_zone_names, non_existing_target_zones = get_valid_target_zone_names(data)
 
     data = data.rename(columns=target_zone_names, errors="raise")
@@ -85,9 +99,10 @@ def preprocess(data: pd.DataFrame, directory_folder: str, confidence=0.1) -> pd.
             ]
         )
     ).transpose()
-    data.loc[:, "mideye_origin_x"] = mideye_world[:, 0]
-    data.loc[:, "mideye_origin_y"] = mideye_world[:, 1]
-    data.loc[:, "mideye_origin_z"] = mideye_world[:, 2]
+    # Replace whole columns, float32 columns of the dtype policy would otherwise be upcast in place.
+    data["mideye_origin_x"] = mideye_world[:, 0]
+    data["mideye_origin_y"] = mideye_world[:, 1]
+    data["mideye_origin_z"] = mideye_world[:, 2]
 
     # Transform gaze vector to world coordinate system.
     gaze_direction_world = (
@@ -100,9 +115,9 @@ def preprocess(data: pd.DataFrame, directory_folder: str, confidence=0.1) -> pd.
             ]
         )
     ).transpose()
-    data.loc[:, "gaze_direction_x"] = gaze_direction_world[:, 0]
-    data.loc[:, "gaze_direction_y"] = gaze_direction_world[:, 1]
-    data.loc[:, "gaze_direction_z"] = gaze_direction_world[:, 2]
+    data["gaze_direction_x"] = gaze_direction_world[:, 0]
+    data["gaze_direction_y"] = gaze_direction_world[:, 1]
+    data["gaze_direction_z"] = gaze_direction_world[:, 2]
 
     # Transform head quaternions to world coordinate system.
     r_ccs = R.from_quat(
@@ -25,9 +25,9 @@ import numpy as np
 import os
 from xml.dom import minidom
 
-def read_in_cam2world(directory_folder):
+def get_calibration_file(directory_folder):
     """
-    Gets the cam2world coordinates from the camera calibration file.
+    Gets the path of the camera calibration file.
     """
     base_directory = directory_folder + '/study_day/ircam/'
     directories = [d for d in os.listdir(base_directory) if os.path.isdir(os.path.join(base_directory, d))]
@@ -36,7 +36,14 @@ def read_in_cam2world(directory_folder):
     calibration_folder = [folder for folder in directories if folder.startswith('Calibration_')][0]
     calibration_file_path = base_directory + calibration_folder + '/intermediate/'
     
-    calibration_document = minidom.parse(calibration_file_path + 'CalibrationData.xml')
+    return calibration_file_path + 'CalibrationData.xml'
+
+
+def read_in_cam2world(directory_folder):
+    """
+    Gets the cam2world coordinates from the camera calibration file.
+    """
+    calibration_document = minidom.parse(get_calibration_file(directory_folder))
     items = calibration_document.getElementsByTagName('Camera_WRT_World')
     cam2world_values = np.array(items[0].firstChild.nodeValue.replace('[', '').replace(']', '').split(', ')).astype(
         float).reshape((4, 3))
@@ -12,6 +12,7 @@ import pandas as pd
 from statsmodels.robust.scale import mad
 from scipy import signal
 from scipy import ndimage
+from scipy import stats
 from scipy.signal import savgol_filter
 from scipy.ndimage import median_filter
 from math import (
@@ -22,7 +23,11 @@ from math import (
 import logging
 lgr = logging.getLogger('remodnav.clf')
 
+# normalization constant of `mad()`, i.e. scipy.stats.norm.ppf(3/4.)
+_MAD_NORMALIZATION = stats.norm.ppf(3 / 4.)
+
 from .filter_velocities import filter_velocities
+from .kernels import spike_filter
 
 
 def deg_per_pixel(screen_size, viewing_distance, screen_resolution):
@@ -57,28 +62,28 @@ def find_peaks(vels, threshold):
       Each item is a tuple with start and end index of the window where
       velocities exceed the threshold.
     """
+    vels = np.asarray(vels)
+    # a sample above the threshold switches a peak on, a sample below
+    # switches it off, anything else (NaN, equal) keeps the current state
+    above = vels > threshold
+    changes = np.flatnonzero(above | (vels < threshold))
+    switch_on = above[changes]
+    # keep only samples that flip the state, these alternate between
+    # saccade onsets and offsets, starting with an onset
+    flips = switch_on != np.concatenate(([False], switch_on[:-1]))
+    edges = changes[flips].tolist()
+
     def _get_vels(start, end):
         v = vels[start:end]
         v = v[~np.isnan(v)]
         return v
 
-    sacs = []
-    sac_on = None
-    for i, v in enumerate(vels):
-        if sac_on is None and v > threshold:
-            # start of a saccade
-            sac_on = i
-        elif sac_on is not None and v < threshold:
-            sacs.append([
-                sac_on,
-                i,
-                _get_vels(
-                    sac_on,
-                    min(len(vels), i + 1))
-            ])
-            sac_on = None
-    if sac_on:
+    sacs = [
+        [sac_on, i, _get_vels(sac_on, min(len(vels), i + 1))]
+        for sac_on, i in zip(edges[0::2], edges[1::2])]
+    if len(edges) % 2 and edges[-1]:
         # end of data, but velocities still high
+        sac_on = edges[-1]
         sacs.append([
             sac_on,
             len(vels) - 1,
@@ -87,31 +92,45 @@ def find_peaks(vels, threshold):
 
 
 def find_movement_onsetidx(vels, start_idx, sac_onset_velthresh):
+    # find first local minimum after vel drops below onset threshold
+    # going backwards in time, i.e. the first sample that is not above
+    # the threshold and smaller than its predecessor
+
+    # we used to also continue on NaN, but it could mean detecting very
+    # long saccades that consist of (mostly) missing data
+    # test growing blocks of samples at once, saccades are short
     idx = start_idx
-    while idx > 0 \
-            and (vels[idx] > sac_onset_velthresh or
-                 vels[idx] <= vels[idx - 1]):
-        # find first local minimum after vel drops below onset threshold
-        # going backwards in time
-
-        # we used to do this, but it could mean detecting very long
-        # saccades that consist of (mostly) missing data
-        #         or np.isnan(vels[sacc_start])):
-        idx -= 1
+    blocksize = 16
+    while idx > 0:
+        block_start = max(idx - blocksize, 0)
+        v = vels[block_start:idx + 1]
+        stop = np.flatnonzero(
+            ~((v[1:] > sac_onset_velthresh) | (v[1:] <= v[:-1])))
+        if len(stop):
+            return int(block_start + 1 + stop[-1])
+        idx = block_start
+        blocksize *= 2
     return idx
 
 
 def find_movement_offsetidx(vels, start_idx, off_velthresh):
-    idx = start_idx
     # shift saccade end index to the first element that is below the
-    # velocity threshold
-    while idx < len(vels) - 1 \
-            and (vels[idx] > off_velthresh or
-                 (vels[idx] > vels[idx + 1])):
-            # we used to do this, but it could mean detecting very long
-            # saccades that consist of (mostly) missing data
-            #    or np.isnan(vels[idx])):
-        idx += 1
+    # velocity threshold and not larger than its successor
+
+    # we used to also continue on NaN, but it could mean detecting very
+    # long saccades that consist of (mostly) missing data
+    # test growing blocks of samples at once, saccades are short
+    idx = start_idx
+    blocksize = 16
+    while idx < len(vels) - 1:
+        block_end = min(idx + blocksize, len(vels) - 1)
+        v = vels[idx:block_end + 1]
+        stop = np.flatnonzero(
+            ~((v[:-1] > off_velthresh) | (v[:-1] > v[1:])))
+        if len(stop):
+            return int(idx + stop[0])
+        idx = block_end
+        blocksize *= 2
     return idx
 
 
@@ -150,39 +169,69 @@ def filter_spikes(data):
       methods for video-based pupil-tracking systems. Behavior Research
       Methods, Instruments, & Computers, 25(2), 137-142. doi:10.3758/bf03204486
     """
-    def _filter(arr):
-        # over all triples of neighboring samples
-        arr = arr.copy()
-        for i in range(1, len(arr) - 1):
-            if (arr[i - 1] < arr[i] and arr[i] > arr[i + 1]) \
-                    or (arr[i - 1] > arr[i] and arr[i] < arr[i + 1]):
-                # immediate sign-reversal of the difference from
-                # x-1 -> x -> x+1
-                prev_dist = abs(arr[i - 1] - arr[i])
-                next_dist = abs(arr[i + 1] - arr[i])
-                # replace x by the neighboring value that is closest
-                # in value
-                arr[i] = arr[i - 1] \
-                    if prev_dist < next_dist else arr[i + 1]
-        return arr
-
-    data['x'] = _filter(data['x'])
-    data['y'] = _filter(data['y'])
+    data['x'] = spike_filter(data['x'])
+    data['y'] = spike_filter(data['y'])
     return data
 
 
-def get_dilated_nan_mask(arr, iterations, max_ignore_size=None):
+def get_dilated_nan_mask(arr, iterations, max_ignore_size=None,
+                         return_stats=False):
+    """Mask of NaN clusters larger than `max_ignore_size`, dilated
+
+    Parameters
+    ----------
+    arr : array
+      Samples, NaN marks missing data.
+    iterations : int
+      Number of samples by which the clusters are dilated on either side.
+    max_ignore_size : int or None
+      Clusters with at most this many samples are not masked. If None, all
+      clusters are masked.
+    return_stats : bool
+      If True, additionally return statistics of the NaN clusters.
+
+    Returns
+    -------
+    array or tuple
+      Boolean mask. With `return_stats`, a tuple of the mask and a dict with
+      the number of clusters (`count`), the number of masked clusters
+      (`masked`) and the cluster size histogram (`size_histogram`, mapping
+      cluster size to the number of clusters of that size).
+    """
     clusters, nclusters = ndimage.label(np.isnan(arr))
-    # go through all clusters and remove any cluster that is less
-    # the max_ignore_size
-    for i in range(nclusters):
-        # cluster index is base1
-        i = i + 1
-        if (clusters == i).sum() <= max_ignore_size:
-            clusters[clusters == i] = 0
+    # size of all clusters at once, cluster index is base1 and label 0
+    # is data
+    sizes = np.bincount(clusters.ravel(), minlength=nclusters + 1)
+    # lookup table to remove any cluster that is less the max_ignore_size
+    keep = sizes > max_ignore_size if max_ignore_size is not None \
+        else np.ones(len(sizes), dtype=bool)
+    keep[0] = False
     # mask to cover all samples with dataloss > `max_ignore_size`
-    mask = ndimage.binary_dilation(clusters > 0, iterations=iterations)
-    return mask
+    mask = ndimage.binary_dilation(keep[clusters], iterations=iterations)
+    if not return_stats:
+        return mask
+    cluster_sizes, cluster_counts = np.unique(sizes[1:], return_counts=True)
+    stats = dict(
+        count=nclusters,
+        masked=int(keep.sum()),
+        size_histogram=dict(zip(cluster_sizes.tolist(),
+                                cluster_counts.tolist())),
+    )
+    return mask, stats
+
+
+def get_nan_free_segments(arr):
+    """Run-length encode the NaN-free segments of an array
+
+    Returns
+    -------
+    tuple
+      Arrays with the start and end (exclusive) index of every maximal
+      segment without NaN, both sorted.
+    """
+    valid = np.concatenate(([0], ~np.isnan(arr), [0])).astype(np.int8)
+    edges = np.diff(valid)
+    return np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
 
 
 def events2bids_events_tsv(events, fname, tsoffset=0.0):
@@ -270,6 +319,13 @@ class EyegazeClassifier(object):
 
             self.max_sac_freq = max_initial_saccade_freq / sr
 
+            # NaN cluster statistics of the last preproc() call, see
+            # get_dilated_nan_mask()
+            self.nan_cluster_stats = None
+            # NaN-free segments of the data that is classified, built once
+            # per call and reused by all ISP classifications
+            self._nan_free_segments = None
+
     def _get_angle_deriv_amp(self, data, angles):
         delta = max(angles[0], angles[-1]) - min(angles[0], angles[-1])
         if 180 < delta:
@@ -351,6 +407,101 @@ class EyegazeClassifier(object):
 
         return cur_thresh, (med + self.noise_factor * scale)
 
+    def get_adaptive_saccade_velocity_velthresh_batch(
+            self, vels, win_starts, win_ends, batchsize=1024):
+        """Determine saccade velocity thresholds for many context windows
+
+        Equivalent to calling `get_adaptive_saccade_velocity_velthresh()` on
+        `vels[start:end]` for every window, but the windows are processed
+        together as rows of a NaN-padded array.
+
+        Parameters
+        ----------
+        vels : array
+          Velocities.
+        win_starts : array
+          Start index of each window.
+        win_ends : array
+          End index (exclusive) of each window.
+        batchsize : int
+          Number of windows that are processed at once.
+
+        Returns
+        -------
+        tuple
+          (peak saccade velocity thresholds, saccade onset velocity
+          thresholds), one value per window.
+        """
+        vels = np.asarray(vels, dtype=float)
+        win_starts = np.asarray(win_starts, dtype=int)
+        win_ends = np.asarray(win_ends, dtype=int)
+        peak_thresh = np.empty(len(win_starts))
+        onset_thresh = np.empty(len(win_starts))
+        # batch windows of similar length to keep the padding small
+        order = np.argsort(win_ends - win_starts, kind='stable')
+        for b in range(0, len(order), batchsize):
+            batch = order[b:b + batchsize]
+            peak_thresh[batch], onset_thresh[batch] = \
+                self._get_adaptive_velthresh_rows(
+                    vels, win_starts[batch], win_ends[batch])
+        return peak_thresh, onset_thresh
+
+    def _get_adaptive_velthresh_rows(self, vels, win_starts, win_ends):
+        width = max(int((win_ends - win_starts).max(initial=0)), 1)
+        offsets = np.arange(width)
+        idx = win_starts[:, None] + offsets
+        in_window = idx < win_ends[:, None]
+        # NaN never passes the `vels < cut` test, so padding with NaN does
+        # not change the selected velocities; sorting moves it to the end
+        rows = np.sort(
+            np.where(in_window, vels[np.minimum(idx, len(vels) - 1)], np.nan),
+            axis=1)
+
+        def _median(rows, counts):
+            # median of the first `counts` values of each sorted row, like
+            # `np.median`
+            row_idx = np.arange(len(rows))
+            lo = rows[row_idx, np.maximum((counts - 1) // 2, 0)]
+            hi = rows[row_idx, np.maximum(counts // 2, 0)]
+            med = np.where(counts % 2, lo, (lo + hi) / 2)
+            return np.where(counts > 0, med, np.nan)
+
+        def _get_thresh(rows, cut):
+            # row-wise version of the helper in
+            # get_adaptive_saccade_velocity_velthresh()
+            counts = (rows < cut[:, None]).sum(axis=1)
+            med = _median(rows, counts)
+            err = np.where(
+                offsets < counts[:, None],
+                np.abs(rows - med[:, None]) / _MAD_NORMALIZATION,
+                np.nan)
+            scale = _median(np.sort(err, axis=1), counts)
+            return med + 2 * self.noise_factor * scale, med, scale
+
+        cur_thresh = np.full(len(rows), float(self.velthresh_startvel))
+        med = np.full(len(rows), np.nan)
+        scale = np.full(len(rows), np.nan)
+        # re-compute threshold until value converges, `active` marks the
+        # windows that are still iterating
+        active = np.ones(len(rows), dtype=bool)
+        count = 0
+        while active.any() and count < 30:  # less than 1deg/s difference
+            old_thresh = cur_thresh[active]
+            new_thresh, new_med, new_scale = _get_thresh(
+                rows[active], old_thresh)
+            med[active] = new_med
+            scale[active] = new_scale
+            # safe-guard in case threshold runs to zero in
+            # case of really clean and sparse data
+            zero = new_thresh == 0
+            new_thresh[zero] = old_thresh[zero]
+            cur_thresh[active] = new_thresh
+            converged = zero | ~(np.abs(old_thresh - new_thresh) > 1)
+            active[np.flatnonzero(active)[converged]] = False
+            count += 1
+
+        return cur_thresh, (med + self.noise_factor * scale)
+
     def _mk_event_record(self, data, idx, label, start, end):
         if start != end:
             return dict(zip(self.record_field_names, (
@@ -379,6 +530,8 @@ class EyegazeClassifier(object):
                 data[start]['vel'])))
 
     def __call__(self, data, classify_isp=True, sort_events=True):
+        self._nan_free_segments = (data, get_nan_free_segments(data['x']))
+
         # find threshold velocities
         sac_peak_med_velthresh, sac_onset_med_velthresh = \
             self.get_adaptive_saccade_velocity_velthresh(data['med_vel'])
@@ -414,27 +567,33 @@ class EyegazeClassifier(object):
 
         # make timing info absolute times, not samples and filter out all events which are due to missing data, mark
         # these as noise
+        time_rem = np.asarray(data['time_rem'])
+        # sorted sample positions that are followed by a gap of more than
+        # 0.1s, each event is split at the first gap within it
+        time_ns = time_rem.astype('datetime64[ns]').astype(np.int64)
+        gaps = np.flatnonzero(np.diff(time_ns) / 1e9 > 0.1)
         for e in events:
-            for index in range(e['start_time'], e['end_time']):
-                if index < len(data) - 1:
-                    if (data['time_rem'][index + 1] - data['time_rem'][index]).item() / 1e9 > 0.1:
-                        if e['end_time'] - e['start_time'] > 1:
-                            missing_data_event = self._mk_event_record(data, None, "MISSING", index, index+1)
-                            events.append(missing_data_event)
-                            if e['end_time'] > index + 1:
-                                new_event = self._mk_event_record(data, None, e['label'], index+1, e['end_time'])
-                                events.append(new_event)
-                            e['end_time'] = index
-                            break
-                        elif e['end_time'] - e['start_time'] == 1:
-                            e['label'] = "MISSING"
-                            break
+            first_gap = np.searchsorted(gaps, e['start_time'])
+            if first_gap < len(gaps) and gaps[first_gap] < e['end_time']:
+                index = int(gaps[first_gap])
+                if e['end_time'] - e['start_time'] > 1:
+                    missing_data_event = self._mk_event_record(data, None, "MISSING", index, index+1)
+                    events.append(missing_data_event)
+                    if e['end_time'] > index + 1:
+                        new_event = self._mk_event_record(data, None, e['label'], index+1, e['end_time'])
+                        events.append(new_event)
+                    e['end_time'] = index
+                elif e['end_time'] - e['start_time'] == 1:
+                    e['label'] = "MISSING"
             for i in ('start_time', 'end_time'):
                 # e[i] = e[i] / self.sr
-                if e[i] < len(data['time_rem']):
-                    e[i] = data['time_rem'][e[i]]
+                if e[i] < len(time_rem):
+                    e[i] = time_rem[e[i]]
                 else:
-                    e[i] = data['time_rem'][-1]
+                    e[i] = time_rem[-1]
+
+        # do not keep the data alive when the classifier is reused
+        self._nan_free_segments = None
 
         return sorted(events, key=lambda x: x['start_time']) \
             if sort_events else events
@@ -470,33 +629,45 @@ class EyegazeClassifier(object):
         # assigned to so far
         status = np.zeros((len(data),), dtype=int)
 
-        # loop over all peaks sorted by the sum of their velocities
+        # fields that are needed for every candidate, as plain arrays
+        vels = np.asarray(data['vel'])
+        xs = np.asarray(data['x'])
+        time_ns = np.asarray(data['time_rem']).astype(
+            'datetime64[ns]').astype(np.int64)
+
+        # all peaks sorted by the sum of their velocities
         # i.e. longer and faster goes first
-        for i, props in enumerate(sorted(
-                candidate_locs, key=lambda x: x[2].sum(), reverse=True)):
+        candidate_locs = sorted(
+            candidate_locs, key=lambda x: x[2].sum(), reverse=True)
+
+        if context:
+            # extract velocity data in the vicinity of each peak to
+            # calibrate thresholds, the windows only depend on the
+            # candidate peaks, so all thresholds are computed upfront
+            sacc_starts = np.array(
+                [c[0] for c in candidate_locs], dtype=int)
+            sacc_ends = np.array(
+                [c[1] for c in candidate_locs], dtype=int)
+            win_starts = np.maximum(start, sacc_starts - int(context / 2))
+            win_ends = np.minimum(
+                end, sacc_ends + context - (sacc_starts - win_starts))
+            context_velthresh = zip(
+                *self.get_adaptive_saccade_velocity_velthresh_batch(
+                    vels, win_starts, win_ends))
+
+        # loop over all peaks in that order
+        for i, props in enumerate(candidate_locs):
             sacc_start, sacc_end, peakvels = props
             lgr.info(
                 'Process peak velocity window [%i, %i] at ~%.1f deg/s',
                 sacc_start, sacc_end, peakvels.mean())
 
             if context:
-                # extract velocity data in the vicinity of the peak to
-                # calibrate threshold
-                win_start = max(
-                    start,
-                    sacc_start - int(context / 2))
-                win_end = min(
-                    end,
-                    sacc_end + context - (sacc_start - win_start))
-                lgr.debug(
-                    'Determine velocity thresholds in context window '
-                    '[%i, %i]', win_start, win_end)
                 lgr.debug('Actual context window: [%i, %i] -> %i',
-                          win_start, win_end, win_end - win_start)
-
+                          win_starts[i], win_ends[i],
+                          win_ends[i] - win_starts[i])
                 sac_peak_velthresh, sac_onset_velthresh = \
-                    self.get_adaptive_saccade_velocity_velthresh(
-                        data['vel'][win_start:win_end])
+                    next(context_velthresh)
 
             lgr.info('Active saccade velocity thresholds: '
                      '%.1f, %.1f (onset, peak)',
@@ -504,18 +675,17 @@ class EyegazeClassifier(object):
 
             # move backwards in time to find the saccade onset
             sacc_start = find_movement_onsetidx(
-                data['vel'], sacc_start, sac_onset_velthresh)
+                vels, sacc_start, sac_onset_velthresh)
 
             # move forward in time to find the saccade offset
             sacc_end = find_movement_offsetidx(
-                data['vel'], sacc_end, sac_onset_velthresh)
+                vels, sacc_end, sac_onset_velthresh)
 
-            sacc_data = data[sacc_start:sacc_end]
             # if sacc_end - sacc_start < self.min_sac_dur:
-            if (data['time_rem'][sacc_end] - data['time_rem'][sacc_start]).item() / 1e9 < self.min_sac_dur / self.sr:
+            if (time_ns[sacc_end] - time_ns[sacc_start]) / 1e9 < self.min_sac_dur / self.sr:
                 lgr.debug('Skip saccade candidate, too short')
                 continue
-            elif np.sum(np.isnan(sacc_data['x'])):  # pragma: no cover
+            elif np.sum(np.isnan(xs[sacc_start:sacc_end])):  # pragma: no cover
                 # should not happen
                 lgr.debug('Skip saccade candidate, missing data')
                 continue
@@ -537,7 +707,7 @@ class EyegazeClassifier(object):
             status[sacc_start:sacc_end] = 1
 
             pso = find_psoend(
-                data['vel'][sacc_end:sacc_end + self.max_pso_dur],
+                vels[sacc_end:sacc_end + self.max_pso_dur],
                 sac_onset_velthresh,
                 sac_peak_velthresh)
             if pso:
@@ -638,22 +808,22 @@ class EyegazeClassifier(object):
             saccade_detection):
         lgr.info('Determine NaN-free intervals in [%i:%i] (%i)',
                  start, end, end - start)
-        # split the ISP up into its non-NaN pieces:
-        win_start = None
-        for idx in range(start, end + 1):
-            if win_start is None and \
-                    idx < len(data) and not np.isnan(data['x'][idx]):
-                win_start = idx
-            elif win_start is not None and \
-                    ((idx == end) or np.isnan(data['x'][idx])):
-                for e in self._classify_intersaccade_period_helper(
-                        data,
-                        win_start,
-                        idx,
-                        saccade_detection):
-                    yield e
-                # reset non-NaN window start
-                win_start = None
+        # split the ISP up into its non-NaN pieces, i.e. all NaN-free
+        # segments that overlap with [start, end)
+        if self._nan_free_segments is None \
+                or self._nan_free_segments[0] is not data:
+            self._nan_free_segments = (data, get_nan_free_segments(data['x']))
+        seg_starts, seg_ends = self._nan_free_segments[1]
+        first = np.searchsorted(seg_ends, start, side='right')
+        last = np.searchsorted(seg_starts, end, side='left')
+        for seg_start, seg_end in zip(seg_starts[first:last].tolist(),
+                                      seg_ends[first:last].tolist()):
+            for e in self._classify_intersaccade_period_helper(
+                    data,
+                    max(seg_start, start),
+                    min(seg_end, end),
+                    saccade_detection):
+                yield e
 
     def _classify_intersaccade_period_helper(
             self,
@@ -860,73 +1030,90 @@ class EyegazeClassifier(object):
                 estart,
                 eend)
 
-    def _get_angle_deriv(self, data, angles):
-        delta_angles = []
-        for i in range(len(angles) - 1):
-            delta = max(angles[i], angles[i + 1]) - min(angles[i], angles[i + 1])
-            if np.pi < delta:
-                delta = 2 * np.pi - delta
-            if angles[i] > angles[i + 1]:
-                delta = -delta
-
-            if isinstance(data, pd.DataFrame):
-                delta_time = (data['time_rem'][i+1] - data['time_rem'][i]).total_seconds()
-            else:
-                delta_time = (data['time_rem'][i+1] - data['time_rem'][i]).item() / 1e9
-            delta_angles.append(delta / delta_time)
+    def _get_time_deltas(self, data):
+        """Determine the time between successive samples in seconds
 
-        return np.array(delta_angles)
+        The timestamps in `data['time_rem']` are converted to an int64
+        nanosecond array once and differenced in a vectorized fashion.
+
+        Parameters
+        ----------
+        data : DataFrame or recarray
+          Samples with a `time_rem` field.
 
-    def _calculate_median_velocity_deg(self, data, median_filter_length):
+        Returns
+        -------
+        array
+          One value less than the number of samples. For DataFrame input the
+          deltas are truncated to microseconds like `Timedelta.total_seconds()`,
+          for record arrays they have nanosecond resolution.
+        """
+        if isinstance(data, pd.DataFrame):
+            time_ns = pd.DatetimeIndex(data['time_rem']).as_unit('ns').asi8
+            delta_us = np.diff(time_ns) // 1000
+            return (delta_us // 1000000) + (delta_us % 1000000) / 1e6
+        time_ns = np.asarray(data['time_rem']).astype('datetime64[ns]').astype(np.int64)
+        return np.diff(time_ns) / 1e9
+
+    def _get_angle_deriv(self, data, angles, time_deltas=None):
+        if time_deltas is None:
+            time_deltas = self._get_time_deltas(data)
+        angles = np.asarray(angles, dtype=float)
+        start = angles[:-1]
+        end = angles[1:]
+        # max() - min() of each pair of samples, with the same NaN handling
+        # as the builtins (a NaN in second position is ignored)
+        delta = np.where(end > start, end, start) - np.where(end < start, end, start)
+        delta = np.where(np.pi < delta, 2 * np.pi - delta, delta)
+        delta = np.where(start > end, -delta, delta)
+
+        return delta / time_deltas
+
+    def _calculate_median_velocity_deg(self, data, median_filter_length, time_deltas=None):
         azimuth = median_filter(data['x'], size=median_filter_length)
         elevation = median_filter(data['y'], size=median_filter_length)
-        azimuth_deriv = self._get_angle_deriv(data, azimuth)
-        elevation_deriv = self._get_angle_deriv(data, elevation)
+        azimuth_deriv = self._get_angle_deriv(data, azimuth, time_deltas)
+        elevation_deriv = self._get_angle_deriv(data, elevation, time_deltas)
         med_velocities = ((np.cos(elevation[0:-1]) ** 2) * (azimuth_deriv ** 2) + (elevation_deriv ** 2)) ** 0.5
         return med_velocities * 180 / np.pi
 
-    def _get_velocities_deg(self, data):
-        azimuth_deriv = self._get_angle_deriv(data, data['x'])
-        elevation_deriv = self._get_angle_deriv(data, data['y'])
-        velocities = ((np.cos(data['y'][0:-1]) ** 2) * (azimuth_deriv ** 2) + (elevation_deriv ** 2)) ** 0.5
+    def _get_velocities_deg(self, data, time_deltas=None):
+        if time_deltas is None:
+            time_deltas = self._get_time_deltas(data)
+        elevation = np.asarray(data['y'], dtype=float)
+        azimuth_deriv = self._get_angle_deriv(data, data['x'], time_deltas)
+        elevation_deriv = self._get_angle_deriv(data, elevation, time_deltas)
+        velocities = ((np.cos(elevation[0:-1]) ** 2) * (azimuth_deriv ** 2) + (elevation_deriv ** 2)) ** 0.5
         return velocities * 180 / np.pi
 
-    def _get_accelerations_deg(self, data):
-        speed_azimuth = self._get_angle_deriv(data, data['x'])
-        speed_elevation = self._get_angle_deriv(data, data['y'])
+    def _get_accelerations_deg(self, data, time_deltas=None):
+        if time_deltas is None:
+            time_deltas = self._get_time_deltas(data)
+        elevation = np.asarray(data['y'], dtype=float)
+        speed_azimuth = self._get_angle_deriv(data, data['x'], time_deltas)
+        speed_elevation = self._get_angle_deriv(data, elevation, time_deltas)
         speed_azimuth = np.insert(speed_azimuth, 0, 0)
         speed_elevation = np.insert(speed_elevation, 0, 0)
 
-        acceleration_azimuth = []
-        acceleration_elevation = []
-        for i in range(len(speed_azimuth)-1):
-            delta_time = (data.index[i + 1] - data.index[i]).total_seconds()
-            acceleration_azimuth.append((speed_azimuth[i+1] - speed_azimuth[i]) / delta_time)
-            acceleration_elevation.append((speed_elevation[i+1] - speed_elevation[i]) / delta_time)
-        acceleration_azimuth_direction = acceleration_azimuth * np.cos(data['y'][0:-1]) - \
-                                         2 * speed_elevation[0:-1] * speed_azimuth[0:-1] * np.sin(data['y'][0:-1])
+        acceleration_azimuth = np.diff(speed_azimuth) / time_deltas
+        acceleration_elevation = np.diff(speed_elevation) / time_deltas
+        acceleration_azimuth_direction = acceleration_azimuth * np.cos(elevation[0:-1]) - \
+                                         2 * speed_elevation[0:-1] * speed_azimuth[0:-1] * np.sin(elevation[0:-1])
         acceleration_elevation_direction = acceleration_elevation + \
-                                           (speed_elevation[0:-1] ** 2) * np.sin(data['y'][0:-1]) * np.cos(data['y'][0:-1])
+                                           (speed_elevation[0:-1] ** 2) * np.sin(elevation[0:-1]) * np.cos(elevation[0:-1])
         acceleration = ((acceleration_azimuth_direction ** 2) + (acceleration_elevation_direction ** 2)) ** 0.5
         return acceleration * 180 / np.pi
 
-    def _get_velocities(self, data):
+    def _get_velocities(self, data, time_deltas=None):
         # euclidean distance between successive coordinate samples
         # no entry for first datapoint!
-        # velocities = (np.diff(data['x']) ** 2 + np.diff(data['y']) ** 2) ** 0.5
-        # convert from px/sample to deg/s
-        # velocities *= self.px2deg * self.sr
-        velocities = []
-        for i in range(len(data)-1):
-            amp = ((data['x'][i+1] - data['x'][i]) ** 2 + (data['y'][i+1] - data['y'][i]) ** 2) ** 0.5
-            if isinstance(data, pd.DataFrame):
-                delta_time = (data['time_rem'][i+1] - data['time_rem'][i]).total_seconds()
-            else:
-                delta_time = (data['time_rem'][i+1] - data['time_rem'][i]).item() / 1e9
-
-            velocities.append(amp / delta_time * self.px2deg)
-        return np.array(velocities)
-        # return velocities
+        # convert from px/s to deg/s
+        if time_deltas is None:
+            time_deltas = self._get_time_deltas(data)
+        x = np.asarray(data['x'], dtype=float)
+        y = np.asarray(data['y'], dtype=float)
+        amp = (np.diff(x) ** 2 + np.diff(y) ** 2) ** 0.5
+        return amp / time_deltas * self.px2deg
 
     def preproc(
             self,
@@ -987,9 +1174,15 @@ class EyegazeClassifier(object):
         # find clusters of "no data"
         if dilate_nan:
             lgr.info('Dilate NaN segments by %i samples', dilate_nan)
-            mask = get_dilated_nan_mask(
+            mask, self.nan_cluster_stats = get_dilated_nan_mask(
                 data['x'],
                 dilate_nan,
+                min_blink_duration,
+                return_stats=True)
+            lgr.info(
+                'Found %i NaN segments, %i longer than %i samples',
+                self.nan_cluster_stats['count'],
+                self.nan_cluster_stats['masked'],
                 min_blink_duration)
             data['x'][mask] = np.nan
             data['y'][mask] = np.nan
@@ -1001,12 +1194,15 @@ class EyegazeClassifier(object):
             for i in ('x', 'y'):
                 data[i] = savgol_filter(data[i], savgol_length, savgol_polyord)
 
+        # time between samples, computed once for all derivatives
+        time_deltas = self._get_time_deltas(data)
+
         # velocity calculation, exclude velocities over `max_vel`
         # no entry for first datapoint!
         if self.input_type == 'deg':
-            velocities = self._get_velocities_deg(data)
+            velocities = self._get_velocities_deg(data, time_deltas)
         elif self.input_type == 'px':
-            velocities = self._get_velocities(data)
+            velocities = self._get_velocities(data, time_deltas)
         else:
             print('Error: Choose correct input type {deg or px}')
             exit()
@@ -1017,23 +1213,13 @@ class EyegazeClassifier(object):
                 'coordinates', median_filter_length)
             med_velocities = np.zeros((len(data),), velocities.dtype)
             if self.input_type == 'deg':
-                med_velocities[1:] = self._calculate_median_velocity_deg(data, median_filter_length)
+                med_velocities[1:] = self._calculate_median_velocity_deg(
+                    data, median_filter_length, time_deltas)
             elif self.input_type == 'px':
-                """med_velocities[1:] = (
-                    np.diff(median_filter(data['x'],
-                                          size=median_filter_length)) ** 2 +
-                    np.diff(median_filter(data['y'],
-                                          size=median_filter_length)) ** 2) ** 0.5
-                # convert from px/sample to deg/s
-                med_velocities *= self.px2deg * self.sr"""
-                data_x_med = median_filter(data['x'], size=median_filter_length)
-                data_y_med = median_filter(data['y'], size=median_filter_length)
-                med_velocities_temp = []
-                for i in range(len(data) - 1):
-                    amp = ((data_x_med[i + 1] - data_x_med[i]) ** 2 + (data_y_med[i + 1] - data_y_med[i]) ** 2) ** 0.5
-                    delta_time = (data.index[i + 1] - data.index[i]).total_seconds()
-                    med_velocities_temp.append(amp / delta_time * self.px2deg)
-                med_velocities[1:] = med_velocities_temp
+                med_velocities[1:] = self._get_velocities(
+                    {'x': median_filter(data['x'], size=median_filter_length),
+                     'y': median_filter(data['y'], size=median_filter_length)},
+                    time_deltas)
             else:
                 print('Error: Choose correct input type {deg or px}')
                 exit()
@@ -1061,15 +1247,9 @@ class EyegazeClassifier(object):
         # acceleration is change of velocities over the last time unit
         acceleration = np.zeros(velocities.shape, velocities.dtype)
         if self.input_type == 'deg':
-            acceleration[1:] = self._get_accelerations_deg(data)
+            acceleration[1:] = self._get_accelerations_deg(data, time_deltas)
         elif self.input_type == 'px':
-            acceleration_temp = []
-            for i in range(len(velocities) - 1):
-                amp = velocities[i+1] - velocities[i]
-                delta_time = (data.index[i + 1] - data.index[i]).total_seconds()
-                acceleration_temp.append(amp / delta_time)
-            # acceleration[1:] = (velocities[1:] - velocities[:-1]) * self.sr
-            acceleration[1:] = acceleration_temp
+            acceleration[1:] = np.diff(velocities) / time_deltas
         else:
             print('Error: Choose correct input type {deg or px}')
             exit()
@@ -0,0 +1,123 @@
+# emacs: -*- mode: python; py-indent-offset: 4; tab-width: 4; indent-tabs-mode: nil -*-
+# -*- coding: utf-8 -*-
+# ex: set sts=4 ts=4 sw=4 noet:
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+#
+#   See COPYING file distributed along with the remodnavlad package for the
+#   copyright and license terms.
+#
+# ## ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ### ##
+"""Sample-wise scan kernels used during preprocessing
+
+Both kernels are sequential scans: the spike filter compares each sample with
+its already filtered predecessor and the velocity clamp carries forward the
+last accepted velocity. If numba is installed the plain loops are compiled,
+otherwise equivalent NumPy implementations are used.
+"""
+import numpy as np
+
+import logging
+lgr = logging.getLogger('remodnav.kernels')
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+
+def _spike_filter_loop(arr):
+    # over all triples of neighboring samples
+    arr = arr.copy()
+    for i in range(1, len(arr) - 1):
+        if (arr[i - 1] < arr[i] and arr[i] > arr[i + 1]) \
+                or (arr[i - 1] > arr[i] and arr[i] < arr[i + 1]):
+            # immediate sign-reversal of the difference from
+            # x-1 -> x -> x+1
+            prev_dist = abs(arr[i - 1] - arr[i])
+            next_dist = abs(arr[i + 1] - arr[i])
+            # replace x by the neighboring value that is closest
+            # in value
+            arr[i] = arr[i - 1] \
+                if prev_dist < next_dist else arr[i + 1]
+    return arr
+
+
+def _filter_triples(prev, cur, nxt):
+    # vectorized body of `_spike_filter_loop` for given predecessors
+    spike = ((prev < cur) & (cur > nxt)) | ((prev > cur) & (cur < nxt))
+    closest = np.where(np.abs(prev - cur) < np.abs(nxt - cur), prev, nxt)
+    return np.where(spike, closest, cur)
+
+
+def _spike_filter_numpy(arr):
+    arr = np.array(arr)
+    if len(arr) < 3:
+        return arr
+    cur = arr[1:-1]
+    nxt = arr[2:]
+    # first pass with the unfiltered predecessors, this is exact for every
+    # sample whose predecessor is left unchanged
+    filtered = _filter_triples(arr[:-2], cur, nxt)
+    # propagate replaced values to their successors until nothing changes,
+    # the number of passes is the length of the longest chain of replacements
+    todo = np.flatnonzero(filtered[:-1] != cur[:-1])
+    while len(todo):
+        idx = todo + 1
+        new = _filter_triples(filtered[todo], cur[idx], nxt[idx])
+        changed = (new != filtered[idx]) & \
+            ~(np.isnan(new) & np.isnan(filtered[idx]))
+        filtered[idx] = new
+        todo = idx[changed & (idx < len(filtered) - 1)]
+    arr[1:-1] = filtered
+    return arr
+
+
+def _clamp_velocities_loop(velocities, max_vel):
+    # add missing first datapoint
+    clamped = np.empty(len(velocities) + 1)
+    clamped[0] = 0.0
+    for i in range(len(velocities)):
+        vel = velocities[i]
+        if vel > max_vel:
+            # ignore very fast velocities
+            vel = clamped[i]
+        clamped[i + 1] = vel
+    return clamped
+
+
+def _clamp_velocities_numpy(velocities, max_vel):
+    # add missing first datapoint
+    clamped = np.concatenate(([0.0], velocities))
+    # index of the last accepted velocity at or before each sample
+    accepted = np.ones(len(clamped), dtype=bool)
+    accepted[1:] = ~(velocities > max_vel)
+    source = np.where(accepted, np.arange(len(clamped)), 0)
+    np.maximum.accumulate(source, out=source)
+    return clamped[source]
+
+
+if numba is not None:
+    lgr.debug('Using numba compiled preprocessing kernels')
+    _spike_filter = numba.njit(cache=True)(_spike_filter_loop)
+    _clamp_velocities = numba.njit(cache=True)(_clamp_velocities_loop)
+else:
+    _spike_filter = _spike_filter_numpy
+    _clamp_velocities = _clamp_velocities_numpy
+
+
+def spike_filter(arr):
+    """Three-point sign-reversal spike filter on a 1D array
+
+    Returns a filtered copy, the input is not modified.
+    """
+    return _spike_filter(np.ascontiguousarray(arr, dtype=float))
+
+
+def clamp_velocities(velocities, max_vel):
+    """Replace velocities above `max_vel` with the previous velocity
+
+    Returns an array that is one element longer than `velocities`, starting
+    with a velocity of zero for the first sample.
+    """
+    return _clamp_velocities(
+        np.ascontiguousarray(velocities, dtype=float), float(max_vel))
@@ -66,14 +66,122 @@ help = {
 }
 
 
-def remodnav(data, args):
+class RemodnavParams(object):
+    """Parameters of a REMODNAV run
+
+    Holds the arguments of `EyegazeClassifier` and its `preproc()` method,
+    with the same defaults, plus the plotting options of the command line
+    interface. The log level is applied with `configure_logging()`, which the
+    `remodnav()` command line adapter calls. The classifier is built once per
+    parameter object and reused by every `classify()` call.
+    """
+
+    classifier_args = (
+        'px2deg', 'sampling_rate', 'velthresh_startvelocity',
+        'min_intersaccade_duration', 'min_saccade_duration',
+        'min_pursuit_duration', 'pursuit_velthresh',
+        'max_initial_saccade_freq', 'saccade_context_window_length',
+        'max_pso_duration', 'min_fixation_duration', 'lowpass_cutoff_freq',
+        'noise_factor', 'input_type')
+    preproc_args = (
+        'min_blink_duration', 'dilate_nan', 'median_filter_length',
+        'savgol_length', 'savgol_polyord', 'max_vel')
+
+    def __init__(
+        self,
+        px2deg: float,
+        sampling_rate: float,
+        input_type: str,
+        outfile: str = '',
+        plot_figure: bool = False,
+        log_level: str = 'warn',
+        pursuit_velthresh: float = 2.0,
+        noise_factor: float = 5.0,
+        velthresh_startvelocity: float = 300.0,
+        min_intersaccade_duration: float = 0.04,
+        min_saccade_duration: float = 0.01,
+        max_initial_saccade_freq: float = 2.0,
+        saccade_context_window_length: float = 1.0,
+        max_pso_duration: float = 0.04,
+        min_fixation_duration: float = 0.04,
+        min_pursuit_duration: float = 0.04,
+        lowpass_cutoff_freq: float = 4.0,
+        min_blink_duration: float = 0.02,
+        dilate_nan: float = 0.01,
+        median_filter_length: float = 0.05,
+        savgol_length: float = 0.019,
+        savgol_polyord: int = 2,
+        max_vel: float = 1000.0
+    ) -> None:
+        self.px2deg = px2deg
+        self.sampling_rate = sampling_rate
+        self.input_type = input_type
+        self.outfile = outfile
+        self.plot_figure = plot_figure
+        self.log_level = log_level
+        self.pursuit_velthresh = pursuit_velthresh
+        self.noise_factor = noise_factor
+        self.velthresh_startvelocity = velthresh_startvelocity
+        self.min_intersaccade_duration = min_intersaccade_duration
+        self.min_saccade_duration = min_saccade_duration
+        self.max_initial_saccade_freq = max_initial_saccade_freq
+        self.saccade_context_window_length = saccade_context_window_length
+        self.max_pso_duration = max_pso_duration
+        self.min_fixation_duration = min_fixation_duration
+        self.min_pursuit_duration = min_pursuit_duration
+        self.lowpass_cutoff_freq = lowpass_cutoff_freq
+        self.min_blink_duration = min_blink_duration
+        self.dilate_nan = dilate_nan
+        self.median_filter_length = median_filter_length
+        self.savgol_length = savgol_length
+        self.savgol_polyord = savgol_polyord
+        self.max_vel = max_vel
+        self._classifier = None
+
+    @classmethod
+    def from_args(cls, args):
+        """Create parameters from a command line, e.g. `remodnav_args` of
+        the processing config (the first element is the program name)"""
+        args = get_parser().parse_args(args[1:])
+        return cls(
+            outfile=args.outfile,
+            plot_figure=args.plot_figure == 'True',
+            log_level=args.log_level,
+            **{k: getattr(args, k)
+               for k in cls.classifier_args + cls.preproc_args})
+
+    def get_classifier(self):
+        if self._classifier is None:
+            self._classifier = EyegazeClassifier(
+                **{k: getattr(self, k) for k in self.classifier_args})
+        return self._classifier
+
+    def __getstate__(self):
+        # the classifier is rebuilt where the parameters are unpickled
+        state = self.__dict__.copy()
+        state['_classifier'] = None
+        return state
+
+
+_parser = None
+
+
+def get_parser():
+    # the parser is only built once, the defaults are taken from
+    # RemodnavParams
+    global _parser
+    if _parser is not None:
+        return _parser
+
     import argparse
     import inspect
-    kwargs = {}
-    for func in (EyegazeClassifier.__init__, EyegazeClassifier.preproc):
-        # pull kwargs and their defaults out of the function definitions
-        argspec = inspect.getfullargspec(func)
-        kwargs.update(zip(argspec.args[::-1], argspec.defaults[::-1]))
+    kwargs = {
+        name: param.default
+        for name, param in inspect.signature(
+            RemodnavParams.__init__).parameters.items()
+        if name in RemodnavParams.classifier_args +
+        RemodnavParams.preproc_args and
+        param.default is not inspect.Parameter.empty}
 
     parser = argparse.ArgumentParser(
         prog='remodnav',
@@ -118,23 +226,26 @@ def remodnav(data, args):
             default=default,
             help=help[argname] + ' [default: {}]'.format(default))
 
-    args = parser.parse_args(args[1:])
+    _parser = parser
+    return parser
 
-    logging.basicConfig(
-        format='%(levelname)s:%(message)s',
-        level=getattr(logging, args.log_level.upper()))
 
-    # lgr.info('Read %i samples', len(data))
+def classify(data, params):
+    """Filter gaze data and detect eye movement events
 
-    clf = EyegazeClassifier(
-        **{k: getattr(args, k) for k in (
-            'px2deg', 'sampling_rate', 'velthresh_startvelocity',
-            'min_intersaccade_duration', 'min_saccade_duration',
-            'min_pursuit_duration', 'pursuit_velthresh',
-            'max_initial_saccade_freq', 'saccade_context_window_length',
-            'max_pso_duration', 'min_fixation_duration', 'lowpass_cutoff_freq',
-            'noise_factor', 'input_type')}
-    )
+    Parameters
+    ----------
+    data : DataFrame
+      Samples with `azimuth` and `elevation` columns, indexed by time.
+    params : RemodnavParams
+      The classifier of these parameters is reused across calls.
+
+    Returns
+    -------
+    tuple
+      (filtered data, DataFrame of events indexed by their start time)
+    """
+    clf = params.get_classifier()
 
     # Add specifically named rows for remodnav algorithm
     data['time_rem'] = data.index
@@ -144,9 +255,7 @@ def remodnav(data, args):
 
     data, pp = clf.preproc(
         data,
-        **{k: getattr(args, k) for k in (
-            'min_blink_duration', 'dilate_nan', 'median_filter_length',
-            'savgol_length', 'savgol_polyord', 'max_vel')}
+        **{k: getattr(params, k) for k in params.preproc_args}
     )
 
     # Assign the filtered x, y data to the azimuth and elevation angle
@@ -161,9 +270,9 @@ def remodnav(data, args):
     data_events.index = pd.to_datetime(data_events['start_time'])
     data_events.index = data_events.index.tz_localize(pytz.utc).tz_convert(pytz.timezone('CET'))
 
-    # events2bids_events_tsv(events, args.outfile)
+    # events2bids_events_tsv(events, params.outfile)
 
-    if args.plot_figure == 'True':
+    if params.plot_figure:
         import matplotlib
         matplotlib.use('agg')
         import matplotlib.pyplot as pl
@@ -180,7 +289,7 @@ def remodnav(data, args):
         pp['y'] = pp['y'] * 180 / np.pi
 
         # one inch per second, or as big as PNG software/browsers can handle
-        duration = float(len(data)) / args.sampling_rate
+        duration = float(len(data)) / params.sampling_rate
         pl.figure(figsize=(min(duration, 400), 3), dpi=100)
         clf.show_gaze(data=data, pp=pp, events=events, show_vels=True)
         dt_fmt = DateFormatter("%H:%M:%S", tz=data.index.tz)
@@ -190,7 +299,7 @@ def remodnav(data, args):
         pl.tick_params(labelrotation=45)
         pl.title('Detected eye movement events, parameters: {}'.format(
             ', '.join([
-                '{}={}'.format(k, getattr(args, k))
+                '{}={}'.format(k, getattr(params, k))
                 for k in sorted((
                     'px2deg', 'sampling_rate', 'velthresh_startvelocity',
                     'min_intersaccade_duration', 'min_saccade_duration',
@@ -203,15 +312,15 @@ def remodnav(data, args):
             ])
         ))
         pl.ylim((-50, 200))
-        if args.input_type == 'deg':
+        if params.input_type == 'deg':
             pl.ylabel('angles (azimuth and elevation)')
-        elif args.input_type == 'px':
+        elif params.input_type == 'px':
             pl.ylabel('coordinates (pixel)')
         pl.xlabel('time')
         pl.savefig(
             '{}.png'.format(
-                args.outfile[:-4] if args.outfile.endswith('.tsv')
-                else args.outfile),
+                params.outfile[:-4] if params.outfile.endswith('.tsv')
+                else params.outfile),
             bbox_inches='tight', format='png', dpi=100)
 
     # Drop columns that were only created for remodnav algorithm
@@ -219,6 +328,24 @@ def remodnav(data, args):
 
     return data, data_events
 
+
+def configure_logging(params):
+    # apply the log level of the parameters, once per process
+    logging.basicConfig(
+        format='%(levelname)s:%(message)s',
+        level=getattr(logging, params.log_level.upper()))
+
+
+def remodnav(data, args):
+    # command line adapter, `args` as given to the remodnav program
+    params = RemodnavParams.from_args(args)
+
+    configure_logging(params)
+
+    # lgr.info('Read %i samples', len(data))
+
+    return classify(data, params)
+
     # import pandas as pd
     # events = pd.DataFrame(events)
     #
@@ -0,0 +1,74 @@
+import time
+import numpy as np
+from . import utils as ut
+from .. import kernels as k
+
+
+def _get_samples(size):
+    samp = np.cumsum(np.random.randn(size))
+    samp[np.random.rand(size) < 0.01] = np.nan
+    # plateaus and runs of identical samples
+    samp[100:110] = samp[100]
+    return samp
+
+
+def test_spike_filter():
+    for samp in (
+            _get_samples(10000),
+            ut.mk_gaze_sample(),
+            np.array([0.0, 1.0, 0.0, 1.0, 0.0, 1.0, 0.0]),
+            np.array([0.0, 1.0]),
+            np.array([])):
+        orig = samp.copy()
+        expected = k._spike_filter_loop(samp)
+        for f in (k._spike_filter_numpy, k.spike_filter):
+            filtered = f(samp)
+            assert np.array_equal(filtered, expected, equal_nan=True)
+        # the input does not change
+        assert np.array_equal(samp, orig, equal_nan=True)
+
+
+def test_clamp_velocities():
+    vels = np.abs(np.random.randn(10000)) * 500
+    vels[np.random.rand(len(vels)) < 0.01] = np.nan
+    # leading velocities above the threshold fall back to zero
+    vels[:3] = 2000
+    expected = k._clamp_velocities_loop(vels, 1000.0)
+    assert len(expected) == len(vels) + 1
+    assert np.all(expected[:4] == 0)
+    for f in (k._clamp_velocities_numpy, k.clamp_velocities):
+        assert np.array_equal(f(vels, 1000.0), expected, equal_nan=True)
+
+
+def _cost_per_million(f, *args):
+    f(*args)
+    start = time.perf_counter()
+    f(*args)
+    return (time.perf_counter() - start) * 1e6 / len(args[0])
+
+
+def test_kernel_benchmark():
+    # per-million-sample cost of the kernels, run with `pytest -s` to see
+    # the report
+    samp = _get_samples(1000000)
+    vels = np.abs(np.diff(samp)) * 50
+    loop_samp = samp[:100000]
+    loop_vels = vels[:100000]
+    report = [
+        ('spike filter (python loop)', _cost_per_million(
+            k._spike_filter_loop, loop_samp)),
+        ('spike filter (numpy)', _cost_per_million(
+            k._spike_filter_numpy, samp)),
+        ('spike filter (selected)', _cost_per_million(
+            k.spike_filter, samp)),
+        ('velocity clamp (python loop)', _cost_per_million(
+            k._clamp_velocities_loop, loop_vels, 1000.0)),
+        ('velocity clamp (numpy)', _cost_per_million(
+            k._clamp_velocities_numpy, vels, 1000.0)),
+        ('velocity clamp (selected)', _cost_per_million(
+            k.clamp_velocities, vels, 1000.0)),
+    ]
+    print('\nnumba available: {}'.format(k.numba is not None))
+    for name, cost in report:
+        print('{:<30} {:10.4f} s per million samples'.format(name, cost))
+    assert report[1][1] < report[0][1]
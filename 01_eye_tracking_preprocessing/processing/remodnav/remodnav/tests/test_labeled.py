@@ -1,6 +1,9 @@
 import pytest
 import numpy as np
 import os.path as op
+import pandas as pd
+from . import utils as ut
+from .. import clf
 
 
 def load_data(category, name, basepath=None):
@@ -79,78 +82,79 @@ def load_data(category, name, basepath=None):
     return data, labels, events, px2deg, sr
 
 
-@pytest.mark.parametrize(
-    'name',
-    [
-        ('dots', 'TH20_trial1_labelled_MN.mat'),
-        ('dots', 'TH20_trial1_labelled_RA.mat'),
-        ('dots', 'TH38_trial1_labelled_MN.mat'),
-        ('dots', 'TH38_trial1_labelled_RA.mat'),
-        ('dots', 'TL22_trial17_labelled_MN.mat'),
-        ('dots', 'TL22_trial17_labelled_RA.mat'),
-        ('dots', 'TL24_trial17_labelled_MN.mat'),
-        ('dots', 'TL24_trial17_labelled_RA.mat'),
-        ('dots', 'UH21_trial17_labelled_MN.mat'),
-        ('dots', 'UH21_trial17_labelled_RA.mat'),
-        ('dots', 'UH21_trial1_labelled_MN.mat'),
-        ('dots', 'UH21_trial1_labelled_RA.mat'),
-        ('dots', 'UH25_trial1_labelled_MN.mat'),
-        ('dots', 'UH25_trial1_labelled_RA.mat'),
-        ('dots', 'UH33_trial17_labelled_MN.mat'),
-        ('dots', 'UH33_trial17_labelled_RA.mat'),
-        ('dots', 'UL27_trial17_labelled_MN.mat'),
-        ('dots', 'UL27_trial17_labelled_RA.mat'),
-        ('dots', 'UL31_trial1_labelled_MN.mat'),
-        ('dots', 'UL31_trial1_labelled_RA.mat'),
-        ('dots', 'UL39_trial1_labelled_MN.mat'),
-        ('dots', 'UL39_trial1_labelled_RA.mat'),
-        ('img', 'TH34_img_Europe_labelled_MN.mat'),
-        ('img', 'TH34_img_Europe_labelled_RA.mat'),
-        ('img', 'TH34_img_vy_labelled_MN.mat'),
-        ('img', 'TH34_img_vy_labelled_RA.mat'),
-        ('img', 'TL20_img_konijntjes_labelled_MN.mat'),
-        ('img', 'TL20_img_konijntjes_labelled_RA.mat'),
-        ('img', 'TL28_img_konijntjes_labelled_MN.mat'),
-        ('img', 'TL28_img_konijntjes_labelled_RA.mat'),
-        ('img', 'UH21_img_Rome_labelled_MN.mat'),
-        ('img', 'UH21_img_Rome_labelled_RA.mat'),
-        ('img', 'UH27_img_vy_labelled_MN.mat'),
-        ('img', 'UH27_img_vy_labelled_RA.mat'),
-        ('img', 'UH29_img_Europe_labelled_MN.mat'),
-        ('img', 'UH29_img_Europe_labelled_RA.mat'),
-        ('img', 'UH33_img_vy_labelled_MN.mat'),
-        ('img', 'UH33_img_vy_labelled_RA.mat'),
-        ('img', 'UH47_img_Europe_labelled_MN.mat'),
-        ('img', 'UH47_img_Europe_labelled_RA.mat'),
-        ('img', 'UL23_img_Europe_labelled_MN.mat'),
-        ('img', 'UL23_img_Europe_labelled_RA.mat'),
-        ('img', 'UL31_img_konijntjes_labelled_MN.mat'),
-        ('img', 'UL31_img_konijntjes_labelled_RA.mat'),
-        ('img', 'UL39_img_konijntjes_labelled_MN.mat'),
-        ('img', 'UL39_img_konijntjes_labelled_RA.mat'),
-        ('img', 'UL43_img_Rome_labelled_MN.mat'),
-        ('img', 'UL43_img_Rome_labelled_RA.mat'),
-        ('img', 'UL47_img_konijntjes_labelled_MN.mat'),
-        ('img', 'UL47_img_konijntjes_labelled_RA.mat'),
-        ('video', 'TH34_video_BergoDalbana_labelled_MN.mat'),
-        ('video', 'TH34_video_BergoDalbana_labelled_RA.mat'),
-        ('video', 'TH38_video_dolphin_fov_labelled_MN.mat'),
-        ('video', 'TH38_video_dolphin_fov_labelled_RA.mat'),
-        ('video', 'TL30_video_triple_jump_labelled_MN.mat'),
-        ('video', 'TL30_video_triple_jump_labelled_RA.mat'),
-        ('video', 'UH21_video_BergoDalbana_labelled_MN.mat'),
-        ('video', 'UH21_video_BergoDalbana_labelled_RA.mat'),
-        ('video', 'UH29_video_dolphin_fov_labelled_MN.mat'),
-        ('video', 'UH29_video_dolphin_fov_labelled_RA.mat'),
-        ('video', 'UH47_video_BergoDalbana_labelled_MN.mat'),
-        ('video', 'UH47_video_BergoDalbana_labelled_RA.mat'),
-        ('video', 'UL23_video_triple_jump_labelled_MN.mat'),
-        ('video', 'UL23_video_triple_jump_labelled_RA.mat'),
-        ('video', 'UL27_video_triple_jump_labelled_MN.mat'),
-        ('video', 'UL27_video_triple_jump_labelled_RA.mat'),
-        ('video', 'UL31_video_triple_jump_labelled_MN.mat'),
-        ('video', 'UL31_video_triple_jump_labelled_RA.mat'),
-    ])
+labeled_files = [
+    ('dots', 'TH20_trial1_labelled_MN.mat'),
+    ('dots', 'TH20_trial1_labelled_RA.mat'),
+    ('dots', 'TH38_trial1_labelled_MN.mat'),
+    ('dots', 'TH38_trial1_labelled_RA.mat'),
+    ('dots', 'TL22_trial17_labelled_MN.mat'),
+    ('dots', 'TL22_trial17_labelled_RA.mat'),
+    ('dots', 'TL24_trial17_labelled_MN.mat'),
+    ('dots', 'TL24_trial17_labelled_RA.mat'),
+    ('dots', 'UH21_trial17_labelled_MN.mat'),
+    ('dots', 'UH21_trial17_labelled_RA.mat'),
+    ('dots', 'UH21_trial1_labelled_MN.mat'),
+    ('dots', 'UH21_trial1_labelled_RA.mat'),
+    ('dots', 'UH25_trial1_labelled_MN.mat'),
+    ('dots', 'UH25_trial1_labelled_RA.mat'),
+    ('dots', 'UH33_trial17_labelled_MN.mat'),
+    ('dots', 'UH33_trial17_labelled_RA.mat'),
+    ('dots', 'UL27_trial17_labelled_MN.mat'),
+    ('dots', 'UL27_trial17_labelled_RA.mat'),
+    ('dots', 'UL31_trial1_labelled_MN.mat'),
+    ('dots', 'UL31_trial1_labelled_RA.mat'),
+    ('dots', 'UL39_trial1_labelled_MN.mat'),
+    ('dots', 'UL39_trial1_labelled_RA.mat'),
+    ('img', 'TH34_img_Europe_labelled_MN.mat'),
+    ('img', 'TH34_img_Europe_labelled_RA.mat'),
+    ('img', 'TH34_img_vy_labelled_MN.mat'),
+    ('img', 'TH34_img_vy_labelled_RA.mat'),
+    ('img', 'TL20_img_konijntjes_labelled_MN.mat'),
+    ('img', 'TL20_img_konijntjes_labelled_RA.mat'),
+    ('img', 'TL28_img_konijntjes_labelled_MN.mat'),
+    ('img', 'TL28_img_konijntjes_labelled_RA.mat'),
+    ('img', 'UH21_img_Rome_labelled_MN.mat'),
+    ('img', 'UH21_img_Rome_labelled_RA.mat'),
+    ('img', 'UH27_img_vy_labelled_MN.mat'),
+    ('img', 'UH27_img_vy_labelled_RA.mat'),
+    ('img', 'UH29_img_Europe_labelled_MN.mat'),
+    ('img', 'UH29_img_Europe_labelled_RA.mat'),
+    ('img', 'UH33_img_vy_labelled_MN.mat'),
+    ('img', 'UH33_img_vy_labelled_RA.mat'),
+    ('img', 'UH47_img_Europe_labelled_MN.mat'),
+    ('img', 'UH47_img_Europe_labelled_RA.mat'),
+    ('img', 'UL23_img_Europe_labelled_MN.mat'),
+    ('img', 'UL23_img_Europe_labelled_RA.mat'),
+    ('img', 'UL31_img_konijntjes_labelled_MN.mat'),
+    ('img', 'UL31_img_konijntjes_labelled_RA.mat'),
+    ('img', 'UL39_img_konijntjes_labelled_MN.mat'),
+    ('img', 'UL39_img_konijntjes_labelled_RA.mat'),
+    ('img', 'UL43_img_Rome_labelled_MN.mat'),
+    ('img', 'UL43_img_Rome_labelled_RA.mat'),
+    ('img', 'UL47_img_konijntjes_labelled_MN.mat'),
+    ('img', 'UL47_img_konijntjes_labelled_RA.mat'),
+    ('video', 'TH34_video_BergoDalbana_labelled_MN.mat'),
+    ('video', 'TH34_video_BergoDalbana_labelled_RA.mat'),
+    ('video', 'TH38_video_dolphin_fov_labelled_MN.mat'),
+    ('video', 'TH38_video_dolphin_fov_labelled_RA.mat'),
+    ('video', 'TL30_video_triple_jump_labelled_MN.mat'),
+    ('video', 'TL30_video_triple_jump_labelled_RA.mat'),
+    ('video', 'UH21_video_BergoDalbana_labelled_MN.mat'),
+    ('video', 'UH21_video_BergoDalbana_labelled_RA.mat'),
+    ('video', 'UH29_video_dolphin_fov_labelled_MN.mat'),
+    ('video', 'UH29_video_dolphin_fov_labelled_RA.mat'),
+    ('video', 'UH47_video_BergoDalbana_labelled_MN.mat'),
+    ('video', 'UH47_video_BergoDalbana_labelled_RA.mat'),
+    ('video', 'UL23_video_triple_jump_labelled_MN.mat'),
+    ('video', 'UL23_video_triple_jump_labelled_RA.mat'),
+    ('video', 'UL27_video_triple_jump_labelled_MN.mat'),
+    ('video', 'UL27_video_triple_jump_labelled_RA.mat'),
+    ('video', 'UL31_video_triple_jump_labelled_MN.mat'),
+    ('video', 'UL31_video_triple_jump_labelled_RA.mat'),
+]
+
+
+@pytest.mark.parametrize('name', labeled_files)
 def test_labeled(name):
     data, target_labels, target_events, px2deg, sr = load_data(name[0], name[1])
 
@@ -187,3 +191,62 @@ def test_labeled(name):
 #    pl.subplot(212)
 #    ut.show_gaze(pp=p, events=target_events, sampling_rate=sr)
 #    pl.show()
+
+
+def to_dataframe(data, sr):
+    # the classifier takes samples indexed by their timestamps, with the
+    # timing available as `time_rem`
+    df = pd.DataFrame(
+        {'x': data['x'], 'y': data['y']},
+        index=pd.to_datetime(np.arange(len(data)) * 1e9 / sr))
+    df['time_rem'] = df.index
+    return df
+
+
+def check_reference_events(data, monkeypatch, **kwargs):
+    # events of the vectorized saccade detection must be identical to
+    # those of the sample-by-sample reference implementation
+    classifier = clf.EyegazeClassifier(**kwargs)
+    _, p = classifier.preproc(data.copy())
+    events = ut.events2df(classifier(p.copy()))
+    with monkeypatch.context() as m:
+        ut.use_reference_detection(clf, classifier, m.setattr)
+        reference = ut.events2df(classifier(p.copy()))
+    assert len(events) > 1
+    assert events.equals(reference)
+
+
+@pytest.mark.parametrize('name', labeled_files)
+def test_labeled_reference(name, monkeypatch):
+    pytest.importorskip('datalad')
+    data, target_labels, target_events, px2deg, sr = load_data(
+        name[0], name[1])
+    check_reference_events(
+        to_dataframe(data, sr),
+        monkeypatch,
+        px2deg=px2deg,
+        sampling_rate=sr,
+        input_type='px',
+        pursuit_velthresh=5.,
+        noise_factor=3.0,
+        lowpass_cutoff_freq=10.0,
+    )
+
+
+def test_synthetic_reference(monkeypatch):
+    # same check without the labeled data, a sequence of saccades with
+    # PSOs and a patch of missing data
+    samp = np.concatenate([
+        ut.mk_gaze_sample(start_x=start_x, sacc_dist=dist, pso_dist=-dist / 5)
+        for start_x, dist in ((0., 200.), (200., -150.), (50., 300.),
+                              (350., -80.), (270., 120.))])
+    data = ut.expand_samp(samp, y=0.0)
+    data['y'] = ut.get_noise(len(data), 0.0, 2.0)
+    data['x'][3000:3050] = np.nan
+    check_reference_events(
+        to_dataframe(data, 1000.0),
+        monkeypatch,
+        px2deg=0.01,
+        sampling_rate=1000.0,
+        input_type='px',
+    )
@@ -1,4 +1,5 @@
 import numpy as np
+import pandas as pd
 from . import utils as ut
 from .. import clf as d
 
@@ -91,3 +92,53 @@ def test_preproc():
     p = clf.preproc(data.copy(), savgol_length=0, dilate_nan=0)
     assert p['vel'][-1] == 0
     assert p['accel'][-1] == 0
+
+
+def test_angle_deriv():
+    angles = np.array([3.1, -3.1, -3.0, np.nan, 0.5, 0.5, 0.2])
+    time_rem = np.datetime64('2023-06-01T09:00:00', 'ns') + \
+        np.array([0, 20, 40, 60, 80, 140, 160]) * np.timedelta64(1, 'ms')
+    data = np.core.records.fromarrays(
+        [angles, angles, time_rem], names=['x', 'y', 'time_rem'])
+    clf = d.EyegazeClassifier(input_type='deg', **common_args)
+    deriv = clf._get_angle_deriv(data, data['x'])
+    # crossing +-pi takes the short way around, the sign follows the
+    # order of the raw angles
+    assert np.isclose(abs(deriv[0]), (2 * np.pi - 6.2) / 0.02)
+    assert np.isclose(deriv[1], 0.1 / 0.02)
+    # a NaN in second position yields zero, in first position NaN
+    assert deriv[2] == 0
+    assert np.isnan(deriv[3])
+    # irregular sampling is taken from the timestamps
+    assert deriv[4] == 0
+    assert np.isclose(deriv[5], -0.3 / 0.02)
+
+    df = pd.DataFrame(
+        {'x': angles, 'y': angles},
+        index=pd.DatetimeIndex(time_rem).tz_localize('CET'))
+    df['time_rem'] = df.index
+    assert np.array_equal(
+        clf._get_angle_deriv(df, df['x']), deriv, equal_nan=True)
+
+
+def test_dilated_nan_mask():
+    arr = np.zeros(100)
+    arr[10] = np.nan
+    arr[30:33] = np.nan
+    arr[60:70] = np.nan
+    mask, stats = d.get_dilated_nan_mask(arr, 2, 3, return_stats=True)
+    # only the longest cluster is masked, dilated by two on either side
+    assert np.array_equal(np.flatnonzero(mask), np.arange(58, 72))
+    assert stats['count'] == 3
+    assert stats['masked'] == 1
+    assert stats['size_histogram'] == {1: 1, 3: 1, 10: 1}
+    assert np.array_equal(d.get_dilated_nan_mask(arr, 2, 3), mask)
+
+
+def test_nan_free_segments():
+    arr = np.array([np.nan, 1, 2, np.nan, np.nan, 3, np.nan, 4, 5, 6])
+    starts, ends = d.get_nan_free_segments(arr)
+    assert list(starts) == [1, 5, 7]
+    assert list(ends) == [3, 6, 10]
+    starts, ends = d.get_nan_free_segments(np.full(3, np.nan))
+    assert len(starts) == len(ends) == 0
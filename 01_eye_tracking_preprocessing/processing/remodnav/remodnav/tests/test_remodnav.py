@@ -0,0 +1,38 @@
+import inspect
+import pickle
+from .. import clf as d
+from .. import remodnav as r
+
+
+def test_params_defaults():
+    # the parameter object must use the defaults of the classifier
+    params = r.RemodnavParams(px2deg=1.0, sampling_rate=50.0, input_type='deg')
+    for func, names in (
+            (d.EyegazeClassifier.__init__, params.classifier_args),
+            (d.EyegazeClassifier.preproc, params.preproc_args)):
+        for name, param in inspect.signature(func).parameters.items():
+            if param.default is inspect.Parameter.empty:
+                continue
+            assert name in names
+            assert getattr(params, name) == param.default
+
+
+def test_params_from_args():
+    params = r.RemodnavParams.from_args([
+        'remodnav', 'events', '1', '50', 'deg', 'False',
+        '--savgol-length', '0.1',
+        '--pursuit-velthresh', '15'])
+    assert params.outfile == 'events'
+    assert params.sampling_rate == 50.0
+    assert params.input_type == 'deg'
+    assert params.plot_figure is False
+    assert params.savgol_length == 0.1
+    assert params.pursuit_velthresh == 15.0
+    assert params.max_vel == 1000.0
+
+    clf = params.get_classifier()
+    assert clf.sr == 50.0
+    # the classifier is built once
+    assert params.get_classifier() is clf
+    # but not pickled
+    assert pickle.loads(pickle.dumps(params))._classifier is None
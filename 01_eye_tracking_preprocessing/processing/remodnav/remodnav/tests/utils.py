@@ -165,3 +165,76 @@ def show_gaze(data=None, pp=None, events=None,
 def events2df(events):
     import pandas as pd
     return pd.DataFrame(events)
+
+
+# Sample-by-sample reference implementations of the peak and movement
+# on-/offset detection, used to check that the vectorized versions in `clf`
+# yield identical events.
+def find_peaks_loop(vels, threshold):
+    def _get_vels(start, end):
+        v = vels[start:end]
+        v = v[~np.isnan(v)]
+        return v
+
+    sacs = []
+    sac_on = None
+    for i, v in enumerate(vels):
+        if sac_on is None and v > threshold:
+            # start of a saccade
+            sac_on = i
+        elif sac_on is not None and v < threshold:
+            sacs.append([
+                sac_on,
+                i,
+                _get_vels(
+                    sac_on,
+                    min(len(vels), i + 1))
+            ])
+            sac_on = None
+    if sac_on:
+        # end of data, but velocities still high
+        sacs.append([
+            sac_on,
+            len(vels) - 1,
+            _get_vels(sac_on, len(vels))])
+    return sacs
+
+
+def find_movement_onsetidx_loop(vels, start_idx, sac_onset_velthresh):
+    idx = start_idx
+    while idx > 0 \
+            and (vels[idx] > sac_onset_velthresh or
+                 vels[idx] <= vels[idx - 1]):
+        idx -= 1
+    return idx
+
+
+def find_movement_offsetidx_loop(vels, start_idx, off_velthresh):
+    idx = start_idx
+    while idx < len(vels) - 1 \
+            and (vels[idx] > off_velthresh or
+                 (vels[idx] > vels[idx + 1])):
+        idx += 1
+    return idx
+
+
+def velthresh_batch_loop(clf, vels, win_starts, win_ends, batchsize=None):
+    # one call of the adaptive threshold algorithm per context window
+    thresh = [
+        clf.get_adaptive_saccade_velocity_velthresh(vels[start:end])
+        for start, end in zip(win_starts, win_ends)]
+    return np.array([t[0] for t in thresh]), np.array([t[1] for t in thresh])
+
+
+def use_reference_detection(clf_module, clf, patch):
+    """Switch `clf_module` and the classifier `clf` to the reference loops
+
+    `patch` is called as `patch(obj, name, value)`, e.g.
+    `monkeypatch.setattr`.
+    """
+    patch(clf_module, 'find_peaks', find_peaks_loop)
+    patch(clf_module, 'find_movement_onsetidx', find_movement_onsetidx_loop)
+    patch(clf_module, 'find_movement_offsetidx', find_movement_offsetidx_loop)
+    patch(
+        clf, 'get_adaptive_saccade_velocity_velthresh_batch',
+        lambda *args, **kwargs: velthresh_batch_loop(clf, *args, **kwargs))
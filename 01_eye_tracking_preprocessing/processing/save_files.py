@@ -21,14 +21,69 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #####################################################################
 
+import json
 import os
 import pickle
+import shutil
+from typing import Iterator
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-# save_files writes the results of processing into csv and pkl files.
+# Columns by which the Parquet dataset of a proband is partitioned and the names of the partitions.
+PARTITION_COLUMNS = {"groundtruth+phase+": "phase", "groundtruth+scenario+": "scenario"}
+
+# Write the data of a proband as files part-<part>.parquet of a Parquet dataset with one directory per
+# phase and scenario, e.g. <folder>.parquet/phase=1/scenario=highway/part-0.parquet. All columns,
+# including the partition columns, are kept in the files. Returns the written files with their
+# relative paths and row counts.
+def write_parquet_partitions(data: pd.DataFrame, dataset_directory: str, part: int = 0) -> list[dict]:
+    partitions = []
+    for (phase, scenario), partition_data in data.groupby(list(PARTITION_COLUMNS), observed=True, sort=False):
+        path = os.path.join(f"phase={phase}", f"scenario={scenario}", f"part-{part}.parquet")
+        os.makedirs(os.path.join(dataset_directory, os.path.dirname(path)), exist_ok=True)
+        pq.write_table(pa.Table.from_pandas(partition_data), os.path.join(dataset_directory, path))
+        partitions.append({"phase": int(phase), "scenario": str(scenario), "rows": len(partition_data), "path": path})
+    return partitions
+
+# Write the data of a proband as a Parquet dataset with one file per phase and scenario.
+def save_parquet_dataset(data: pd.DataFrame, dataset_directory: str) -> list[dict]:
+    # Remove partitions of an earlier run.
+    if os.path.isdir(dataset_directory):
+        shutil.rmtree(dataset_directory)
+    return write_parquet_partitions(data, dataset_directory)
+
+# Convert the phases to JSON records, times are stored as ISO 8601 strings with their UTC offset.
+def get_phase_records(data_phases: pd.DataFrame) -> list[dict]:
+    data_phases = data_phases.copy()
+    for column in data_phases.select_dtypes(include=["datetime", "datetimetz"]).columns:
+        data_phases[column] = data_phases[column].map(lambda time: time.isoformat())
+    return json.loads(data_phases.to_json(orient="records"))
+
+# Write the phases, the selections and the layout of the Parquet dataset to one JSON sidecar.
+def save_metadata(filename: str, folder: str, data: pd.DataFrame, partitions: list[dict],
+                  data_phases: pd.DataFrame, selected_phases: list[int], selected_scenarios: list[str],
+                  selected_phase_times: list[pd.Timestamp], selected_scenario_times: list[pd.Timestamp]):
+    metadata = {
+        "proband": folder,
+        "dataset": folder + ".parquet",
+        "partitioning": list(PARTITION_COLUMNS.values()),
+        "partitions": partitions,
+        "columns": list(data.columns),
+        "phases": get_phase_records(data_phases),
+        "selected_phases": [int(phase) for phase in selected_phases],
+        "selected_scenarios": list(selected_scenarios),
+        "selected_phase_times": [pd.Timestamp(time).isoformat() for time in selected_phase_times],
+        "selected_scenario_times": [pd.Timestamp(time).isoformat() for time in selected_scenario_times],
+    }
+    with open(filename, "w") as f:
+        json.dump(metadata, f, indent=2)
+
+# save_files writes the results of processing into csv and pkl files, or into a Parquet dataset
+# partitioned by phase and scenario with a JSON metadata sidecar if output_format is "parquet".
 def save_files(data: pd.DataFrame, output_directory: str, folder: str, data_phases: pd.DataFrame,
                selected_phases: list[int], selected_scenarios: list[str], selected_phase_times: list[pd.Timestamp],
-               selected_scenario_times: list[pd.Timestamp]):
+               selected_scenario_times: list[pd.Timestamp], output_format: str = "pickle"):
 
     # Define directory for save.
     directory_save = os.path.join(
@@ -36,6 +91,16 @@ def save_files(data: pd.DataFrame, output_directory: str, folder: str, data_phas
 
     os.makedirs(directory_save, exist_ok=True)
 
+    if output_format == "parquet":
+        partitions = save_parquet_dataset(data, os.path.join(directory_save, folder + ".parquet"))
+        save_metadata(os.path.join(directory_save, "metadata_" + folder + ".json"), folder, data, partitions,
+                      data_phases, selected_phases, selected_scenarios, selected_phase_times,
+                      selected_scenario_times)
+        print('Successfully processed and saved the data from proband ' + folder)
+        return
+    elif output_format != "pickle":
+        raise ValueError("Unknown output format: " + output_format)
+
     try:
         data.to_pickle(directory_save + '/' + folder + '.pkl')
     except:
@@ -53,3 +118,39 @@ def save_files(data: pd.DataFrame, output_directory: str, folder: str, data_phas
         pickle.dump(selected_scenario_times, f, protocol=2)
 
     print('Successfully processed and saved the data from proband ' + folder)
+
+# save_chunked_files writes the processed data of a proband that is given as consecutive chunks. With the
+# Parquet output format every chunk is written as one file per phase and scenario as soon as it is
+# processed, the pickle output format needs the whole data and concatenates the chunks.
+def save_chunked_files(chunks: Iterator[pd.DataFrame], output_directory: str, folder: str,
+                       data_phases: pd.DataFrame, selected_phases: list[int], selected_scenarios: list[str],
+                       selected_phase_times: list[pd.Timestamp], selected_scenario_times: list[pd.Timestamp],
+                       output_format: str = "pickle"):
+    if output_format != "parquet":
+        chunks = list(chunks)
+        if not chunks:
+            raise ValueError("No processed chunks to save for proband " + folder + ".")
+        save_files(pd.concat(chunks), output_directory, folder, data_phases, selected_phases,
+                   selected_scenarios, selected_phase_times, selected_scenario_times, output_format)
+        return
+
+    directory_save = os.path.join(output_directory, folder, "ircam")
+    dataset_directory = os.path.join(directory_save, folder + ".parquet")
+    os.makedirs(directory_save, exist_ok=True)
+    # Remove partitions of an earlier run.
+    if os.path.isdir(dataset_directory):
+        shutil.rmtree(dataset_directory)
+
+    # The columns of the metadata are those of the first chunk, all chunks have the same columns.
+    partitions = []
+    first_chunk = None
+    for part, data in enumerate(chunks):
+        if first_chunk is None:
+            first_chunk = data.iloc[:0]
+        partitions.extend(write_parquet_partitions(data, dataset_directory, part))
+    if first_chunk is None:
+        raise ValueError("No processed chunks to save for proband " + folder + ".")
+    save_metadata(os.path.join(directory_save, "metadata_" + folder + ".json"), folder, first_chunk, partitions,
+                  data_phases, selected_phases, selected_scenarios, selected_phase_times,
+                  selected_scenario_times)
+    print('Successfully processed and saved the data from proband ' + folder)
@@ -0,0 +1,202 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import ast
+import glob
+import hashlib
+import importlib
+import importlib.util
+import inspect
+import json
+import os
+import re
+from typing import Callable
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from processing.dtype_policy import DtypePolicy
+from processing.stage_profiler import StageProfiler
+
+# Key of the Parquet metadata with the column labels of a cached dataframe. Parquet only stores string
+# labels, e.g. the one-hot encoded target zones without a name are floats.
+COLUMNS_KEY = b"stage_cache_columns"
+
+# A Stage is one processing step of the pipeline. The function maps the dataframes of the previous
+# stage, e.g. {"data": ...}, to the dataframes of this stage. The config holds all settings and inputs
+# of the stage that do not come from the previous stage and modules the names of the modules with the
+# code of the stage, both are part of the cache key. The processing modules imported by these modules
+# are part of the code of the stage as well.
+class Stage:
+    def __init__(self, name: str, function: Callable[[dict], dict], config: dict = None,
+                 modules: list[str] = None) -> None:
+        self.name = name
+        self.function = function
+        self.config = config or {}
+        self.modules = modules or []
+
+# Hash of the contents of the given files.
+def get_file_hash(filenames: list[str]) -> str:
+    file_hash = hashlib.sha256()
+    for filename in filenames:
+        with open(filename, "rb") as f:
+            file_hash.update(f.read())
+    return file_hash.hexdigest()
+
+# Check if a name that is imported from a module is a module itself, e.g. a submodule of a package.
+def is_module(name: str) -> bool:
+    try:
+        return importlib.util.find_spec(name) is not None
+    except ModuleNotFoundError:
+        return False
+
+# Get the given modules and all modules of the processing package that they import, directly or through
+# other modules, such that the code version of a stage covers all code that the stage runs.
+def get_module_dependencies(modules: list[str]) -> list[str]:
+    dependencies = set()
+    remaining = list(modules)
+    while remaining:
+        module = remaining.pop()
+        if module in dependencies:
+            continue
+        dependencies.add(module)
+        filename = inspect.getsourcefile(importlib.import_module(module))
+        with open(filename, "r") as f:
+            tree = ast.parse(f.read(), filename)
+        package = module if os.path.basename(filename) == "__init__.py" else module.rpartition(".")[0]
+        for node in ast.walk(tree):
+            if isinstance(node, ast.Import):
+                names = [alias.name for alias in node.names]
+            elif isinstance(node, ast.ImportFrom):
+                base = importlib.util.resolve_name("." * node.level + (node.module or ""), package)
+                names = [base] + [base + "." + alias.name for alias in node.names]
+            else:
+                continue
+            remaining.extend(name for name in names if name.split(".")[0] == "processing" and is_module(name))
+    return sorted(dependencies)
+
+# Hash of the source files of the given modules and the processing modules they import, which changes
+# whenever their code changes.
+def get_code_version(modules: list[str]) -> str:
+    return get_file_hash([
+        inspect.getsourcefile(importlib.import_module(module)) for module in get_module_dependencies(modules)
+    ])
+
+# Get the cache key of every stage. The key of a stage is a hash of the key of the previous stage, the
+# name, the config and the code version of the stage, such that a change invalidates the stage and all
+# stages after it.
+def get_stage_keys(stages: list[Stage], root_config: dict) -> list[str]:
+    keys = []
+    key = hashlib.sha256(json.dumps(root_config, sort_keys=True).encode()).hexdigest()
+    for stage in stages:
+        key = hashlib.sha256(json.dumps(
+            [key, stage.name, stage.config, get_code_version(stage.modules)], sort_keys=True
+        ).encode()).hexdigest()
+        keys.append(key)
+    return keys
+
+# The StageCache stores the dataframes of each stage of a proband as Parquet files
+# <cache_directory>/<folder>/<stage>-<key>.<name>.parquet. Only the last saved key of each stage is kept,
+# the files of a stage with other keys are removed when the stage is saved.
+class StageCache:
+    def __init__(self, cache_directory: str, folder: str) -> None:
+        self.directory = os.path.join(cache_directory, folder)
+
+    def get_path(self, stage: Stage, key: str, name: str) -> str:
+        return os.path.join(self.directory, f"{stage.name}-{key}.{name}.parquet")
+
+    # Load the dataframes of a stage, None if the stage with this key is not cached.
+    def load(self, stage: Stage, key: str) -> dict:
+        names_path = self.get_path(stage, key, "names").replace(".parquet", ".json")
+        if not os.path.isfile(names_path):
+            return None
+        with open(names_path, "r") as f:
+            names = json.load(f)
+        frames = {}
+        for name in names:
+            table = pq.read_table(self.get_path(stage, key, name))
+            frame = table.to_pandas()
+            frame.columns = json.loads(table.schema.metadata[COLUMNS_KEY])
+            frames[name] = frame
+        return frames
+
+    def save(self, stage: Stage, key: str, frames: dict):
+        os.makedirs(self.directory, exist_ok=True)
+        for name, frame in frames.items():
+            labels = json.dumps(list(frame.columns), default=lambda label: label.item())
+            table = pa.Table.from_pandas(frame.set_axis([str(column) for column in frame.columns], axis=1))
+            table = table.replace_schema_metadata({**table.schema.metadata, COLUMNS_KEY: labels.encode()})
+            write_atomically(self.get_path(stage, key, name), lambda path: pq.write_table(table, path))
+        # The list of dataframes is written last and marks the stage as complete.
+        names_path = self.get_path(stage, key, "names").replace(".parquet", ".json")
+        write_atomically(names_path, lambda path: write_json(list(frames), path))
+        self.remove_other_keys(stage, key)
+
+    # Remove the files of the stage that were saved with other keys, they are superseded by this key.
+    def remove_other_keys(self, stage: Stage, key: str):
+        pattern = re.compile(re.escape(stage.name) + r"-([0-9a-f]{64})\.")
+        for path in glob.glob(os.path.join(glob.escape(self.directory), glob.escape(stage.name) + "-*")):
+            match = pattern.match(os.path.basename(path))
+            if match is not None and match.group(1) != key:
+                os.remove(path)
+
+def write_json(value, path: str):
+    with open(path, "w") as f:
+        json.dump(value, f)
+
+# Write a file to a temporary path first, such that parallel workers never read a partial file.
+def write_atomically(path: str, write: Callable[[str], None]):
+    temporary_path = "%s.%d.tmp" % (path, os.getpid())
+    write(temporary_path)
+    os.replace(temporary_path, path)
+
+# Run the stages and apply the dtype policy to the data after each stage. With a cache, the stages are
+# resumed after the last stage whose result is cached and the results of the stages that run are
+# stored. Each stage and the cache accesses are measured with the profiler. Returns the dataframes of
+# the last stage and the name of the stage that was loaded from the cache, None if all stages ran.
+def run_stages(stages: list[Stage], dtype_policy: DtypePolicy, memory_report: dict, cache: StageCache = None,
+               root_config: dict = None, profiler: StageProfiler = None) -> tuple[dict, str]:
+    keys = get_stage_keys(stages, root_config or {})
+    profiler = profiler or StageProfiler("")
+
+    frames = {}
+    resumed_stage = None
+    first_stage = 0
+    if cache is not None:
+        with profiler.measure("load_stage_cache") as record:
+            for i in reversed(range(len(stages))):
+                cached_frames = cache.load(stages[i], keys[i])
+                if cached_frames is not None:
+                    frames, resumed_stage, first_stage = cached_frames, stages[i].name, i + 1
+                    StageProfiler.set_output(record, frames["data"])
+                    break
+
+    for stage, key in zip(stages[first_stage:], keys[first_stage:]):
+        with profiler.measure(stage.name, len(frames["data"]) if "data" in frames else None) as record:
+            frames = stage.function(frames)
+            frames["data"] = dtype_policy.apply_and_report(frames["data"], stage.name, memory_report)
+            StageProfiler.set_output(record, frames["data"], memory_report[stage.name])
+        if cache is not None:
+            with profiler.measure("save_stage_cache", len(frames["data"])):
+                cache.save(stage, key, frames)
+    return frames, resumed_stage
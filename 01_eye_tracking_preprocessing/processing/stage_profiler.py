@@ -0,0 +1,147 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import json
+import os
+import resource
+import sys
+import time
+from contextlib import contextmanager
+import pandas as pd
+
+# Fields of a profile record, one record per processing step of a proband.
+PROFILE_FIELDS = ["proband", "stage", "wall_time_s", "cpu_time_s", "peak_rss_delta_mb", "rows_in", "rows_out",
+                  "bytes_out"]
+
+# Stages whose wall time exceeds this multiple of the median over all probands are flagged in the summary.
+OUTLIER_FACTOR = 3
+
+# Peak resident memory of the process in MB, ru_maxrss is given in bytes on macOS and in KB elsewhere.
+def get_peak_rss() -> float:
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak_rss / 1e6 if sys.platform == "darwin" else peak_rss / 1e3
+
+# The StageProfiler records the wall time, CPU time, growth of the peak resident memory, rows and bytes of
+# each processing step of one proband. The peak memory only grows if a step needs more memory than any
+# step before in the same process, e.g. of a previous proband of the same worker.
+class StageProfiler:
+    def __init__(self, proband: str) -> None:
+        self.proband = proband
+        self.records = []
+        # Records of the steps that are measured at the moment, the innermost step last.
+        self.active_records = []
+
+    # Measure the processing step in the with block. The rows of the output and the bytes are set on the
+    # returned record if the step produces a dataframe. The times of steps that are measured within the
+    # block are not counted for this step, such that the times of all records add up to the total time.
+    @contextmanager
+    def measure(self, stage: str, rows_in: int = None):
+        record = {"proband": self.proband, "stage": stage, "rows_in": rows_in, "rows_out": None,
+                  "bytes_out": None, "wall_time_s": 0.0, "cpu_time_s": 0.0}
+        self.active_records.append(record)
+        peak_rss = get_peak_rss()
+        wall_time = time.perf_counter()
+        cpu_time = time.process_time()
+        try:
+            yield record
+        finally:
+            wall_time = time.perf_counter() - wall_time
+            cpu_time = time.process_time() - cpu_time
+            self.active_records.pop()
+            record["wall_time_s"] += wall_time
+            record["cpu_time_s"] += cpu_time
+            record["peak_rss_delta_mb"] = get_peak_rss() - peak_rss
+            # The time of this step is not counted for the enclosing step.
+            if self.active_records:
+                self.active_records[-1]["wall_time_s"] -= wall_time
+                self.active_records[-1]["cpu_time_s"] -= cpu_time
+            self.records.append(record)
+
+    # Set the rows and the memory usage of the output of a step on its record.
+    @staticmethod
+    def set_output(record: dict, data: pd.DataFrame, memory: int = None):
+        record["rows_out"] = len(data)
+        record["bytes_out"] = int(memory) if memory is not None else None
+
+    def get_profile(self) -> pd.DataFrame:
+        return pd.DataFrame(self.records, columns=PROFILE_FIELDS)
+
+    # Save the records as <proband>.json and <proband>.csv to the directory.
+    def save(self, directory: str):
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, self.proband + ".json"), "w") as f:
+            json.dump([{field: record[field] for field in PROFILE_FIELDS} for record in self.records], f,
+                      indent=2)
+        self.get_profile().to_csv(os.path.join(directory, self.proband + ".csv"), index=False)
+
+# Load the saved profiles of the given probands, probands without a profile are skipped.
+def load_profiles(directory: str, probands: list[str]) -> pd.DataFrame:
+    profiles = []
+    for proband in probands:
+        filename = os.path.join(directory, proband + ".json")
+        if os.path.isfile(filename):
+            with open(filename, "r") as f:
+                profiles.append(pd.DataFrame(json.load(f), columns=PROFILE_FIELDS))
+    if not profiles:
+        return pd.DataFrame(columns=PROFILE_FIELDS)
+    return pd.concat(profiles, ignore_index=True)
+
+# Summarize the profiles of all probands per stage, sorted by the total wall time. A step that runs several
+# times per proband, e.g. per chunk, is first summed per proband. The slowest stages are flagged and the
+# probands for which a stage took more than OUTLIER_FACTOR times the median wall time are listed.
+def summarize_profiles(profiles: pd.DataFrame, slowest_stages: int = 3) -> pd.DataFrame:
+    per_proband = profiles.groupby(["stage", "proband"], sort=False).agg(
+        wall_time_s=("wall_time_s", "sum"),
+        cpu_time_s=("cpu_time_s", "sum"),
+        peak_rss_delta_mb=("peak_rss_delta_mb", "max"),
+    ).reset_index()
+
+    summary = per_proband.groupby("stage", sort=False).agg(
+        probands=("proband", "count"),
+        total_wall_time_s=("wall_time_s", "sum"),
+        median_wall_time_s=("wall_time_s", "median"),
+        max_wall_time_s=("wall_time_s", "max"),
+        total_cpu_time_s=("cpu_time_s", "sum"),
+        max_peak_rss_delta_mb=("peak_rss_delta_mb", "max"),
+    )
+    summary["share_of_wall_time"] = summary["total_wall_time_s"] / summary["total_wall_time_s"].sum()
+    summary["slowest_proband"] = per_proband.loc[per_proband.groupby("stage", sort=False)["wall_time_s"].idxmax()] \
+        .set_index("stage")["proband"]
+
+    median_wall_time = per_proband["stage"].map(summary["median_wall_time_s"])
+    outliers = per_proband[per_proband["wall_time_s"] > OUTLIER_FACTOR * median_wall_time]
+    summary["outlier_probands"] = outliers.groupby("stage")["proband"].agg(" ".join).reindex(summary.index) \
+        .fillna("")
+
+    summary = summary.sort_values("total_wall_time_s", ascending=False)
+    summary["slowest"] = False
+    summary.iloc[:slowest_stages, summary.columns.get_loc("slowest")] = True
+    return summary.reset_index()
+
+# Save the summary of the profiles as summary.csv to the directory and print it.
+def save_profile_summary(directory: str, probands: list[str]):
+    summary = summarize_profiles(load_profiles(directory, probands))
+    summary.to_csv(os.path.join(directory, "summary.csv"), index=False)
+    with pd.option_context("display.max_columns", None, "display.width", 200):
+        print(f"Processing time per stage of {len(probands)} probands:")
+        print(summary.to_string(index=False, float_format="%.2f"))
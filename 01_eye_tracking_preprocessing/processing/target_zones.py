@@ -22,7 +22,10 @@
 #####################################################################
 
 import xml.etree.ElementTree as ET
+from functools import lru_cache
 
+# The file is parsed once per process, the returned names are shared and must not be modified.
+@lru_cache(maxsize=None)
 def get_target_zone_names():
     tree = ET.parse("target_zone_names.xml")
     root = tree.getroot()
@@ -0,0 +1,98 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import os
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable
+
+from processing.target_zones import get_target_zone_names
+
+# State of a worker process, e.g. the pipeline, created once when the worker starts.
+worker_state = None
+
+def initialize_worker(create_state: Callable, args: tuple):
+    global worker_state
+    worker_state = create_state(*args)
+    # Read-only data that all tasks of a worker share.
+    get_target_zone_names()
+
+def run_task(method: str, args: tuple):
+    return getattr(worker_state, method)(*args)
+
+# Memory in MB that is available for new processes. On Linux this is MemAvailable of /proc/meminfo, which
+# includes the page cache that can be reclaimed, e.g. of the raw files that were read before. The free
+# pages of sysconf are only used where /proc/meminfo is missing.
+def get_available_memory() -> float:
+    try:
+        with open("/proc/meminfo", "r") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024 / 1e6
+    except OSError:
+        pass
+    try:
+        pages = os.sysconf("SC_AVPHYS_PAGES")
+    except (ValueError, OSError):
+        pages = os.sysconf("SC_PHYS_PAGES")
+    return pages * os.sysconf("SC_PAGE_SIZE") / 1e6
+
+# Number of workers for the tasks: one per task, at most one per CPU and at most max_workers. With a memory
+# budget in MB per worker, only as many workers as fit into the available memory are started. The budget
+# only sizes the pool, the memory of a worker is not limited.
+def get_worker_count(task_count: int, max_workers: int = None, memory_budget: float = None) -> int:
+    worker_count = min(task_count, os.cpu_count() or 1)
+    if max_workers is not None:
+        worker_count = min(worker_count, max_workers)
+    if memory_budget is not None:
+        worker_count = min(worker_count, int(get_available_memory() // memory_budget))
+    return max(worker_count, 1)
+
+# The WorkerPool runs tasks in persistent worker processes. Every worker creates its state once with
+# create_state(*args), e.g. the pipeline from the config file, such that only the arguments of a task
+# and its result are sent between the processes. Large results should be written to files by the task.
+class WorkerPool:
+    def __init__(self, create_state: Callable, args: tuple, worker_count: int) -> None:
+        self.worker_count = worker_count
+        self.executor = ProcessPoolExecutor(
+            max_workers=worker_count, initializer=initialize_worker, initargs=(create_state, args)
+        )
+
+    def __enter__(self) -> "WorkerPool":
+        return self
+
+    # After an exception the tasks that did not start yet are cancelled.
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close(cancel_tasks=exc_type is not None)
+
+    def close(self, cancel_tasks: bool = False):
+        self.executor.shutdown(cancel_futures=cancel_tasks)
+
+    # Call the method of the worker state for the arguments of each task, returns the results in the
+    # order of the tasks.
+    def map(self, method: str, tasks: list[tuple]) -> list:
+        futures = {self.executor.submit(run_task, method, args): i for i, args in enumerate(tasks)}
+        results = [None] * len(tasks)
+        for done, future in enumerate(as_completed(futures), start=1):
+            results[futures[future]] = future.result()
+            print(f"Finished {done} of {len(tasks)} tasks")
+        return results
@@ -0,0 +1,98 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+import glob
+import os
+import numpy as np
+import pandas as pd
+
+from processing.dtype_policy import DtypePolicy
+from processing.stage_cache import Stage, StageCache, get_module_dependencies, run_stages
+
+def test_module_dependencies():
+    # The kinematics and the eye movement types use the helpers of calculate_velocity.
+    assert "processing.calculate_velocity" in get_module_dependencies(["processing.calculate_acceleration"])
+    assert "processing.calculate_velocity" in get_module_dependencies(["processing.add_eye_movement"])
+    # Relative imports inside the REMODNAV package.
+    assert "processing.remodnav.remodnav.kernels" in get_module_dependencies(["processing.remodnav.remodnav.remodnav"])
+
+# Three stages that count their calls, the second stage has a setting that is part of its cache key.
+def get_stages(calls: dict, offset: float) -> list[Stage]:
+    def count_calls(name, function):
+        def stage_function(frames):
+            calls[name] = calls.get(name, 0) + 1
+            return function(frames)
+        return stage_function
+
+    rng = np.random.default_rng(0)
+    data = pd.DataFrame({"x": rng.standard_normal(100), 1.0: rng.integers(0, 2, 100).astype(float)},
+                        index=pd.date_range("2023-06-01 09:00", periods=100, freq="20ms"))
+    return [
+        Stage("load", count_calls("load", lambda frames: {"data": data.copy()})),
+        Stage("shift", count_calls("shift", lambda frames: {"data": frames["data"] + offset,
+                                                           "events": frames["data"].iloc[::10]}),
+              {"offset": offset}),
+        Stage("square", count_calls("square", lambda frames: {"data": frames["data"] ** 2,
+                                                             "events": frames["events"]})),
+    ]
+
+def run_cached(tmp_path, offset: float) -> tuple[dict, str, dict]:
+    calls = {}
+    frames, resumed_stage = run_stages(get_stages(calls, offset), DtypePolicy(), {},
+                                       StageCache(str(tmp_path), "proband_001"))
+    return frames, resumed_stage, calls
+
+def assert_frames_equal(frames: dict, expected: dict):
+    assert list(frames) == list(expected)
+    for name in expected:
+        pd.testing.assert_frame_equal(frames[name], expected[name], check_freq=False)
+
+def test_run_stages_resume(tmp_path):
+    expected, resumed_stage = run_stages(get_stages({}, 1.0), DtypePolicy(), {})
+    assert resumed_stage is None
+
+    # The first run computes and stores all stages.
+    frames, resumed_stage, calls = run_cached(tmp_path, 1.0)
+    assert resumed_stage is None and calls == {"load": 1, "shift": 1, "square": 1}
+    assert_frames_equal(frames, expected)
+
+    # The second run loads the result of the last stage.
+    frames, resumed_stage, calls = run_cached(tmp_path, 1.0)
+    assert resumed_stage == "square" and calls == {}
+    assert_frames_equal(frames, expected)
+
+    # A changed setting resumes after the last stage before the changed stage.
+    frames, resumed_stage, calls = run_cached(tmp_path, 2.0)
+    assert resumed_stage == "load" and calls == {"shift": 1, "square": 1}
+    assert_frames_equal(frames, run_stages(get_stages({}, 2.0), DtypePolicy(), {})[0])
+
+def test_stage_cache_removes_other_keys(tmp_path):
+    run_cached(tmp_path, 1.0)
+    run_cached(tmp_path, 2.0)
+    directory = os.path.join(str(tmp_path), "proband_001")
+    for stage, names in [("load", ["data"]), ("shift", ["data", "events"]), ("square", ["data", "events"])]:
+        paths = glob.glob(os.path.join(directory, stage + "-*"))
+        # One key per stage: the list of names and one Parquet file per dataframe.
+        assert len({os.path.basename(path).split(".")[0] for path in paths}) == 1
+        assert len(paths) == len(names) + 1
+    assert not glob.glob(os.path.join(directory, "*.tmp"))
@@ -30,7 +30,9 @@ import glob
 from joblib import Parallel, delayed
 from datetime import timedelta
 
-from .aggregation_function import NUMERICAL_FUNCTIONS, BINARY_FUNCTIONS
+from .aggregation_function import (NUMERICAL_FUNCTIONS, BINARY_FUNCTIONS, MOMENT_FUNCTIONS, get_moment_stats,
+                                   get_precision_loss, warn_precision_loss)
+from .rolling_moments import get_rolling_moments
 from .aggregation_config import AggregationConfig
 
 import warnings
@@ -49,7 +51,7 @@ COLUMN_RENAMES = {
 }
 
 
-def get_stats_one_feature(data, key_prefix: str = None):
+def get_stats_one_feature(data, key_prefix: str = None, moment_stats: dict = None):
     boolean = (data.dtypes == "boolean")
     data_nans = data.isna().sum()
     if data_nans > 0:
@@ -70,6 +72,10 @@ def get_stats_one_feature(data, key_prefix: str = None):
                     try:
                         if results["std"] < 1e-5:
                             results[key] = 0.0
+                        elif moment_stats is not None:
+                            if moment_stats['precision_loss']:
+                                warn_precision_loss()
+                            results[key] = moment_stats[key]
                         else:
                             results[key] = value(data)
                     except Exception as e:
@@ -79,7 +85,10 @@ def get_stats_one_feature(data, key_prefix: str = None):
                               + str(results["std"]))
                         results[key] = 0.0
                     continue
-                results[key] = value(data)
+                if moment_stats is not None and key in moment_stats:
+                    results[key] = moment_stats[key]
+                else:
+                    results[key] = value(data)
         else:
             for key in NUMERICAL_FUNCTIONS.keys():
                 results[key] = np.nan
@@ -100,7 +109,8 @@ def get_stats_one_feature(data, key_prefix: str = None):
     return results
 
 
-def __get_stats_window(data: pd.DataFrame, features, epoch_width, start, window_size_sec: int, freq: int):
+def __get_stats_window(data: pd.DataFrame, features, epoch_width, start, window_size_sec: int, freq: int,
+                       moment_stats: dict = None):
     end = start + epoch_width
     window = data.loc[start:end]
     window = window[:-1]
@@ -110,20 +120,85 @@ def __get_stats_window(data: pd.DataFrame, features, epoch_width, start, window_
     }
 
     for column in features:
-        column_agg = get_stats_one_feature(window[column], key_prefix=f'{column}')
+        column_agg = get_stats_one_feature(window[column], key_prefix=f'{column}',
+                                           moment_stats=moment_stats.get(column) if moment_stats else None)
         results.update(column_agg)
     return results
 
 
+# First and end row of the window of __get_stats_window for each start, the rows from start to start +
+# epoch_width without the last of them.
+def get_window_rows(index: pd.DatetimeIndex, date_range: pd.DatetimeIndex, epoch_width):
+    if not index.is_monotonic_increasing:
+        raise ValueError('The index of the data must be sorted to compute the window statistics.')
+    starts = index.searchsorted(date_range, side='left')
+    ends = index.searchsorted(date_range + epoch_width, side='right')
+    return starts, np.where(ends > starts, ends - 1, starts)
+
+
+# Minimum and maximum of the rows [start, end) of each window and each column, NaN values are ignored and
+# windows without valid values are NaN. Each query combines two overlapping ranges of a sparse table of the
+# extrema of all ranges of 2^k rows, so the cost does not depend on the window width.
+def get_window_extrema(values: np.ndarray, starts: np.ndarray, ends: np.ndarray):
+    minimum_levels, maximum_levels = [values], [values]
+    while 2 ** len(minimum_levels) <= len(values):
+        width = 2 ** (len(minimum_levels) - 1)
+        minimum_levels.append(np.fmin(minimum_levels[-1][:-width], minimum_levels[-1][width:]))
+        maximum_levels.append(np.fmax(maximum_levels[-1][:-width], maximum_levels[-1][width:]))
+
+    minimum = np.full((len(starts),) + values.shape[1:], np.nan)
+    maximum = np.full((len(starts),) + values.shape[1:], np.nan)
+    lengths = ends - starts
+    levels = np.floor(np.log2(np.maximum(lengths, 1))).astype(int)
+    for level in np.unique(levels[lengths > 0]):
+        windows = (levels == level) & (lengths > 0)
+        first, last = starts[windows], ends[windows] - 2 ** level
+        minimum[windows] = np.fmin(minimum_levels[level][first], minimum_levels[level][last])
+        maximum[windows] = np.fmax(maximum_levels[level][first], maximum_levels[level][last])
+    return minimum, maximum
+
+
+# Statistics of MOMENT_FUNCTIONS of the numerical features for each window, one dictionary of the statistics
+# per feature and window. The moments slide from window to window instead of being computed from all rows of
+# each window. They are computed in float64 for all features, so the statistics of float32 features are not
+# the same as those of np.mean, np.std and scipy, which accumulate in float32: they differ by the float32
+# rounding errors of the sums, see benchmarks/benchmark_window_moments.py.
+def get_window_moment_stats(data: pd.DataFrame, features, date_range: pd.DatetimeIndex, epoch_width):
+    numerical_features = [column for column in features if data[column].dtype != 'boolean']
+    starts, ends = get_window_rows(data.index, date_range, epoch_width)
+    values = data[numerical_features].to_numpy(dtype=np.float64, na_value=np.nan)
+    moments = get_rolling_moments(values, starts, ends)
+    minimum, maximum = get_window_extrema(values, starts, ends)
+
+    window_stats = [{} for _ in date_range]
+    for i, column in enumerate(numerical_features):
+        dtype = getattr(data[column].dtype, 'numpy_dtype', data[column].dtype)
+        dtype = dtype if np.issubdtype(dtype, np.floating) else np.dtype(np.float64)
+        cumulative_zeros = np.concatenate(([0], np.cumsum(values[:, i] == 0)))
+        stats = get_moment_stats(moments[:, i], cumulative_zeros[ends] - cumulative_zeros[starts],
+                                 np.finfo(dtype).resolution)
+        # Mean and standard deviation keep the precision of the feature like np.mean and np.std.
+        stats['mean'] = stats['mean'].astype(dtype)
+        stats['std'] = stats['std'].astype(dtype)
+        # The deviations from the mean are computed in the dtype of the feature like in scipy.
+        stats['precision_loss'] = get_precision_loss(moments.count[:, i], minimum[:, i].astype(dtype),
+                                                     maximum[:, i].astype(dtype), stats['mean'],
+                                                     np.finfo(dtype).resolution)
+        for window, window_stat in enumerate(window_stats):
+            window_stat[column] = {key: stats[key][window] for key in MOMENT_FUNCTIONS + ['precision_loss']}
+    return window_stats
+
+
 def generate_canlogger_window(subject: int, data: pd.DataFrame, window_size_sec: int, freq: int, shift: int, features):
     input_data = data.copy()
     epoch_width = timedelta(seconds=window_size_sec)
 
     date_range = pd.date_range(start=data.index[0].ceil('s'), end=data.index[-1].floor('s'),
                                freq=f'{shift}s')
+    window_stats = get_window_moment_stats(input_data, features, date_range, epoch_width)
     results = Parallel(n_jobs=1)(
-        delayed(__get_stats_window)(input_data, features, epoch_width, start, window_size_sec, freq) for start in
-        date_range)
+        delayed(__get_stats_window)(input_data, features, epoch_width, start, window_size_sec, freq, moment_stats)
+        for start, moment_stats in zip(date_range, window_stats))
     results = pd.DataFrame(list(filter(None, results)))
     if len(results) == 0:
         return None
@@ -21,9 +21,13 @@
 # OTHER DEALINGS IN THE SOFTWARE.
 #####################################################################
 
+import warnings
+
 import numpy as np
 from scipy.stats import skew, kurtosis, iqr
 
+from .rolling_moments import Moments
+
 NUMERICAL_FUNCTIONS = {
     'mean': np.mean,
     'median': np.nanmedian,
@@ -44,3 +48,43 @@ BINARY_FUNCTIONS = {
     'std': np.std,
 }
 
+
+
+# Statistics of NUMERICAL_FUNCTIONS that are computed from the rolling moments of the windows.
+MOMENT_FUNCTIONS = ['mean', 'std', 'power', 'skewness', 'kurtosis']
+
+
+# Statistics of MOMENT_FUNCTIONS for all windows of one feature from its rolling moments and the number of
+# zeros in each window, with the resolution of the feature like scipy. Skewness and kurtosis are NaN for
+# constant values like in scipy and power is zero for windows without non-zero values.
+def get_moment_stats(moments: Moments, zeros: np.ndarray, resolution: float):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        m2 = moments.m2 / moments.count
+        non_zero = moments.count - zeros
+        power = np.where(non_zero == 0, 0.0, (m2 + moments.mean ** 2) * moments.count / non_zero)
+        undefined = m2 <= (resolution * moments.mean) ** 2
+        skewness = np.where(undefined, np.nan, moments.m3 / moments.count / m2 ** 1.5)
+        kurtosis = np.where(undefined, np.nan, moments.m4 / moments.count / m2 ** 2 - 3)
+    return {
+        'mean': moments.mean,
+        'std': np.sqrt(m2),
+        'power': power,
+        'skewness': skewness,
+        'kurtosis': kurtosis,
+    }
+
+
+# Whether the values of each window are too close to their mean to compute the skewness and kurtosis, like the
+# moment calculation of scipy. The largest deviation of the values from the mean is the one of the minimum or the
+# maximum of the window, so the rows of the window are not needed.
+def get_precision_loss(count: np.ndarray, minimum: np.ndarray, maximum: np.ndarray, mean: np.ndarray,
+                       resolution: float):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        relative_difference = np.maximum(maximum - mean, mean - minimum) / np.abs(mean)
+    return (count > 1) & (relative_difference < 10 * resolution)
+
+
+# Warns like the moment calculation of scipy for a window with precision loss.
+def warn_precision_loss():
+    warnings.warn('Precision loss occurred in moment calculation due to catastrophic cancellation.',
+                  RuntimeWarning)
@@ -0,0 +1,127 @@
+#####################################################################
+# Copyright (C) 2025 ETH Zürich (ethz.ch)
+# Chair of Information Management (im.ethz.ch; github.com/im-ethz)
+# Bosch Lab at University of St. Gallen and ETH Zürich (iot-lab.ch)
+#
+# Authors: Robin Deuber, Kevin Koch, Patrick Langer, Martin Maritsch
+#
+# Licensed under the MIT License (the "License");
+# you may only use this file in compliance with the License.
+# You may obtain a copy of the License at
+#
+#         https://mit-license.org/
+#
+# THE SOFTWARE IS PROVIDED “AS IS”, WITHOUT WARRANTY OF ANY KIND,
+# EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES
+# OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND
+# NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT
+# HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY,
+# WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING
+# FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR
+# OTHER DEALINGS IN THE SOFTWARE.
+#####################################################################
+
+# Compare the CAN window statistics of generate_canlogger_window, whose moment statistics slide from window
+# to window, with the statistics computed from all rows of each window by get_stats_one_feature. Run from the
+# 02_can_data_preprocessing folder:
+#
+#     python -m benchmarks.benchmark_window_moments --duration 3600 --window-size 60
+#
+# The precision loss of the skewness and kurtosis is checked like scipy 1.13 of requirements.txt, later scipy
+# versions check it differently and do not warn for the nearly constant stretch of the float32 signals.
+
+import argparse
+import warnings
+import numpy as np
+import pandas as pd
+from datetime import timedelta
+from timeit import default_timer as timer
+
+from aggregation.aggregated_data_generate import (
+    __get_stats_window as get_stats_window,
+    calculate_differential,
+    generate_canlogger_window,
+)
+from aggregation.aggregation_function import MOMENT_FUNCTIONS
+
+# Synthetic CAN signals at freq Hz with a gap, a constant stretch, a stretch that is too close to its mean for
+# the skewness and kurtosis of float32 values, missing values and a pedal at rest most of the time, converted to
+# nullable dtypes like the processed CAN data.
+def make_synthetic_can_data(duration: float, freq: int, dtype: str, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    n = int(duration * freq)
+    index = pd.date_range("2024-01-01 10:00:00.05", periods=n, freq=f"{1000 // freq}ms")
+    data = pd.DataFrame({
+        "vehicle+velocity+": 30 + np.cumsum(rng.normal(0, 0.1, n)),
+        "driver+steer+angle": rng.normal(0, 5, n),
+        "driver+brake+pressure": np.where(rng.random(n) < 0.7, 0, rng.uniform(0, 20, n)),
+        "driver+gas+position": np.round(rng.uniform(0, 100, n)),
+    }, index=index).astype(dtype)
+    data = data.drop(index[n // 3:n // 3 + 30 * freq])
+    data.iloc[n // 10:n // 10 + 40 * freq, 0] = 31.25
+    data.iloc[n // 2:n // 2 + 90 * freq, 0] = (10000 + rng.uniform(-0.05, 0.05, 90 * freq)).astype(dtype)
+    data.iloc[rng.random(len(data)) < 0.05, 1] = np.nan
+    data["driver+brake+velocity"] = calculate_differential(data["driver+brake+pressure"])
+    return data.convert_dtypes()
+
+# Statistics of each window from all rows of the window, like generate_canlogger_window before the moments
+# slid from window to window.
+def get_window_stats_reference(data: pd.DataFrame, window_size: int, freq: int) -> pd.DataFrame:
+    epoch_width = timedelta(seconds=window_size)
+    date_range = pd.date_range(start=data.index[0].ceil("s"), end=data.index[-1].floor("s"), freq="1s")
+    results = pd.DataFrame([get_stats_window(data, data.columns, epoch_width, start, window_size, freq)
+                            for start in date_range]).set_index("datetime")
+    feature_columns = [column for column in results.columns if column != "agg+proportion_num_samples+CAN+"]
+    return results.dropna(subset=feature_columns, how="all")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the moment statistics of the CAN aggregation.")
+    parser.add_argument("--duration", type=float, default=3600.0,
+                        help="Duration of the synthetic recording in seconds (default: 1 hour).")
+    parser.add_argument("--window-size", type=int, default=60, help="Width of the sliding windows in seconds.")
+    parser.add_argument("--freq", type=int, default=10, help="Sampling rate of the CAN signals in Hz.")
+    args = parser.parse_args()
+    # get_stats_one_feature warns about the missing values of every window.
+    warnings.simplefilter("ignore", UserWarning)
+
+    # The moments are computed in float64 for all features, so the statistics of float64 features only differ
+    # by the order of the sums. np.mean, np.std and scipy accumulate the sums of float32 features in float32,
+    # so their statistics differ from the float64 moments by the float32 rounding errors of the sums. Relative
+    # to means and skewnesses close to zero these errors are large, hence the absolute tolerance.
+    for dtype, rtol, atol in [("float64", 1e-9, 1e-9), ("float32", 2e-4, 1e-4)]:
+        data = make_synthetic_can_data(args.duration, args.freq, dtype)
+
+        start_time = timer()
+        reference = get_window_stats_reference(data, args.window_size, args.freq)
+        reference_time = timer() - start_time
+
+        start_time = timer()
+        result = generate_canlogger_window(1, data, args.window_size, args.freq, 1, data.columns)
+        result_time = timer() - start_time
+
+        assert list(result.columns) == list(reference.columns)
+        assert result.index.equals(reference.index)
+        print(f"{dtype} features: {len(result)} windows of {len(data.columns)} features")
+        print(f"  per window:     {reference_time:10.3f} s")
+        print(f"  rolling:        {result_time:10.3f} s")
+        print("  statistic      max. relative difference  windows that differ")
+        for statistic in MOMENT_FUNCTIONS:
+            differences, windows = 0.0, 0
+            for column in data.columns:
+                key = column + "+" + statistic
+                assert result[key].dtype == reference[key].dtype, key
+                expected = reference[key].to_numpy(dtype=float)
+                actual = result[key].to_numpy(dtype=float)
+                np.testing.assert_allclose(actual, expected, rtol=rtol, atol=atol, equal_nan=True, err_msg=key)
+                valid = np.isfinite(expected) & (np.abs(expected) > atol)
+                differences = max(differences, np.max(np.abs(actual[valid] - expected[valid])
+                                                      / np.abs(expected[valid]), initial=0.0))
+                windows += np.count_nonzero((actual != expected) & ~(np.isnan(actual) & np.isnan(expected)))
+            print(f"  {statistic:<14} {differences:24.3g} {windows:20d}")
+        # The order statistics do not depend on the moments and stay exactly the same.
+        for column in result.columns:
+            if not any(column.endswith("+" + statistic) for statistic in MOMENT_FUNCTIONS):
+                pd.testing.assert_series_equal(result[column], reference[column], check_exact=True)
+
+if __name__ == "__main__":
+    main()